@@ -0,0 +1,486 @@
+"""
+Benchmarks - time release-manager commands on a synthetic workspace.
+
+`build_fixture` creates local git repositories shaped like the real
+workspace (core, tools, editors, lexed, vscode, nvim, comms) with bare
+remotes, a configurable number of extra crates, historical tags and
+commits. `run_bench` runs each scenario in a subprocess with `--trace`,
+reports wall time, and checks the traced subprocess, file-read and
+file-write counts against BUDGETS so that regressions make the run fail.
+The "startup" scenario profiles CLI imports with `python -X importtime`
+and checks them against STARTUP_BUDGETS. The "semver" scenario times the
+in-process `inc` and `compare` calls the release flow makes and checks the
+per-call cost against SEMVER_BUDGETS. tests/test_bench.py runs the
+scenarios once on a small fixture and fails on any BUDGETS overrun.
+"""
+
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from . import common
+from . import journal
+from . import runner
+
+# Repository layout of the fixture, in creation order
+FIXTURE_REPOS = ["core", "tools", "editors", "lexed", "vscode", "nvim", "comms"]
+
+# Current versions written to the fixture manifests
+FIXTURE_VERSIONS = {
+    "lex-core": "0.3.0",
+    "lex-babel": "0.3.0",
+    "lex-cli": "0.3.0",
+    "lex-config": "0.3.0",
+    "lex-analysis": "0.2.0",
+    "lex-lsp": "0.2.0",
+    "lexed": "1.0.0",
+    "vscode": "1.0.0",
+    "nvim": "0.5.0",
+}
+
+# Scenarios: name -> (release-manager arguments, mutates the workspace)
+SCENARIOS = {
+    "check-status": (["check-status"], False),
+    "get-version": (["get-version", "lex-lsp"], False),
+    "release-all --plan": (["release-all", "--plan"], False),
+    "release-all": (["release-all"], True),
+    "push": (["push"], True),
+}
+
+# Untimed commands run on a scenario's fresh copy before it is timed
+SCENARIO_SETUP = {
+    "push": ["release-all"],
+}
+
+# Upper bounds on traced subprocess spawns, file reads and manifest writes
+# per run. They do not depend on the number of tags or commits. Reads include
+# registry discovery, which reads every crate manifest when the lockfile is
+# missing or stale (cold runs, and runs after a release rewrote manifests),
+# so those read counts are for the default 4 extra crates; otherwise only
+# racily new files are hashed again. "rewrite" counts writes to a manifest
+# already written in the same run: a release flushes each touched file once,
+# so it must stay at 0 and "write" equals the number of distinct manifests
+# the release touches.
+BUDGETS = {
+    ("check-status", "cold"): {"subprocess": 7, "read": 39, "write": 0},
+    ("check-status", "warm"): {"subprocess": 0, "read": 0, "write": 0},
+    ("get-version", "cold"): {"subprocess": 0, "read": 1, "write": 0},
+    ("get-version", "warm"): {"subprocess": 0, "read": 1, "write": 0},
+    ("release-all --plan", "cold"): {"subprocess": 7, "read": 38, "write": 0},
+    ("release-all --plan", "warm"): {"subprocess": 7, "read": 14, "write": 0},
+    ("release-all", "cold"): {"subprocess": 76, "read": 39, "write": 14, "rewrite": 0},
+    ("release-all", "warm"): {"subprocess": 43, "read": 39, "write": 7, "rewrite": 0},
+    # One `git push --atomic` per released repository; warm finds them up to date.
+    # The reads hash the manifests the setup release-all has just written.
+    ("push", "cold"): {"subprocess": 6, "read": 24},
+    ("push", "warm"): {"subprocess": 6, "read": 14},
+}
+
+# Crate dependencies written into the fixture manifests (the built-in graph)
+_FIXTURE_DEPS = {
+    "lex-babel": ["lex-core"],
+    "lex-cli": ["lex-core", "lex-babel", "lex-config"],
+    "lex-config": ["lex-core"],
+    "lex-analysis": ["lex-core", "lex-babel"],
+    "lex-lsp": ["lex-core", "lex-babel", "lex-analysis"],
+}
+
+# Fixture files get this mtime so the status cache never sees them as racily new
+_FIXTURE_MTIME = 1700000000
+
+# Startup checks: name -> release-manager arguments, run under `python -X importtime`
+STARTUP_COMMANDS = {
+    "get-version": ["--no-daemon", "get-version", "lex-core"],
+    "bump-version": ["bump-version", "1.2.3", "patch"],
+}
+
+# Startup budgets: time spent importing the package (median, generous to
+# absorb machine noise) and the number of releasemanager modules loaded
+STARTUP_BUDGETS = {
+    "get-version": {"import_ms": 100, "modules": 10},
+    "bump-version": {"import_ms": 60, "modules": 3},
+}
+
+# Semver calls timed by the "semver" scenario: name -> (function, arguments)
+SEMVER_CALLS = {
+    "inc": ("inc", [("1.2.3", "patch"), ("1.2.3", "minor"), ("0.9.1", "major"),
+                    ("1.2.3-beta.4", "prerelease", "beta"), ("1.2.3", "preminor", "rc")]),
+    "compare": ("compare", [("1.2.3", "1.2.4"), ("1.2.3-beta.4", "1.2.3-beta.10"),
+                            ("1.2.3-alpha", "1.2.3"), ("2.0.0+build.1", "2.0.0")]),
+}
+
+# Semver budgets: median microseconds per call (generous to absorb machine noise)
+SEMVER_BUDGETS = {
+    "inc": {"us_per_call": 50},
+    "compare": {"us_per_call": 50},
+}
+
+# Calls per timed semver run
+_SEMVER_ROUNDS = 20000
+
+_GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "Release Bench",
+    "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "Release Bench",
+    "GIT_COMMITTER_EMAIL": "bench@example.com",
+}
+
+
+def _git(repo, *args, stdin=None):
+    """Run git in a fixture repository."""
+    env = dict(os.environ, **_GIT_IDENTITY)
+    return runner.run(["git", "-C", repo] + list(args), input=stdin, env=env, check=True).stdout
+
+
+def _write(root, rel_path, content):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+    os.utime(path, (_FIXTURE_MTIME, _FIXTURE_MTIME))
+
+
+def _crate_manifest(name, version, deps, publish=True):
+    lines = ["[package]", f'name = "{name}"', f'version = "{version}"']
+    if not publish:
+        lines.append("publish = false")
+    lines += ["", "[dependencies]"]
+    lines.extend(f"{dep} = {{ workspace = true }}" for dep in deps)
+    return "\n".join(lines) + "\n"
+
+
+def _workspace_manifest(members, deps):
+    members = ", ".join(f'"{m}"' for m in members)
+    lines = ["[workspace]", f"members = [{members}]", "", "[workspace.dependencies]"]
+    for dep, version, path in deps:
+        if path:
+            lines.append(f'{dep} = {{ path = "{path}", version = "{version}" }}')
+        else:
+            lines.append(f'{dep} = "{version}"')
+    return "\n".join(lines) + "\n"
+
+
+def _write_fixture_files(root, crates):
+    """Write manifests for every repository; extra crates are added to tools and editors.
+
+    The extra crates are `publish = false`, so discovery reads them but does
+    not turn them into release components.
+    """
+    v = FIXTURE_VERSIONS
+    _write(root, "core/Cargo.toml", _crate_manifest("lex-core", v["lex-core"], []).replace(
+        "[dependencies]\n", '[dependencies]\nserde = "1"\n'))
+
+    extra = [f"lex-bench-{i}" for i in range(crates)]
+    for repo, own in (("tools", ["lex-babel", "lex-cli", "lex-config"]),
+                      ("editors", ["lex-analysis", "lex-lsp"])):
+        ws_deps = [("lex-core", v["lex-core"], None)]
+        if repo == "tools":
+            ws_deps += [("lex-babel", v["lex-babel"], "lex-babel"), ("lex-config", v["lex-config"], "lex-config")]
+        else:
+            ws_deps += [("lex-babel", v["lex-babel"], None), ("lex-analysis", v["lex-analysis"], "lex-analysis")]
+        _write(root, f"{repo}/Cargo.toml", _workspace_manifest(own + extra, ws_deps))
+        for name in own:
+            _write(root, f"{repo}/{name}/Cargo.toml", _crate_manifest(name, v[name], _FIXTURE_DEPS[name]))
+        for name in extra:
+            _write(root, f"{repo}/{name}/Cargo.toml", _crate_manifest(name, "0.1.0", ["lex-core"], publish=False))
+
+    lsp_pin = json.dumps({"lex-lsp": f"v{v['lex-lsp']}"}, indent=2) + "\n"
+    for tool in ("lexed", "vscode"):
+        _write(root, f"{tool}/package.json", json.dumps({"name": tool, "version": v[tool]}, indent=2) + "\n")
+        _write(root, f"{tool}/shared/lex-deps.json", lsp_pin)
+    _write(root, "nvim/lua/lex/init.lua", f'local M = {{}}\nM.version = "{v["nvim"]}"\nreturn M\n')
+    _write(root, "nvim/shared/lex-deps.json", lsp_pin)
+    _write(root, "comms/shared/lex-deps.json", json.dumps({"lex-cli": f"lex-cli-v{v['lex-cli']}"}, indent=2) + "\n")
+
+
+def _add_history(repo, commits):
+    """Append commits touching HISTORY.txt in one git fast-import run."""
+    if commits <= 0:
+        return
+    stream = []
+    for i in range(commits):
+        data = f"history {i}\n"
+        message = f"History commit {i}\n"
+        stream.append("commit refs/heads/main")
+        stream.append(f"committer Release Bench <bench@example.com> {1700000000 + i} +0000")
+        stream.append(f"data {len(message)}\n{message}")
+        if i == 0:
+            stream.append("from refs/heads/main^0")
+        stream.append("M 644 inline HISTORY.txt")
+        stream.append(f"data {len(data)}\n{data}")
+    _git(repo, "fast-import", "--quiet", stdin="\n".join(stream) + "\n")
+    _git(repo, "reset", "-q", "--hard")
+
+
+def _components_in(repo):
+    return [comp for comp in FIXTURE_VERSIONS if common.get_repo_details(comp)[0].endswith(os.sep + repo)]
+
+
+def build_fixture(root, crates=4, tags=200, commits=200):
+    """Create a synthetic workspace at root.
+
+    Args:
+        root: Directory to create (must not exist)
+        crates: Extra member crates added to the tools and editors workspaces
+        tags: Historical release tags per component, all older than the current version
+        commits: History commits per repository
+
+    The current version of every component is tagged at HEAD, lex-core has
+    one unreleased change, and each repository tracks a bare remote under
+    `remotes/`. `scripts/release` links back to this release manager.
+    """
+    root = os.path.abspath(root)
+    os.makedirs(os.path.join(root, "scripts"))
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.symlink(here, os.path.join(root, "scripts", "release"))
+    _write(root, "scripts/repos.txt", "\n".join(FIXTURE_REPOS) + "\n")
+    _write_fixture_files(root, crates)
+
+    for repo_name in FIXTURE_REPOS:
+        repo = os.path.join(root, repo_name)
+        remote = os.path.join(root, "remotes", f"{repo_name}.git")
+        _git(repo, "init", "-q", "-b", "main")
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-q", "-m", "Initial commit")
+        initial = _git(repo, "rev-parse", "HEAD").strip()
+        _add_history(repo, commits)
+        head = _git(repo, "rev-parse", "HEAD").strip()
+
+        # Components of a unified-tag repo share tag names, so collect them in a dict
+        refs = {}
+        for comp in _components_in(repo_name):
+            for i in range(tags):
+                refs.setdefault(common.get_tag_name(comp, f"0.0.{i}"), initial)
+            refs[common.get_tag_name(comp, FIXTURE_VERSIONS[comp])] = head
+        if repo_name == "core":
+            refs["v100.0.0"] = head
+        if refs:
+            lines = [f"create refs/tags/{name} {commit}" for name, commit in refs.items()]
+            _git(repo, "update-ref", "--stdin", stdin="\n".join(lines) + "\n")
+        _git(repo, "pack-refs", "--all")
+
+        os.makedirs(os.path.dirname(remote), exist_ok=True)
+        _git(root, "clone", "-q", "--bare", repo, remote)
+        # Relative, so a copy of the fixture pushes to its own remotes
+        _git(repo, "remote", "add", "origin", os.path.relpath(remote, repo))
+        _git(repo, "fetch", "-q", "origin")
+        _git(repo, "branch", "-q", "-u", "origin/main")
+
+    with open(os.path.join(root, "core", "Cargo.toml")) as f:
+        _write(root, "core/Cargo.toml", f.read() + "# unreleased change\n")
+    _git(os.path.join(root, "core"), "commit", "-q", "-am", "Unreleased change")
+    return root
+
+
+def _run_once(root, argv):
+    """Run release-manager in root with tracing; returns (seconds, trace counts)."""
+    fd, trace_path = tempfile.mkstemp(suffix=".json", prefix="release-bench-")
+    os.close(fd)
+    try:
+        script = os.path.join(root, "scripts", "release", "release-manager")
+        result = runner.run(
+            [sys.executable, script, "--trace", trace_path] + argv,
+            cwd=root, env=dict(os.environ, **_GIT_IDENTITY), timeout=0,
+        )
+        if not result.ok:
+            raise RuntimeError(f"release-manager {' '.join(argv)} failed:\n{result.stderr}")
+        elapsed = result.duration
+        with open(trace_path) as f:
+            events = json.load(f)["traceEvents"]
+    finally:
+        os.unlink(trace_path)
+
+    counts = {}
+    written = set()
+    for event in events:
+        counts[event["cat"]] = counts.get(event["cat"], 0) + 1
+        if event["cat"] == "write":
+            path = event["args"].get("path")
+            if path in written:
+                counts["rewrite"] = counts.get("rewrite", 0) + 1
+            written.add(path)
+    return elapsed, counts
+
+
+def _import_profile(root, argv):
+    """Run release-manager under -X importtime; returns (wall seconds, import ms, package modules)."""
+    script = os.path.join(root, "scripts", "release", "release-manager")
+    result = runner.run([sys.executable, "-X", "importtime", script] + argv, cwd=root, timeout=0)
+    if not result.ok:
+        raise RuntimeError(f"release-manager {' '.join(argv)} failed:\n{result.stderr}")
+    entries = []
+    for line in result.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <module, indented by nesting>"
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = len(name) - len(name.lstrip())
+        entries.append((depth, int(cumulative), name.strip()))
+    # Package import cost: cumulative time of the top-level releasemanager imports
+    top = min((depth for depth, _, _ in entries), default=0)
+    total_us = sum(cum for depth, cum, name in entries if depth == top and name.startswith("releasemanager"))
+    modules = [name for _, _, name in entries if name.startswith("releasemanager.")]
+    return result.duration, total_us / 1000.0, modules
+
+
+def _bench_startup(root, name, repeat):
+    """Profile one command's imports; returns a result dict."""
+    runs = [_import_profile(root, STARTUP_COMMANDS[name]) for _ in range(repeat)]
+    budget = STARTUP_BUDGETS.get(name, {})
+    measured = {
+        "import_ms": statistics.median(run[1] for run in runs),
+        "modules": len(runs[-1][2]),
+    }
+    over = {key: measured[key] for key, limit in budget.items() if measured[key] > limit}
+    return {
+        "scenario": f"startup {name}",
+        "mode": "start",
+        "median_ms": statistics.median(run[0] for run in runs) * 1000,
+        "min_ms": min(run[0] for run in runs) * 1000,
+        "import_ms": measured["import_ms"],
+        "modules": measured["modules"],
+        "imported": sorted(runs[-1][2]),
+        "budget": budget,
+        "over_budget": over,
+    }
+
+
+def _bench_semver(name, repeat):
+    """Time one semver function in-process; returns a result dict."""
+    from . import semver
+
+    function_name, calls = SEMVER_CALLS[name]
+    function = getattr(semver, function_name)
+    rounds = max(1, _SEMVER_ROUNDS // len(calls))
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for args in calls:
+                function(*args)
+        runs.append((time.perf_counter() - start) * 1e6 / (rounds * len(calls)))
+    budget = SEMVER_BUDGETS.get(name, {})
+    measured = {"us_per_call": statistics.median(runs)}
+    over = {key: measured[key] for key, limit in budget.items() if measured[key] > limit}
+    return {
+        "scenario": f"semver {name}",
+        "mode": "call",
+        "us_per_call": measured["us_per_call"],
+        "min_us": min(runs),
+        "calls": rounds * len(calls),
+        "budget": budget,
+        "over_budget": over,
+    }
+
+
+def _clear_cache(root):
+    """Drop every cache under target/release-manager/, keeping the release journal."""
+    directory = os.path.join(root, "target", "release-manager")
+    keep = os.path.join(root, journal.JOURNAL_PATH)
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        path = os.path.join(directory, name)
+        if path == keep:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.unlink(path)
+
+
+def _bench_scenario(base, scratch, name, repeat):
+    """Time one scenario cold and warm; returns a list of result dicts."""
+    argv, mutates = SCENARIOS[name]
+    timings = {"cold": [], "warm": []}
+    counts = {}
+    for _ in range(repeat):
+        root = base
+        if mutates:
+            root = os.path.join(scratch, "run")
+            shutil.rmtree(root, ignore_errors=True)
+            shutil.copytree(base, root, symlinks=True)
+        if name in SCENARIO_SETUP:
+            _run_once(root, SCENARIO_SETUP[name])
+        _clear_cache(root)
+        for mode in ("cold", "warm"):
+            elapsed, counts[mode] = _run_once(root, argv)
+            timings[mode].append(elapsed)
+
+    results = []
+    for mode in ("cold", "warm"):
+        budget = BUDGETS.get((name, mode), {})
+        over = {cat: counts[mode].get(cat, 0) for cat, limit in budget.items()
+                if counts[mode].get(cat, 0) > limit}
+        results.append({
+            "scenario": name,
+            "mode": mode,
+            "median_ms": statistics.median(timings[mode]) * 1000,
+            "min_ms": min(timings[mode]) * 1000,
+            "subprocess": counts[mode].get("subprocess", 0),
+            "read": counts[mode].get("read", 0),
+            "write": counts[mode].get("write", 0),
+            "rewrite": counts[mode].get("rewrite", 0),
+            "budget": budget,
+            "over_budget": over,
+        })
+    return results
+
+
+def run_bench(fixture_dir=None, crates=4, tags=200, commits=200, repeat=3, scenarios=None, as_json=False):
+    """Build a fixture (unless fixture_dir already holds one) and benchmark each scenario.
+
+    Exits with status 1 if any scenario exceeds its budget.
+    """
+    scenarios = scenarios or list(SCENARIOS) + ["startup", "semver"]
+    scratch = tempfile.mkdtemp(prefix="release-bench-")
+    try:
+        base = fixture_dir or os.path.join(scratch, "workspace")
+        needs_fixture = any(name != "semver" for name in scenarios)
+        if needs_fixture and not os.path.isdir(os.path.join(base, "core", ".git")):
+            print(f"Building fixture in {base} ({crates} extra crates, {tags} tags, {commits} commits)...",
+                  file=sys.stderr)
+            build_fixture(base, crates=crates, tags=tags, commits=commits)
+
+        results = []
+        for name in scenarios:
+            print(f"Running {name}...", file=sys.stderr)
+            if name == "semver":
+                results.extend(_bench_semver(call, max(3, repeat)) for call in SEMVER_CALLS)
+            elif name == "startup":
+                results.extend(_bench_startup(base, command, max(3, repeat)) for command in STARTUP_COMMANDS)
+            else:
+                results.extend(_bench_scenario(base, scratch, name, max(1, repeat)))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if as_json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'Scenario':<20} {'Mode':<5} {'Median ms':>10} {'Min ms':>8} {'Procs':>6} {'Reads':>6} {'Writes':>6}")
+        print(f"{'-' * 20} {'-' * 5} {'-' * 10} {'-' * 8} {'-' * 6} {'-' * 6} {'-' * 6}")
+        for r in results:
+            flag = "  OVER BUDGET" if r["over_budget"] else ""
+            if r["mode"] == "call":
+                print(f"{r['scenario']:<20} {r['mode']:<5} {r['us_per_call']:>8.2f} us/call "
+                      f"(min {r['min_us']:.2f}, {r['calls']} calls){flag}")
+            elif r["mode"] == "start":
+                print(f"{r['scenario']:<20} {r['mode']:<5} {r['median_ms']:>10.1f} {r['min_ms']:>8.1f} "
+                      f"imports {r['import_ms']:.1f} ms, {r['modules']} modules{flag}")
+            else:
+                print(f"{r['scenario']:<20} {r['mode']:<5} {r['median_ms']:>10.1f} {r['min_ms']:>8.1f} "
+                      f"{r['subprocess']:>6} {r['read']:>6} {r['write']:>6}{flag}")
+
+    failures = [r for r in results if r["over_budget"]]
+    if failures:
+        print("", file=sys.stderr)
+        for r in failures:
+            for cat, count in r["over_budget"].items():
+                print(f"Budget exceeded: {r['scenario']} ({r['mode']}) {cat} {count} > {r['budget'][cat]}",
+                      file=sys.stderr)
+        sys.exit(1)
+    return results
@@ -0,0 +1,198 @@
+"""
+Persistent status cache - reuse parsed manifests and tag indexes across runs.
+
+Manifest entries are keyed by path, mtime and size; tag indexes are keyed by
+the state of each repository's packed-refs, refs/tags and HEAD. Anything whose
+key no longer matches is recomputed and written back.
+"""
+
+import json
+import os
+import tempfile
+import time
+
+CACHE_PATH = "target/release-manager/status-cache.json"
+CACHE_FORMAT = 2
+
+# Files modified this recently are not persisted: a second write within the
+# filesystem's timestamp granularity could otherwise go unnoticed.
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+
+def file_state(path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def git_dir(repo_root):
+    """Resolve a repository's git directory, following `gitdir:` files."""
+    dot_git = os.path.join(repo_root, ".git")
+    if os.path.isfile(dot_git):
+        with open(dot_git, 'r') as f:
+            content = f.read().strip()
+        if content.startswith("gitdir:"):
+            return os.path.normpath(os.path.join(repo_root, content[len("gitdir:"):].strip()))
+    return dot_git
+
+
+def _common_dir(gitdir):
+    """Directory holding shared refs (differs from gitdir for worktrees)."""
+    commondir_file = os.path.join(gitdir, "commondir")
+    if os.path.isfile(commondir_file):
+        with open(commondir_file, 'r') as f:
+            return os.path.normpath(os.path.join(gitdir, f.read().strip()))
+    return gitdir
+
+
+def objects_dir(repo_root):
+    """A repository's object directory (shared between its worktrees)."""
+    return os.path.join(_common_dir(git_dir(repo_root)), "objects")
+
+
+def ref_state(repo_root):
+    """Fingerprint of everything that can change a repository's tags.
+
+    Returns None when the repository has no git directory.
+    """
+    gitdir = git_dir(repo_root)
+    if not os.path.isdir(gitdir):
+        return None
+    common_dir = _common_dir(gitdir)
+
+    tag_dirs = []
+    for dirpath, _, _ in os.walk(os.path.join(common_dir, "refs", "tags")):
+        tag_dirs.append([os.path.relpath(dirpath, common_dir)] + (file_state(dirpath) or []))
+    tag_dirs.sort()
+
+    head = ""
+    try:
+        with open(os.path.join(gitdir, "HEAD"), 'r') as f:
+            head = f.read().strip()
+    except OSError:
+        pass
+    head_ref = None
+    if head.startswith("ref:"):
+        head_ref = file_state(os.path.join(common_dir, head[len("ref:"):].strip()))
+
+    return {
+        "packed_refs": file_state(os.path.join(common_dir, "packed-refs")),
+        "refs_tags": tag_dirs,
+        "head": head,
+        "head_ref": head_ref,
+    }
+
+
+def head_commit(repo_root):
+    """Commit id at HEAD read straight from the git directory, or None if unresolvable."""
+    gitdir = git_dir(repo_root)
+    try:
+        with open(os.path.join(gitdir, "HEAD"), 'r') as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    if not head.startswith("ref:"):
+        return head if is_object_id(head) else None
+
+    ref = head[len("ref:"):].strip()
+    common_dir = _common_dir(gitdir)
+    try:
+        with open(os.path.join(common_dir, ref), 'r') as f:
+            value = f.read().strip()
+        return value if is_object_id(value) else None
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(common_dir, "packed-refs"), 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref and is_object_id(parts[0]):
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+
+def is_object_id(value):
+    return len(value) in (40, 64) and all(c in "0123456789abcdef" for c in value)
+
+
+class StatusCache:
+    """On-disk cache of derived manifest data and tag indexes for one workspace."""
+
+    def __init__(self, root_dir, rebuild=False):
+        self.root_dir = root_dir
+        self.path = os.path.join(root_dir, CACHE_PATH)
+        self.dirty = False
+        self._data = {"format": CACHE_FORMAT, "manifests": {}, "tags": {}}
+        if not rebuild:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("format") == CACHE_FORMAT:
+            self._data = data
+
+    def _is_racy(self, state):
+        return state is None or time.time_ns() - state[0] < RACY_WINDOW_NS
+
+    def manifest_value(self, rel_path, state, key):
+        """Return (hit, value) for a value derived from a manifest in the given stat state."""
+        entry = self._data["manifests"].get(rel_path)
+        if state is None or not entry or entry["state"] != state:
+            return False, None
+        if key not in entry["values"]:
+            return False, None
+        return True, entry["values"][key]
+
+    def store_manifest_value(self, rel_path, state, key, value):
+        """Remember a value derived from a manifest in the given stat state."""
+        if self._is_racy(state):
+            return
+        entry = self._data["manifests"].get(rel_path)
+        if not entry or entry["state"] != state:
+            entry = {"state": state, "values": {}}
+            self._data["manifests"][rel_path] = entry
+        entry["values"][key] = value
+        self.dirty = True
+
+    def tags(self, repo_root, state):
+        """Cached tag->commit map for a repository, or None if stale."""
+        entry = self._data["tags"].get(os.path.relpath(repo_root, self.root_dir))
+        if state is None or not entry or entry["state"] != state:
+            return None
+        return entry["tags"]
+
+    def store_tags(self, repo_root, state, tag_commits):
+        """Remember a repository's tag->commit map for the given ref state."""
+        if state is None:
+            return
+        self._data["tags"][os.path.relpath(repo_root, self.root_dir)] = {
+            "state": state,
+            "tags": tag_commits,
+        }
+        self.dirty = True
+
+    def save(self):
+        """Atomically write the cache back if anything changed."""
+        if not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".status-cache.")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+        self.dirty = False
@@ -0,0 +1,120 @@
+"""
+Change detection - decide whether a component changed since its tag by tree id.
+
+A component changed when the tree object of its directory at the tagged
+commit differs from the one at HEAD. Both are looked up through one
+long-lived `git cat-file --batch-check` process per repository, so the
+answer costs one round trip however long the history is; tree ids of a
+commit never change, so they are remembered for the rest of the run.
+`git diff --name-only` is only run when someone asks for the file list
+(`--explain`).
+"""
+
+import atexit
+import threading
+
+from . import cache
+from . import common
+from . import runner
+
+BATCH_CHECK_COMMAND = ["git", "cat-file", "--batch-check"]
+
+_lock = threading.Lock()
+_batches = {}
+_trees = {}
+
+
+def _batch(repo_root):
+    with _lock:
+        batch = _batches.get(repo_root)
+        if batch is None or not batch.alive:
+            batch = _batches[repo_root] = runner.Batch(BATCH_CHECK_COMMAND, cwd=repo_root)
+    return batch
+
+
+def close():
+    """Stop every cat-file process (registered to run at exit)."""
+    with _lock:
+        batches = list(_batches.values())
+        _batches.clear()
+    for batch in batches:
+        batch.close()
+
+
+atexit.register(close)
+
+
+def _spec(rev, rel_path):
+    return f"{rev}:{'' if rel_path in ('', '.') else rel_path}"
+
+
+def tree_ids(repo_root, revs_and_paths):
+    """Object ids of `<rev>:<path>` for several (rev, path) pairs, in one round trip.
+
+    Results for full commit ids are cached; a missing path maps to None.
+    """
+    result, pending = {}, []
+    with _lock:
+        for key in revs_and_paths:
+            cache_key = (repo_root,) + key
+            if cache_key in _trees:
+                result[key] = _trees[cache_key]
+            elif key not in pending:
+                pending.append(key)
+
+    answers = _batch(repo_root).query(_spec(rev, path) for rev, path in pending) if pending else []
+    for key, answer in zip(pending, answers):
+        parts = answer.split()
+        oid = parts[0] if len(parts) == 3 and parts[1] in ("tree", "blob") else None
+        result[key] = oid
+        if cache.is_object_id(key[0]):
+            with _lock:
+                _trees[(repo_root,) + key] = oid
+    return result
+
+
+def _tag_rev(repo_root, tag_name):
+    """Commit a tag points at (per the tag index), else the tag name itself."""
+    return common.get_workspace().tag_index(repo_root).commit(tag_name) or tag_name
+
+
+def changed_since(repo_root, tag_name, rel_path):
+    """True if rel_path differs between a tag and HEAD (missing on one side counts)."""
+    tag_rev = _tag_rev(repo_root, tag_name)
+    head_rev = common.head_commit(repo_root)
+    if tag_rev == head_rev:
+        return False
+    trees = tree_ids(repo_root, [(tag_rev, rel_path), (head_rev, rel_path)])
+    return trees[(tag_rev, rel_path)] != trees[(head_rev, rel_path)]
+
+
+def changed_components(components):
+    """Map of component -> changed since its current version's tag.
+
+    Components without that tag are reported as changed. All lookups for
+    a repository go out in one batch.
+    """
+    by_repo = {}
+    result = {}
+    for comp in components:
+        repo_root, rel_path = common.get_repo_details(comp)
+        tag_name = common.get_tag_name(comp, common.get_current_version(comp))
+        if not common.tag_exists(comp, tag_name):
+            result[comp] = True
+            continue
+        by_repo.setdefault(repo_root, []).append((comp, _tag_rev(repo_root, tag_name), rel_path))
+
+    for repo_root, entries in by_repo.items():
+        head_rev = common.head_commit(repo_root)
+        keys = [key for _, tag_rev, rel_path in entries for key in ((tag_rev, rel_path), (head_rev, rel_path))]
+        trees = tree_ids(repo_root, keys)
+        for comp, tag_rev, rel_path in entries:
+            result[comp] = tag_rev != head_rev and trees[(tag_rev, rel_path)] != trees[(head_rev, rel_path)]
+    return {comp: result[comp] for comp in components}
+
+
+def explain(repo_root, tag_name, rel_path):
+    """Files changed under rel_path since a tag (runs git diff; for humans only)."""
+    cmd = ["git", "diff", "--name-only", f"{tag_name}..HEAD", "--", rel_path]
+    output = common.run_command(cmd, cwd=repo_root, check=False)
+    return [line for line in output.splitlines() if line.strip()]
@@ -0,0 +1,149 @@
+"""
+Repository cleanliness - check that every repository is committed and pushed.
+
+Each repository costs one `git status --porcelain=v2 --branch -z`, which
+reports uncommitted and untracked files, the branch, its upstream and the
+ahead/behind counts in a single pass. Repositories from scripts/repos.txt
+are checked concurrently. Backs `ensure-clean` (and scripts/ensure-repos-clean)
+and the `release-all --require-clean` precondition.
+"""
+
+import json
+import os
+import sys
+
+from . import common
+from . import discovery
+from . import runner
+from . import scheduler
+
+# --no-optional-locks: never take the index lock just to refresh stat data;
+# -z: NUL-terminated records with paths verbatim (no C-style quoting of tabs,
+# quotes or non-ASCII names)
+STATUS_COMMAND = ["git", "--no-optional-locks", "status", "--porcelain=v2", "--branch", "--untracked-files=normal",
+                  "-z"]
+
+
+def parse_status(output):
+    """Branch, upstream, ahead/behind and changed/untracked paths from `git status --porcelain=v2 -z` output.
+
+    A rename or copy record is followed by a record holding the original
+    path, which is skipped.
+    """
+    info = {"commit": None, "branch": None, "upstream": None, "ahead": None, "behind": None,
+            "changed": [], "untracked": []}
+    records = iter(output.split("\0"))
+    for line in records:
+        if line.startswith("# branch.oid "):
+            oid = line[len("# branch.oid "):]
+            info["commit"] = None if oid == "(initial)" else oid
+        elif line.startswith("# branch.head "):
+            head = line[len("# branch.head "):]
+            info["branch"] = None if head == "(detached)" else head
+        elif line.startswith("# branch.upstream "):
+            info["upstream"] = line[len("# branch.upstream "):]
+        elif line.startswith("# branch.ab "):
+            ahead, behind = line[len("# branch.ab "):].split()
+            info["ahead"], info["behind"] = int(ahead), -int(behind)
+        elif line.startswith("1 "):
+            info["changed"].append(line.split(" ", 8)[8])
+        elif line.startswith("2 "):
+            info["changed"].append(line.split(" ", 9)[9])
+            next(records, None)
+        elif line.startswith("u "):
+            info["changed"].append(line.split(" ", 10)[10])
+        elif line.startswith("? "):
+            info["untracked"].append(line[2:])
+    return info
+
+
+def problems(info):
+    """Reasons a parsed repository status is not clean and pushed."""
+    found = []
+    if info["changed"]:
+        found.append("Has uncommitted changes")
+    if info["untracked"]:
+        found.append("Has untracked files")
+    branch = info["branch"]
+    if branch is None:
+        found.append("Not on any branch (detached HEAD)")
+    elif info["upstream"] is None:
+        found.append(f"Branch '{branch}' has no upstream")
+    elif info["ahead"] is None:
+        found.append(f"Branch '{branch}' tracks {info['upstream']}, which no longer exists")
+    elif info["ahead"] or info["behind"]:
+        found.append(f"Branch '{branch}' is not in sync with remote "
+                     f"({info['ahead']} ahead, {info['behind']} behind)")
+    return found
+
+
+def check_repo(root_dir, repo):
+    """Status record for one repository."""
+    path = os.path.join(root_dir, repo)
+    if not os.path.isdir(path):
+        return {"repo": repo, "status": "missing", "problems": []}
+    result = runner.run(STATUS_COMMAND, cwd=path)
+    if not result.ok:
+        error = (result.stderr or result.stdout).strip() or f"git status exited with {result.returncode}"
+        return {"repo": repo, "status": "error", "problems": [error]}
+    record = {"repo": repo}
+    record.update(parse_status(result.stdout))
+    record["problems"] = problems(record)
+    record["status"] = "dirty" if record["problems"] else "clean"
+    return record
+
+
+def check_repos(repos=None, jobs=None):
+    """Status records for the workspace repositories (default: scripts/repos.txt), in order."""
+    root_dir = common.get_workspace().root_dir
+    if repos is None:
+        repos = discovery.read_repos(root_dir)
+    records = scheduler.run_grouped(repos, lambda repo: repo, lambda repo: check_repo(root_dir, repo), jobs)
+    return [records[repo] for repo in repos]
+
+
+def is_clean(records):
+    """True when no repository has a problem (missing repositories are skipped)."""
+    return not any(record["problems"] for record in records)
+
+
+def print_report(records):
+    """Print records in the format of scripts/ensure-repos-clean."""
+    print("Checking repository status...")
+    print("")
+    for record in records:
+        repo = record["repo"]
+        if record["status"] == "missing":
+            print(f"⚠️  {repo}/ - Directory not found, skipping...")
+        elif record["problems"]:
+            print(f"❌ {repo}/ - {'; '.join(record['problems'])}")
+        else:
+            print(f"✅ {repo}/ - Clean and pushed (branch: {record['branch']})")
+    print("")
+    if is_clean(records):
+        print("✅ All repositories are clean and pushed!")
+    else:
+        print("❌ Some repositories have issues. Please review above.")
+
+
+def ensure_clean(jobs=None, as_json=False):
+    """Check every repository and report; exits 1 unless all are clean and pushed."""
+    records = check_repos(jobs=jobs)
+    if as_json:
+        print(json.dumps({"clean": is_clean(records), "repos": records}, indent=2))
+    else:
+        print_report(records)
+    if not is_clean(records):
+        sys.exit(1)
+
+
+def require_clean(jobs=None):
+    """Exit with the problems listed unless every repository is clean and pushed."""
+    records = check_repos(jobs=jobs)
+    if is_clean(records):
+        return
+    print("Error: repositories must be clean and pushed before releasing:")
+    for record in records:
+        for problem in record["problems"]:
+            print(f"  - {record['repo']}: {problem}")
+    sys.exit(1)
@@ -1,25 +1,65 @@
 """
 Command-line interface for release manager.
+
+Only the modules a command needs are imported: each handler imports its
+backing module itself, so e.g. `get-version` never loads the orchestration,
+benchmark or git plumbing code. Keep module-level imports here light.
 """
 
 import argparse
 import sys
 
-from . import common
-from . import component
-from . import dependencies
-from . import orchestrate
-from . import status
-from . import version
+from . import semver
+from . import trace
+
+
+class _LazyChoices:
+    """argparse choices computed when used (e.g. from the component registry).
+
+    They are not cached, so a long-running daemon sees components discovered
+    after it started. Arguments using it need an explicit metavar, or
+    argparse enumerates the choices while building the parser.
+    """
+
+    def __init__(self, load):
+        self._load = load
+
+    def __contains__(self, value):
+        return value in self._load()
+
+    def __iter__(self):
+        return iter(self._load())
+
+
+def _components():
+    from . import common
+    common.load_registry()
+    return common.get_all_components()
+
+
+def _bench_scenarios():
+    from . import bench
+    return list(bench.SCENARIOS) + ["startup", "semver"]
+
+
+COMPONENTS = _LazyChoices(_components)
 
 
 def cmd_check_status(args):
     """Check release status."""
-    status.check_status()
+    from . import status
+
+    if args.workspaces:
+        status.check_workspaces(args.workspaces, jobs=args.jobs, processes=args.processes,
+                                rebuild_cache=args.no_cache, output_format=args.format)
+    else:
+        status.check_status(jobs=args.jobs, rebuild_cache=args.no_cache, output_format=args.format)
 
 
 def cmd_get_version(args):
     """Get version of a component."""
+    from . import version
+
     try:
         ver = version.get_version(args.component)
         if ver:
@@ -34,6 +74,8 @@ def cmd_get_version(args):
 
 def cmd_set_version(args):
     """Set version of a component."""
+    from . import version
+
     try:
         version.set_version(args.component, args.version)
     except Exception as e:
@@ -43,6 +85,8 @@ def cmd_set_version(args):
 
 def cmd_set_dep_version(args):
     """Set dependency version."""
+    from . import dependencies
+
     try:
         dependencies.set_dep_version(args.component, args.dep, args.version)
     except Exception as e:
@@ -53,7 +97,7 @@ def cmd_set_dep_version(args):
 def cmd_bump_version(args):
     """Bump a version string."""
     try:
-        new_ver = version.bump_version(args.version, args.part, args.preid)
+        new_ver = semver.inc(args.version, args.part, args.preid)
         print(new_ver)
     except Exception as e:
         print(f"Error: {e}")
@@ -62,6 +106,8 @@ def cmd_bump_version(args):
 
 def cmd_update(args):
     """Update component version (bump + set)."""
+    from . import version
+
     try:
         version.update_component_version(args.component, args.part)
     except Exception as e:
@@ -71,6 +117,8 @@ def cmd_update(args):
 
 def cmd_release(args):
     """Release a component (update + commit + tag)."""
+    from . import component
+
     try:
         component.release_component(args.component, args.part)
     except Exception as e:
@@ -80,55 +128,198 @@ def cmd_release(args):
 
 def cmd_propagate_deps(args):
     """Propagate library versions to dependent crates."""
+    from . import dependencies
+
     dependencies.propagate_deps()
 
 
 def cmd_propagate_lsp(args):
     """Propagate LSP version to client tools."""
+    from . import dependencies
+
     dependencies.propagate_lsp()
 
 
 def cmd_propagate_cli(args):
     """Propagate CLI version to client tools."""
+    from . import dependencies
+
     dependencies.propagate_cli()
 
 
 def cmd_release_all(args):
     """Full release orchestration."""
-    orchestrate.release_all()
+    from . import orchestrate
+
+    if args.plan:
+        orchestrate.plan_release_all(jobs=args.jobs, as_json=args.json, resume=args.resume, explain=args.explain,
+                                     require_clean=args.require_clean)
+    else:
+        orchestrate.release_all(jobs=args.jobs, resume=args.resume, explain=args.explain,
+                                require_clean=args.require_clean)
 
 
 def cmd_release_all_crates(args):
     """Release all crates with changes."""
-    orchestrate.release_all_crates()
+    from . import orchestrate
+
+    if args.plan:
+        orchestrate.plan_release_all_crates(as_json=args.json, explain=args.explain)
+    else:
+        orchestrate.release_all_crates(explain=args.explain)
+
+
+def cmd_ensure_clean(args):
+    """Check that every repository is committed and pushed."""
+    from . import clean
+
+    clean.ensure_clean(jobs=args.jobs, as_json=args.json)
 
 
-def main(argv=None):
-    """Main entry point."""
+def cmd_push(args):
+    """Push the repositories the last release run committed and tagged."""
+    from . import common
+    from . import push
+
+    common.load_registry()
+    push.push(jobs=args.jobs, remote=args.remote, retries=args.retries, dry_run=args.dry_run)
+
+
+def cmd_exec(args):
+    """Run a command in every (or each selected) repository concurrently."""
+    from . import common
+    from . import fanout
+
+    command = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not command:
+        print("Error: no command given (usage: release-manager exec [options] -- <command>)")
+        sys.exit(1)
+    if args.shell:
+        command = ["sh", "-c", " ".join(command)]
+    if args.depends_on:
+        common.load_registry()
+    # Builds and installs run for minutes: no limit unless --timeout is given
+    fanout.run_all(command, repos=args.repo, depends_on=args.depends_on, jobs=args.jobs,
+                   buffer=args.buffer, fail_fast=args.fail_fast, timeout=args.timeout or 0)
+
+
+def cmd_setup(args):
+    """Clone the workspace repositories concurrently."""
+    from . import clone
+
+    url_template = args.url or (clone.SSH_URL if args.ssh else clone.HTTPS_URL)
+    if "{repo}" not in url_template:
+        print("Error: --url must contain {repo}, e.g. /srv/git/{repo}.git")
+        sys.exit(1)
+    if (args.refresh_reference or args.dissociate) and not args.reference:
+        print("Error: --refresh-reference and --dissociate need --reference DIR")
+        sys.exit(1)
+    # Clones of large repositories run for minutes: no limit unless --timeout is given
+    clone.setup(jobs=args.jobs, url_template=url_template, filter_spec=args.filter, depth=args.depth,
+                reference_dir=args.reference, refresh_reference=args.refresh_reference,
+                dissociate=args.dissociate, timeout=args.timeout or 0, verbose=args.verbose)
+
+
+def cmd_bench(args):
+    """Benchmark commands on a synthetic workspace."""
+    from . import bench
+
+    try:
+        bench.run_bench(
+            fixture_dir=args.dir,
+            crates=args.crates,
+            tags=args.tags,
+            commits=args.commits,
+            repeat=args.repeat,
+            scenarios=args.scenario,
+            as_json=args.json,
+        )
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def cmd_impact(args):
+    """Show which components changed paths force to release, in order."""
+    import json
+    from . import common
+    from . import graph
+
+    common.load_registry()
+    result = graph.impact(args.paths)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        graph.print_impact(result)
+
+
+def cmd_discover(args):
+    """Show the components discovered in the workspace."""
+    from . import common
+    from . import discovery
+
+    common.load_registry(refresh=args.refresh)
+    discovery.print_registry(as_json=args.json)
+
+
+def cmd_serve(args):
+    """Run the daemon, or stop a running one."""
+    from . import daemon
+
+    if args.stop:
+        if not daemon.stop():
+            print("No daemon running")
+            sys.exit(1)
+        print("Daemon stopped")
+        return
+    daemon.serve(poll_interval=args.poll or daemon.POLL_INTERVAL)
+
+
+def main(argv=None, use_daemon=True, served=False):
+    """Main entry point.
+
+    Read-only commands are answered by a running daemon when one is
+    listening (unless use_daemon is False or --no-daemon is given). The
+    daemon calls this with served=True, which refuses every other command.
+    """
     parser = argparse.ArgumentParser(
         prog="release-manager",
         description="Unified release automation for Lex workspace",
     )
+    parser.add_argument("--trace", metavar="FILE", help="Write a Chrome trace of subprocesses, file I/O and phases to FILE")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                        help="Kill any git command running longer than this (default: 300, 0 for no limit)")
+    parser.add_argument("--no-daemon", action="store_true", help="Never forward the command to a running daemon")
+    # Commands that never edit manifests override edits to skip the edit
+    # transaction; read-only queries set forward so a running daemon answers them
+    parser.set_defaults(edits=True, forward=False)
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # check-status
     p_status = subparsers.add_parser("check-status", help="Show release status report")
-    p_status.set_defaults(func=cmd_check_status)
+    p_status.add_argument("--jobs", "-j", type=int, help="Worker threads (default: one per repository)")
+    p_status.add_argument("--no-cache", action="store_true", help="Ignore the on-disk status cache and rebuild it")
+    p_status.add_argument("--format", choices=["text", "json", "ndjson"], default="text",
+                          help="Output format; ndjson streams one record per component as it resolves")
+    p_status.add_argument("--workspaces", nargs="+", metavar="DIR",
+                          help="Report on these workspace checkouts instead (directories or globs)")
+    p_status.add_argument("--processes", type=int, help="With --workspaces, worker processes (default: one per CPU)")
+    p_status.set_defaults(func=cmd_check_status, forward=True)
 
     # get-version
     p_get_ver = subparsers.add_parser("get-version", help="Get version of a component")
-    p_get_ver.add_argument("component", choices=common.get_all_components(), help="Component name")
-    p_get_ver.set_defaults(func=cmd_get_version)
+    p_get_ver.add_argument("component", choices=COMPONENTS, metavar="component", help="Component name")
+    p_get_ver.set_defaults(func=cmd_get_version, forward=True)
 
     # set-version
     p_set_ver = subparsers.add_parser("set-version", help="Set version of a component")
-    p_set_ver.add_argument("component", choices=common.get_all_components(), help="Component name")
+    p_set_ver.add_argument("component", choices=COMPONENTS, metavar="component", help="Component name")
     p_set_ver.add_argument("version", help="New version string")
     p_set_ver.set_defaults(func=cmd_set_version)
 
     # set-dep-version
     p_set_dep = subparsers.add_parser("set-dep-version", help="Set dependency version")
-    p_set_dep.add_argument("component", choices=common.get_all_components(), help="Component name")
+    p_set_dep.add_argument("component", choices=COMPONENTS, metavar="component", help="Component name")
     p_set_dep.add_argument("dep", help="Dependency name")
     p_set_dep.add_argument("version", help="New version string")
     p_set_dep.set_defaults(func=cmd_set_dep_version)
@@ -136,19 +327,19 @@ def main(argv=None):
     # bump-version
     p_bump = subparsers.add_parser("bump-version", help="Calculate next version")
     p_bump.add_argument("version", help="Current version")
-    p_bump.add_argument("part", choices=["major", "minor", "patch", "premajor", "preminor", "prepatch"], help="Version part to bump")
+    p_bump.add_argument("part", choices=semver.RELEASE_TYPES, help="Version part to bump")
     p_bump.add_argument("--preid", help="Prerelease identifier")
-    p_bump.set_defaults(func=cmd_bump_version)
+    p_bump.set_defaults(func=cmd_bump_version, edits=False)
 
     # update
     p_update = subparsers.add_parser("update", help="Update component version")
-    p_update.add_argument("component", choices=common.get_all_components(), help="Component name")
+    p_update.add_argument("component", choices=COMPONENTS, metavar="component", help="Component name")
     p_update.add_argument("part", choices=["major", "minor", "patch"], help="Version part to bump")
     p_update.set_defaults(func=cmd_update)
 
     # release
     p_release = subparsers.add_parser("release", help="Release a component (update + commit + tag)")
-    p_release.add_argument("component", choices=common.get_all_components(), help="Component name")
+    p_release.add_argument("component", choices=COMPONENTS, metavar="component", help="Component name")
     p_release.add_argument("part", choices=["major", "minor", "patch"], help="Version part to bump")
     p_release.set_defaults(func=cmd_release)
 
@@ -166,11 +357,99 @@ def main(argv=None):
 
     # release-all
     p_release_all = subparsers.add_parser("release-all", help="Full release orchestration")
-    p_release_all.set_defaults(func=cmd_release_all)
+    p_release_all.add_argument("--jobs", "-j", type=int, help="Max repositories processed concurrently (default: one per repo)")
+    p_release_all.add_argument("--plan", action="store_true", help="Print the release plan without writing files or touching git")
+    p_release_all.add_argument("--json", action="store_true", help="With --plan, print the plan as JSON")
+    p_release_all.add_argument("--resume", action="store_true",
+                               help="Continue an interrupted run from its journal instead of starting over")
+    p_release_all.add_argument("--explain", action="store_true", help="List the changed files behind each detected change")
+    p_release_all.add_argument("--require-clean", action="store_true",
+                               help="Refuse to start unless every repository is clean and pushed (ignored with --resume)")
+    p_release_all.set_defaults(func=cmd_release_all, forward=True)
 
     # release-all-crates
     p_release_crates = subparsers.add_parser("release-all-crates", help="Release all crates with changes")
-    p_release_crates.set_defaults(func=cmd_release_all_crates)
+    p_release_crates.add_argument("--plan", action="store_true", help="Print the release plan without writing files or touching git")
+    p_release_crates.add_argument("--json", action="store_true", help="With --plan, print the plan as JSON")
+    p_release_crates.add_argument("--explain", action="store_true", help="List the changed files behind each detected change")
+    p_release_crates.set_defaults(func=cmd_release_all_crates, forward=True)
+
+    # ensure-clean
+    p_clean = subparsers.add_parser("ensure-clean", help="Check that every repository is committed and pushed")
+    p_clean.add_argument("--jobs", "-j", type=int, help="Max repositories checked concurrently (default: all)")
+    p_clean.add_argument("--json", action="store_true", help="Print the status of every repository as JSON")
+    p_clean.set_defaults(func=cmd_ensure_clean, edits=False)
+
+    # push
+    p_push = subparsers.add_parser("push", help="Push the branches and tags of the last release run")
+    p_push.add_argument("--jobs", "-j", type=int, help="Max repositories pushed concurrently (default: all)")
+    p_push.add_argument("--remote", default="origin", help="Remote to push to (default: origin)")
+    p_push.add_argument("--retries", type=int, default=2, help="Retries per repository after a failed push (default: 2)")
+    p_push.add_argument("--dry-run", action="store_true", help="Ask the remotes whether the push would succeed without updating them")
+    p_push.set_defaults(func=cmd_push, edits=False)
+
+    # exec
+    p_exec = subparsers.add_parser("exec", help="Run a command in every repository concurrently")
+    p_exec.add_argument("--jobs", "-j", type=int,
+                        help="Max repositories running at once (default: all); with 1, commands can read stdin")
+    p_exec.add_argument("--repo", action="append", metavar="NAME", help="Only run in this repository (repeatable)")
+    p_exec.add_argument("--depends-on", action="append", metavar="NAME",
+                        help="Only run in repositories depending on this component or repository (repeatable)")
+    p_exec.add_argument("--buffer", action="store_true",
+                        help="Print each repository's output in one block when it finishes instead of prefixed lines")
+    p_exec.add_argument("--fail-fast", action="store_true",
+                        help="After the first failure, kill running commands and start no more")
+    p_exec.add_argument("--shell", action="store_true", help="Run the command through sh -c (pipes, &&, globs)")
+    p_exec.add_argument("cmd", nargs=argparse.REMAINDER, metavar="-- command", help="Command and arguments to run")
+    p_exec.set_defaults(func=cmd_exec, edits=False)
+
+    # setup
+    p_setup = subparsers.add_parser("setup", help="Clone the workspace repositories concurrently")
+    p_setup.add_argument("--jobs", "-j", type=int, help="Max repositories cloned concurrently (default: all)")
+    p_setup.add_argument("--ssh", action="store_true", help="Use SSH URLs (git@github.com:...) instead of HTTPS")
+    p_setup.add_argument("--url", metavar="TEMPLATE",
+                         help="Clone URL with {repo} for the repository name, e.g. /srv/git/{repo}.git")
+    p_setup.add_argument("--filter", metavar="SPEC",
+                         help="Partial clone filter, e.g. blob:none (full history, blobs fetched on demand)")
+    p_setup.add_argument("--depth", type=int, metavar="N", help="Shallow clone of the last N commits (not for releasing)")
+    p_setup.add_argument("--reference", metavar="DIR",
+                         help="Borrow objects from mirrors in DIR (<repo>.git, from `git clone --mirror`)")
+    p_setup.add_argument("--refresh-reference", action="store_true",
+                         help="Create or fetch the mirrors in --reference DIR before cloning")
+    p_setup.add_argument("--dissociate", action="store_true",
+                         help="Copy the borrowed objects so the clones do not depend on the mirrors")
+    p_setup.add_argument("--verbose", "-v", action="store_true", help="Also list repositories that already exist")
+    p_setup.set_defaults(func=cmd_setup, edits=False)
+
+    # bench
+    p_bench = subparsers.add_parser("bench", help="Benchmark commands on a synthetic workspace")
+    p_bench.add_argument("--dir", help="Build (or reuse) the fixture workspace here instead of a temp dir")
+    p_bench.add_argument("--crates", type=int, default=4, help="Extra crates per Cargo workspace (default: 4)")
+    p_bench.add_argument("--tags", type=int, default=200, help="Historical tags per component (default: 200)")
+    p_bench.add_argument("--commits", type=int, default=200, help="History commits per repository (default: 200)")
+    p_bench.add_argument("--repeat", type=int, default=3, help="Runs per scenario (default: 3)")
+    p_bench.add_argument("--scenario", action="append", choices=_LazyChoices(_bench_scenarios), metavar="NAME", help="Only run this scenario (repeatable)")
+    p_bench.add_argument("--json", action="store_true", help="Print results as JSON")
+    p_bench.set_defaults(func=cmd_bench, edits=False)
+
+    # impact
+    p_impact = subparsers.add_parser("impact", help="Show the components changed paths force to release, in order")
+    p_impact.add_argument("paths", nargs="+", metavar="path", help="Changed file or directory (relative to the current directory)")
+    p_impact.add_argument("--json", action="store_true", help="Print the result as JSON")
+    p_impact.set_defaults(func=cmd_impact, edits=False)
+
+    # discover
+    p_discover = subparsers.add_parser("discover", help="Show the components discovered in the workspace")
+    p_discover.add_argument("--refresh", action="store_true", help="Rescan the repositories instead of trusting the registry lockfile")
+    p_discover.add_argument("--json", action="store_true", help="Print the registry as JSON")
+    p_discover.set_defaults(func=cmd_discover, edits=False)
+
+    # serve
+    p_serve = subparsers.add_parser("serve", help="Keep the workspace warm and answer queries over a local socket")
+    p_serve.add_argument("--poll", type=float,
+                         help="Seconds between checks for changed manifests and refs (default: 1)")
+    p_serve.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    p_serve.set_defaults(func=cmd_serve, edits=False)
 
     args = parser.parse_args(argv)
 
@@ -178,4 +457,33 @@ def main(argv=None):
         parser.print_help()
         sys.exit(1)
 
-    args.func(args)
+    # Only dry runs of the release commands are read-only; the daemon only
+    # knows its own workspace
+    read_only = args.forward and getattr(args, "plan", True) and not getattr(args, "workspaces", None)
+    if served and (not read_only or args.trace):
+        print(f"Error: the daemon only answers read-only queries; run `{args.command}` directly",
+              file=sys.stderr)
+        sys.exit(2)
+    if use_daemon and read_only and not args.no_daemon and not args.trace:
+        from . import daemon
+        daemon.forward(sys.argv[1:] if argv is None else argv)
+
+    if args.timeout is not None:
+        from . import runner
+        runner.configure(timeout=args.timeout)
+    if args.trace:
+        trace.enable()
+    try:
+        with trace.span(f"release-manager {args.command}", "phase", kind="command"):
+            if args.edits or args.forward:
+                from . import common
+                common.load_registry()
+            if args.edits:
+                # Manifest edits reach disk at commit points or when the command succeeds
+                with common.edit_transaction():
+                    args.func(args)
+            else:
+                args.func(args)
+    finally:
+        if args.trace:
+            trace.finish(args.trace)
@@ -0,0 +1,164 @@
+"""
+Workspace setup - clone the repositories from scripts/repos.txt concurrently.
+
+Backs `setup` (and scripts/setup.sh). Every missing repository is cloned at
+the same time, optionally as a partial (`--filter=blob:none`) or shallow
+(`--depth N`) clone, and optionally borrowing objects from a local mirror
+directory (`--reference DIR`, holding `git clone --mirror` copies named
+<repo>.git) so only what the mirror lacks crosses the network. Submodules
+are initialised with parallel jobs right after their repository is cloned.
+"""
+
+import os
+import sys
+import time
+
+from . import common
+from . import discovery
+from . import runner
+from . import scheduler
+
+GITHUB_ORG = "lex-fmt"
+HTTPS_URL = f"https://github.com/{GITHUB_ORG}/{{repo}}.git"
+SSH_URL = f"git@github.com:{GITHUB_ORG}/{{repo}}.git"
+
+# Parallel submodule clones per repository (`git submodule update --jobs`)
+SUBMODULE_JOBS = 4
+
+# Clones run unattended and in parallel: fail instead of prompting for credentials
+_ENV = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+
+
+def clone_url(repo, url_template=HTTPS_URL):
+    """Clone URL of a repository; the template's {repo} is replaced by its name."""
+    return url_template.format(repo=repo)
+
+
+def mirror_path(reference_dir, repo):
+    """Mirror of a repository in the reference directory (<repo>.git or <repo>), or None."""
+    for name in (f"{repo}.git", repo):
+        path = os.path.join(reference_dir, name)
+        if os.path.isdir(path):
+            return os.path.abspath(path)
+    return None
+
+
+def refresh_mirror(reference_dir, repo, url, timeout=0):
+    """Create or fetch a repository's mirror in the reference directory; returns a Result."""
+    path = mirror_path(reference_dir, repo)
+    if path is None:
+        os.makedirs(reference_dir, exist_ok=True)
+        argv = ["git", "clone", "--mirror", "--quiet", url, os.path.join(reference_dir, f"{repo}.git")]
+        return runner.run(argv, timeout=timeout, env=_ENV)
+    return runner.run(["git", "--git-dir", path, "fetch", "--prune", "--quiet"], timeout=timeout, env=_ENV)
+
+
+def clone_argv(url, path, filter_spec=None, depth=None, reference=None, dissociate=False):
+    """The `git clone` command for one repository."""
+    argv = ["git", "clone", "--quiet"]
+    if filter_spec:
+        argv.append(f"--filter={filter_spec}")
+    if depth:
+        argv += ["--depth", str(depth)]
+    if reference:
+        argv += ["--reference", reference]
+        if dissociate:
+            argv.append("--dissociate")
+    return argv + ["--", url, path]
+
+
+def submodule_argv(filter_spec=None, depth=None):
+    """The `git submodule update` command initialising every submodule."""
+    argv = ["git", "submodule", "update", "--init", "--recursive", "--quiet", "--jobs", str(SUBMODULE_JOBS)]
+    if filter_spec:
+        argv.append(f"--filter={filter_spec}")
+    if depth:
+        argv += ["--depth", str(depth)]
+    return argv
+
+
+def _error(result):
+    return (result.stderr or result.stdout).strip() or f"{result.command} exited with {result.returncode}"
+
+
+def setup_repo(root_dir, repo, url_template=HTTPS_URL, filter_spec=None, depth=None,
+               reference_dir=None, refresh_reference=False, dissociate=False, timeout=0):
+    """Clone one repository unless it exists, then initialise its submodules; returns a result dict."""
+    path = os.path.join(root_dir, repo)
+    url = clone_url(repo, url_template)
+    record = {"repo": repo, "result": "skipped", "reference": "", "submodules": "", "seconds": 0.0, "error": ""}
+    start = time.perf_counter()
+
+    if not os.path.isdir(os.path.join(path, ".git")):
+        reference = None
+        if reference_dir:
+            if refresh_reference:
+                result = refresh_mirror(reference_dir, repo, url, timeout)
+                if not result.ok:
+                    # A stale or missing mirror only costs speed
+                    print(f"Warning: could not refresh the {repo} mirror: {_error(result)}")
+            reference = mirror_path(reference_dir, repo)
+            record["reference"] = "yes" if reference else "no"
+        result = runner.run(clone_argv(url, path, filter_spec, depth, reference, dissociate),
+                            timeout=timeout, env=_ENV)
+        if not result.ok:
+            record.update(result="failed", error=_error(result), seconds=time.perf_counter() - start)
+            return record
+        record["result"] = "cloned"
+
+    if os.path.isfile(os.path.join(path, ".gitmodules")):
+        result = runner.run(submodule_argv(filter_spec, depth), cwd=path, timeout=timeout, env=_ENV)
+        record["submodules"] = "ok" if result.ok else "failed"
+        if not result.ok:
+            record["error"] = _error(result)
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def print_summary(records):
+    print("")
+    print(f"{'Repository':<15} {'Result':<8} {'Mirror':<6} {'Submodules':<10} {'Seconds':>8}")
+    print(f"{'-' * 15} {'-' * 8} {'-' * 6} {'-' * 10} {'-' * 8}")
+    for r in records:
+        print(f"{r['repo']:<15} {r['result']:<8} {r['reference']:<6} {r['submodules']:<10} {r['seconds']:>8.2f}")
+    for r in records:
+        if r["error"]:
+            print(f"\n[{r['repo']}] {r['error']}")
+
+
+def setup(jobs=None, url_template=HTTPS_URL, filter_spec=None, depth=None, reference_dir=None,
+          refresh_reference=False, dissociate=False, timeout=0, verbose=False):
+    """Clone every missing repository and initialise submodules.
+
+    Exits with status 1 if any clone or submodule update failed.
+    """
+    root_dir = common.get_workspace().root_dir
+    repos = discovery.read_repos(root_dir)
+    if not repos:
+        print(f"Error: no repositories listed in {discovery.REPOS_FILE}")
+        sys.exit(1)
+    print(f"Setting up Lex workspace in {root_dir}")
+
+    def on_result(repo, record):
+        if record["result"] == "cloned":
+            print(f"Cloned {repo} ({record['seconds']:.1f}s)")
+        elif record["result"] == "failed":
+            print(f"Failed to clone {repo}")
+        elif verbose:
+            print(f"Skipping {repo} (already exists)")
+
+    done = scheduler.run_grouped(
+        repos, lambda repo: repo,
+        lambda repo: setup_repo(root_dir, repo, url_template, filter_spec, depth, reference_dir,
+                                refresh_reference, dissociate, timeout),
+        jobs, on_result,
+    )
+    records = [done[repo] for repo in repos]
+    print_summary(records)
+
+    counts = {result: sum(r["result"] == result for r in records) for result in ("cloned", "skipped", "failed")}
+    print("")
+    print(f"Setup complete: {counts['cloned']} cloned, {counts['skipped']} skipped, {counts['failed']} failed")
+    if counts["failed"] or any(r["submodules"] == "failed" for r in records):
+        sys.exit(1)
+    return records
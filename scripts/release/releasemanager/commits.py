@@ -0,0 +1,284 @@
+"""
+Release commits and tags - built with git plumbing from the files a release wrote.
+
+A release commit contains exactly the manifests the release edited
+(Workspace.committable), never whatever else happens to be in the worktree.
+It is assembled in a private index seeded from HEAD: one
+`git hash-object -w --stdin-paths` stores their contents as blobs, one
+`git update-index --index-info` stages just those files, `git write-tree`
+and `git commit-tree` produce the commit and `git update-ref` moves the
+branch. Nothing walks the worktree, so large target/ or node_modules/ trees
+cost nothing. The repository's own index is then updated for the same files
+so `git status` stays clean.
+
+Inside release_transaction() manifests are not flushed at each commit: the
+commit is built from their staged contents, hashed from temporary copies,
+and every committed file reaches disk once when the block ends, however
+many release commits touched it. The per-repository follow-ups wait for the
+end of the block too: each repository's index is updated once for every
+file committed, and its tags are created in one `git update-ref --stdin`
+transaction (tags are only added to the tag index until then).
+"""
+
+import contextlib
+import os
+import tempfile
+import threading
+
+from . import changes
+from . import common
+from . import runner
+
+INDEX_DIR = "target/release-manager/index"
+
+_lock = threading.Lock()
+# repo root -> (commit, tree) the repo's private index currently matches
+_indexes = {}
+# repo root -> {"files": [...], "tags": [(tag, commit)]} while a release
+# transaction is open, else None
+_pending = None
+
+
+def _repo_files(repo_path, paths):
+    """Workspace-relative paths as paths relative to their repository."""
+    workspace = common.get_workspace()
+    return [os.path.relpath(workspace.path(p), repo_path).replace(os.sep, "/") for p in paths]
+
+
+def _private_index(repo_path, head):
+    """Environment selecting the repository's private index, and the tree it holds.
+
+    The index is re-seeded from HEAD unless it still matches the commit this
+    process last made there.
+    """
+    workspace = common.get_workspace()
+    index_path = os.path.join(workspace.root_dir, INDEX_DIR, f"{workspace.repo_name(repo_path)}.index")
+    env = dict(os.environ, GIT_INDEX_FILE=index_path)
+    with _lock:
+        seeded = _indexes.get(repo_path)
+    if seeded is None or seeded[0] != head:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        common.run_command(["git", "read-tree", head], cwd=repo_path, env=env)
+        seeded = (head, changes.tree_ids(repo_path, [(head, ".")])[(head, ".")])
+        with _lock:
+            _indexes[repo_path] = seeded
+    return env, seeded[1]
+
+
+def _index_info(repo_path, paths, files):
+    """`git update-index --index-info` input staging files at their staged (else on-disk) contents.
+
+    All blobs are written by one `git hash-object` call. Contents are stored
+    as they are (no clean filters), like the manifests the release wrote.
+    """
+    workspace = common.get_workspace()
+    with tempfile.TemporaryDirectory(prefix="release-blobs-") as tmp_dir:
+        sources = []
+        for index, rel_path in enumerate(paths):
+            content = workspace.staged_text(rel_path)
+            if content is None:
+                sources.append(workspace.path(rel_path))
+                continue
+            source = os.path.join(tmp_dir, str(index))
+            with open(source, 'wb') as f:
+                f.write(content.encode())
+            sources.append(source)
+        oids = common.run_command(["git", "hash-object", "-w", "--no-filters", "--stdin-paths"], cwd=repo_path,
+                                  input="".join(source + "\n" for source in sources)).split()
+    lines = []
+    for rel_path, file, oid in zip(paths, files, oids):
+        mode = "100755" if os.access(workspace.path(rel_path), os.X_OK) else "100644"
+        lines.append(f"{mode} {oid}\t{file}\n")
+    return "".join(lines)
+
+
+def commit(repo_path, message, paths=None):
+    """Commit the files a release wrote in a repository.
+
+    paths (workspace-relative) replaces the files the workspace tracked,
+    e.g. when resuming a run that wrote them. Returns the new commit id, or
+    None when the files match HEAD. In a dry run the commit is recorded on
+    the plan and "HEAD" is returned. Inside release_transaction() staged
+    files are committed without being flushed.
+    """
+    workspace = common.get_workspace()
+    repo = workspace.repo_name(repo_path)
+    if not _in_transaction():
+        workspace.flush(repo)
+    if workspace.plan is not None:
+        if not workspace.plan.uncommitted(repo) and not paths:
+            return None
+        workspace.plan.record_commit(repo, message, paths)
+        return "HEAD"
+
+    if paths is None:
+        paths = workspace.committable(repo)
+    if not paths:
+        return None
+    files = _repo_files(repo_path, paths)
+
+    head = common.head_commit(repo_path)
+    env, head_tree = _private_index(repo_path, head)
+    info = _index_info(repo_path, paths, files)
+    common.run_command(["git", "update-index", "--add", "--index-info"], cwd=repo_path, env=env, input=info)
+    tree = common.run_command(["git", "write-tree"], cwd=repo_path, env=env)
+    if tree == head_tree:
+        workspace.mark_committed(paths)
+        return None
+
+    commit_id = common.run_command(["git", "commit-tree", tree, "-p", head, "-m", message], cwd=repo_path)
+    common.run_command(["git", "update-ref", "-m", f"commit: {message}", "HEAD", commit_id, head], cwd=repo_path)
+    with _lock:
+        _indexes[repo_path] = (commit_id, tree)
+    workspace.mark_committed(paths)
+    if not _defer(repo_path, "files", files):
+        sync_index(repo_path, files)
+    return commit_id
+
+
+def _in_transaction():
+    with _lock:
+        return _pending is not None
+
+
+def _defer(repo_path, kind, items):
+    """Queue work for the end of the open release transaction; False if none is open."""
+    with _lock:
+        if _pending is None:
+            return False
+        queued = _pending.setdefault(repo_path, {"files": [], "tags": []})[kind]
+        queued.extend(item for item in items if item not in queued)
+    return True
+
+
+def sync_index(repo_path, files):
+    """Update the repository's own index for committed files so they no longer show as changed."""
+    try:
+        common.run_command(["git", "update-index", "--add", "--"] + files, cwd=repo_path, check=False)
+    except runner.CommandError as e:
+        print(f"Warning: could not update the index of {os.path.basename(repo_path)}: {e}")
+        print(f"  Run `git reset -q -- {' '.join(files)}` in {repo_path}")
+
+
+def modified_manifests(repo_path):
+    """Registry manifests in a repository that differ from HEAD (workspace-relative).
+
+    Used to pick up edits an interrupted run flushed but never committed.
+    """
+    workspace = common.get_workspace()
+    repo = workspace.repo_name(repo_path)
+    paths = [p for p in workspace.manifest_paths() if workspace.repo_name(p) == repo and workspace.exists(p)]
+    if not paths:
+        return []
+    output = common.run_command(["git", "diff", "--name-only", "HEAD", "--"] + _repo_files(repo_path, paths),
+                                cwd=repo_path)
+    return [f"{repo}/{line}" for line in output.splitlines() if line.strip()]
+
+
+def restore_unflushed(repo_path, commit_ids):
+    """Write back HEAD's contents for manifests release commits changed but the worktree lacks.
+
+    A run killed inside release_transaction() may have committed files it
+    never flushed; the worktree and index then still hold their older
+    contents. In a dry run the restore is only recorded. Returns the
+    workspace-relative paths restored.
+    """
+    workspace = common.get_workspace()
+    stale = modified_manifests(repo_path)
+    if not stale:
+        return []
+    repo = workspace.repo_name(repo_path)
+    try:
+        output = common.run_command(["git", "show", "--name-only", "--format=", "--no-walk"] + list(commit_ids),
+                                    cwd=repo_path, check=False)
+    except runner.CommandError:
+        # Commits gone from the repository; verify_run reports them
+        return []
+    committed = {f"{repo}/{line.strip()}" for line in output.splitlines() if line.strip()}
+    restored = [p for p in stale if p in committed]
+    files = _repo_files(repo_path, restored)
+    for rel_path, file in zip(restored, files):
+        result = runner.run(["git", "cat-file", "blob", f"HEAD:{file}"], cwd=repo_path, check=True)
+        workspace.write_text(rel_path, result.stdout)
+    if restored and workspace.plan is None:
+        workspace.flush(repo)
+        workspace.mark_committed(restored)
+        sync_index(repo_path, files)
+    return restored
+
+
+def create_tag(repo_path, tag_name, commit=None):
+    """Create a lightweight tag at a commit, HEAD by default; returns the commit tagged.
+
+    Inside release_transaction() the tag is written when the transaction
+    ends. In a dry run it is recorded on the plan instead.
+    """
+    workspace = common.get_workspace()
+    if workspace.plan is not None:
+        workspace.plan.record_tag(workspace.repo_name(repo_path), tag_name)
+        workspace.tag_index(repo_path).add(tag_name, commit or "HEAD")
+        return commit or "HEAD"
+
+    commit = commit or common.head_commit(repo_path)
+    if _defer(repo_path, "tags", [(tag_name, commit)]):
+        workspace.tag_index(repo_path).add(tag_name, commit)
+    else:
+        write_tags(repo_path, [(tag_name, commit)])
+    return commit
+
+
+def write_tags(repo_path, tags):
+    """Create (tag, commit) pairs in one ref transaction: all of them or none."""
+    workspace = common.get_workspace()
+    request = "".join(f"create refs/tags/{tag_name} {commit}\n" for tag_name, commit in tags)
+    try:
+        runner.run(["git", "update-ref", "--stdin"], cwd=repo_path, input=request, check=True)
+    except runner.CommandError:
+        workspace.invalidate_tags(repo_path)
+        raise
+    index = workspace.tag_index(repo_path)
+    for tag_name, commit in tags:
+        index.add(tag_name, commit)
+
+
+@contextlib.contextmanager
+def release_transaction():
+    """Defer index updates and tag creation to the end of the block, one git call each per repository.
+
+    The deferred work runs even when the block fails, so the releases that
+    were committed keep their tags. Nested transactions join the outer one.
+    """
+    global _pending
+    with _lock:
+        owner = _pending is None
+        if owner:
+            _pending = {}
+    if not owner:
+        yield
+        return
+    try:
+        yield
+    finally:
+        with _lock:
+            pending, _pending = _pending, None
+        _finish(pending)
+
+
+def _finish(pending):
+    # Committed files reach disk before the indexes are updated from them
+    common.get_workspace().flush_committed()
+    errors = []
+    for repo_path, work in pending.items():
+        repo = os.path.basename(repo_path)
+        if work["files"]:
+            sync_index(repo_path, work["files"])
+        if not work["tags"]:
+            continue
+        try:
+            write_tags(repo_path, work["tags"])
+            print(f"Created tags in {repo}: {', '.join(tag for tag, _ in work['tags'])}")
+        except runner.CommandError as e:
+            print(f"Failed to create tags in {repo}: {e}")
+            errors.append(e)
+    if errors:
+        raise errors[0]
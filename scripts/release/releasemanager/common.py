@@ -2,11 +2,20 @@
 Common utilities and registry for release management.
 """
 
+import contextlib
+import copy
 import json
 import os
 import re
-import subprocess
 import sys
+import tempfile
+import threading
+
+from . import cache
+from . import runner
+from . import tags
+from . import tomlscan
+from . import trace
 
 # Mapping of crate name to its Cargo.toml path (relative to ROOT_DIR)
 CRATES = {
@@ -57,137 +66,564 @@ TOOLS = {
     }
 }
 
+# Dependency graph between crates: target -> [sources]
+CRATE_DEPS = {
+    "lex-babel": ["lex-core"],
+    "lex-cli": ["lex-core", "lex-babel", "lex-config"],
+    "lex-config": ["lex-core"],
+    "lex-analysis": ["lex-core", "lex-babel"],
+    "lex-lsp": ["lex-core", "lex-babel", "lex-analysis"],
+}
+
+# Tools that depend on lex-lsp binary
+LSP_CLIENTS = ["lexed", "vscode", "nvim"]
+
+# Tools that depend on lex-cli binary
+CLI_CLIENTS = ["comms"]
+
+# Crates in dependency order (every crate after the crates it depends on)
+CRATE_ORDER = ["lex-core", "lex-babel", "lex-config", "lex-cli", "lex-analysis", "lex-lsp"]
+
+# The registries above are the built-in defaults; load_registry() replaces
+# their contents with what discovery finds in the workspace
+_REGISTRY_ROOT = None
+
 # ROOT_DIR is the lex-workspace root (parent of scripts/)
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
 
 
-def run_command(cmd, cwd=None, capture_output=True, check=True):
-    """Run a shell command and return output."""
+def run_command(argv, cwd=None, check=True, timeout=None, env=None, input=None):
+    """Run a command (argv list, no shell) and return its stripped stdout.
+
+    With check=True a failure prints the command's output and exits;
+    otherwise runner.CommandError is raised.
+    """
     if cwd is None:
-        cwd = ROOT_DIR
-    try:
-        if capture_output:
-            result = subprocess.check_output(cmd, shell=True, cwd=cwd, stderr=subprocess.STDOUT)
-            return result.decode('utf-8').strip()
-        else:
-            subprocess.check_call(cmd, shell=True, cwd=cwd)
-            return None
-    except subprocess.CalledProcessError as e:
-        if check:
-            print(f"Error running command: {cmd}")
-            if e.output:
-                print(e.output.decode('utf-8'))
-            sys.exit(e.returncode)
-        else:
-            raise
-
-
-def check_semver_installed():
-    """Verify semver CLI is available."""
+        cwd = get_workspace().root_dir
+    result = runner.run(argv, cwd=cwd, timeout=timeout, env=env, input=input)
+    if result.ok:
+        return result.stdout.strip()
+    if check:
+        print(f"Error running command: {result.command}")
+        if result.timed_out:
+            print(f"Timed out after {result.duration:.0f}s")
+        output = (result.stdout + result.stderr).strip()
+        if output:
+            print(output)
+        sys.exit(result.returncode or 1)
+    raise runner.CommandError(result)
+
+
+def parse_crate_version(doc, toml_path):
+    """Extract the [package] version from a scanned Cargo.toml."""
+    if ("package",) not in doc.tables:
+        raise ValueError(f"Could not find [package] section in {toml_path}")
+    entry = doc.package_version()
+    if entry:
+        return entry.value
+    raise ValueError(f"Could not find version in {toml_path}")
+
+
+def parse_lua_version(content):
+    """Extract the version string from Lua source."""
+    match = re.search(r'version\s*=\s*"([^"]+)"', content)
+    if match:
+        return match.group(1)
+    return None
+
+
+def parse_crate_dependencies(doc):
+    """Extract lex-* dependency versions from a scanned Cargo.toml."""
+    return doc.dependency_versions("lex-")
+
+
+class Workspace:
+    """Snapshot of the workspace manifests, parsed once per invocation.
+
+    File contents and the versions and dependencies derived from them are
+    memoised on first use. Every derived entry remembers the manifest it came
+    from, so a write made through the workspace drops exactly the entries
+    that depended on the written file.
+
+    The snapshot may be shared between worker threads: caches are only
+    mutated under a lock, while file and git I/O happen outside it.
+
+    Writes form an edit transaction: they are visible to later reads at once
+    but only reach disk when flush() is called at a commit point, with one
+    atomic write per touched file however often it was edited.
+
+    Flushed files stay "committable" until a release commit picks them up,
+    so commits.commit() knows exactly which files the release wrote. Inside a
+    release transaction commits are built from the staged contents instead,
+    and flush_committed() writes each committed file once at the end.
+
+    With a ReleasePlan attached the workspace is a dry run: writes are never
+    flushed but recorded, and commits and tags only record intent.
+
+    A watched workspace (watch=True, used by the daemon) remembers the stat
+    of every file it read and the ref state of every tag index it built, so
+    refresh() can drop exactly what changed on disk.
+
+    Components are resolved against the workspace's own registry (in the
+    form discover_registry() returns) when one is given, else against the
+    process-wide registry that load_registry() maintains.
+    """
+
+    def __init__(self, root_dir=None, plan=None, watch=False, registry=None):
+        self.root_dir = root_dir or ROOT_DIR
+        self.plan = plan
+        self.watch = watch
+        self.registry = registry
+        self._repo_map = _build_repo_map(registry["crates"], registry["tools"]) if registry else None
+        self._files = {}
+        self._derived = {}
+        self._tags = {}
+        self._states = {}
+        self._tag_states = {}
+        self._written = set()
+        self._pending = {}
+        self._committable = set()
+        self._committed_staged = {}
+        self._lock = threading.RLock()
+        self._cache = None
+
+    def fork(self, plan=None):
+        """New workspace starting from everything this one has read (e.g. a warm dry run)."""
+        other = Workspace(self.root_dir, plan=plan, registry=self.registry)
+        with self._lock:
+            other._files = dict(self._files)
+            other._derived = dict(self._derived)
+            other._tags = {repo: tags.TagIndex(index.commits()) for repo, index in self._tags.items()}
+            other._written = set(self._written)
+        return other
+
+    def enable_cache(self, rebuild=False):
+        """Back the snapshot with the on-disk status cache (rebuild ignores its contents)."""
+        if self._cache is not None and not rebuild:
+            return
+        self._cache = cache.StatusCache(self.root_dir, rebuild=rebuild)
+
+    def save_cache(self):
+        """Persist the on-disk status cache if one is enabled."""
+        if self._cache is not None:
+            self._cache.save()
+
+    @property
+    def crates(self):
+        """Crate name -> Cargo.toml path."""
+        return self.registry["crates"] if self.registry is not None else CRATES
+
+    @property
+    def crate_to_workspace(self):
+        """Crate name -> workspace root manifest."""
+        return self.registry["crate_to_workspace"] if self.registry is not None else CRATE_TO_WORKSPACE
+
+    @property
+    def tools(self):
+        """Client tool name -> config."""
+        return self.registry["tools"] if self.registry is not None else TOOLS
+
+    def path(self, rel_path):
+        """Absolute path of a workspace-relative file."""
+        return os.path.join(self.root_dir, rel_path)
+
+    def repo_name(self, path):
+        """Name of the repository (top-level directory) containing a path."""
+        rel_path = os.path.relpath(path, self.root_dir) if os.path.isabs(path) else path
+        return rel_path.replace(os.sep, "/").split("/")[0]
+
+    def manifest_paths(self):
+        """All manifest files referenced by the registry."""
+        paths = []
+        for path in list(self.crates.values()) + list(self.crate_to_workspace.values()):
+            if path not in paths:
+                paths.append(path)
+        for config in self.tools.values():
+            for key in ("version_file", "deps_file"):
+                path = config.get(key)
+                if path and path not in paths:
+                    paths.append(path)
+        return paths
+
+    def load(self):
+        """Read every registered manifest that exists on disk."""
+        for path in self.manifest_paths():
+            if self.exists(path):
+                self.read_text(path)
+
+    def exists(self, rel_path):
+        """Check whether a workspace-relative file exists."""
+        return rel_path in self._files or os.path.exists(self.path(rel_path))
+
+    def read_text(self, rel_path):
+        """Return the contents of a workspace-relative file."""
+        content = self._files.get(rel_path)
+        if content is None:
+            state = cache.file_state(self.path(rel_path)) if self.watch else None
+            with trace.span(f"read {rel_path}", "read", kind="manifest read", path=rel_path):
+                with open(self.path(rel_path), 'r') as f:
+                    content = f.read()
+            with self._lock:
+                content = self._files.setdefault(rel_path, content)
+                if state is not None:
+                    self._states.setdefault(rel_path, state)
+        return content
+
+    def read_json(self, rel_path):
+        """Return the parsed contents of a JSON file."""
+        return self._derive(("json", rel_path), rel_path, lambda: json.loads(self.read_text(rel_path)))
+
+    def read_toml(self, rel_path):
+        """Return the scanned (lossless) TOML document for a file."""
+        return self._derive(("toml", rel_path), rel_path,
+                            lambda: tomlscan.TomlDocument(self.read_text(rel_path)), persist=False)
+
+    def write_text(self, rel_path, content):
+        """Stage new file contents and invalidate what was derived from the file."""
+        if self.plan is not None:
+            old_content = self.read_text(rel_path) if self.exists(rel_path) else None
+            self.plan.record_edit(self.repo_name(rel_path), rel_path, old_content, content)
+        with self._lock:
+            self.invalidate(rel_path)
+            self._files[rel_path] = content
+            self._written.add(rel_path)
+            if self.plan is None:
+                self._pending[rel_path] = content
+
+    def pending(self, repo=None):
+        """Staged but unflushed files, optionally limited to one repository."""
+        with self._lock:
+            return [p for p in self._pending if repo is None or self.repo_name(p) == repo]
+
+    def staged_text(self, rel_path):
+        """Staged but unflushed contents of a file, or None."""
+        with self._lock:
+            return self._pending.get(rel_path)
+
+    def flush(self, repo=None):
+        """Atomically write staged files to disk; returns the paths written."""
+        written = []
+        for rel_path in self.pending(repo):
+            with self._lock:
+                content = self._pending[rel_path]
+            self._write_staged(rel_path, content)
+            written.append(rel_path)
+        return written
+
+    def flush_committed(self):
+        """Write the staged contents release commits picked up, once per file.
+
+        Later edits that are not committed yet stay staged. Returns the paths
+        written.
+        """
+        with self._lock:
+            committed = sorted(self._committed_staged.items())
+        for rel_path, content in committed:
+            self._write_staged(rel_path, content)
+        return [rel_path for rel_path, _ in committed]
+
+    def _write_staged(self, rel_path, content):
+        with trace.span(f"write {rel_path}", "write", kind="manifest write", path=rel_path):
+            atomic_write(self.path(rel_path), content)
+        with self._lock:
+            if self._pending.get(rel_path) is content:
+                del self._pending[rel_path]
+            if self._committed_staged.get(rel_path) is content:
+                del self._committed_staged[rel_path]
+            else:
+                self._committable.add(rel_path)
+
+    def committable(self, repo):
+        """Files edited in a repository and not yet committed.
+
+        Flushed files count until a commit picks them up; staged ones until
+        a commit picks up their current contents.
+        """
+        with self._lock:
+            staged = [p for p, content in self._pending.items()
+                      if self._committed_staged.get(p) is not content]
+            return sorted(p for p in self._committable.union(staged) if self.repo_name(p) == repo)
+
+    def mark_committed(self, paths):
+        """Forget files a release commit has picked up."""
+        with self._lock:
+            self._committable.difference_update(paths)
+            for rel_path in paths:
+                if rel_path in self._pending:
+                    self._committed_staged[rel_path] = self._pending[rel_path]
+
+    def discard(self):
+        """Drop staged edits so later reads see the files on disk again."""
+        with self._lock:
+            for rel_path in list(self._pending):
+                self.invalidate(rel_path)
+                self._written.discard(rel_path)
+            self._pending.clear()
+
+    def write_json(self, rel_path, data):
+        """Write a JSON file using the repo's formatting (2-space indent, trailing newline)."""
+        self.write_text(rel_path, json.dumps(data, indent=2) + '\n')
+
+    def invalidate(self, rel_path):
+        """Forget a file and every entry derived from it."""
+        with self._lock:
+            self._files.pop(rel_path, None)
+            self._states.pop(rel_path, None)
+            stale = [key for key, (source, _) in self._derived.items() if source == rel_path]
+            for key in stale:
+                del self._derived[key]
+
+    def _derive(self, key, source, compute, persist=True):
+        entry = self._derived.get(key)
+        if entry is None:
+            value = self._compute_cached(key, source, compute) if persist else compute()
+            with self._lock:
+                entry = self._derived.setdefault(key, (source, value))
+        return entry[1]
+
+    def _compute_cached(self, key, source, compute):
+        # Files written by this process may differ from what the cache saw on disk
+        if self._cache is None or source in self._written:
+            return compute()
+        cache_key = ":".join(key)
+        state = cache.file_state(self.path(source))
+        with self._lock:
+            hit, value = self._cache.manifest_value(source, state, cache_key)
+        if hit:
+            return value
+        value = compute()
+        with self._lock:
+            self._cache.store_manifest_value(source, state, cache_key, value)
+        return value
+
+    def crate_version(self, crate_name):
+        """Version from a crate's [package] section."""
+        if crate_name not in self.crates:
+            raise ValueError(f"Unknown crate: {crate_name}")
+        path = self.crates[crate_name]
+        return self._derive(("version", crate_name), path,
+                            lambda: parse_crate_version(self.read_toml(path), self.path(path)))
+
+    def tool_version(self, tool_name):
+        """Version from a tool's package.json or Lua file."""
+        config = self.tools[tool_name]
+        path = config["version_file"]
+        if config["type"] == "package.json":
+            return self.read_json(path).get("version")
+        elif config["type"] == "lua":
+            return self._derive(("version", tool_name), path,
+                                lambda: parse_lua_version(self.read_text(path)))
+        return None
+
+    def version(self, component):
+        """Current version of any component (crate or tool)."""
+        if component in self.crates:
+            return self.crate_version(component)
+        elif component in self.tools:
+            return self.tool_version(component)
+        raise ValueError(f"Unknown component: {component}")
+
+    def crate_dependencies(self, crate_name):
+        """lex-* dependencies of a crate, read from its workspace manifest."""
+        if crate_name not in self.crates:
+            return {}
+        path = self.crate_to_workspace.get(crate_name) or self.crates[crate_name]
+        deps = self._derive(("deps", path), path, lambda: parse_crate_dependencies(self.read_toml(path)))
+        return {dep: ver for dep, ver in deps.items() if dep != crate_name}
+
+    def tag_index(self, repo_root):
+        """Tag index for a repository, built from one ref listing on first use."""
+        index = self._tags.get(repo_root)
+        if index is None:
+            index = self._load_tag_index(repo_root)
+            with self._lock:
+                index = self._tags.setdefault(repo_root, index)
+        return index
+
+    def _load_tag_index(self, repo_root):
+        state = cache.ref_state(repo_root) if self._cache is not None or self.watch else None
+        if self.watch:
+            with self._lock:
+                self._tag_states[repo_root] = state
+        if state is not None and self._cache is not None:
+            with self._lock:
+                cached = self._cache.tags(repo_root, state)
+            if cached is not None:
+                return tags.TagIndex(cached)
+
+        try:
+            output = run_command(tags.FOR_EACH_REF_COMMAND, cwd=repo_root, check=False)
+        except Exception:
+            output = ""
+        index = tags.TagIndex.parse(output)
+
+        if state is not None and self._cache is not None:
+            with self._lock:
+                self._cache.store_tags(repo_root, state, index.commits())
+        return index
+
+    def invalidate_tags(self, repo_root):
+        """Forget a repository's tag index (e.g. after creating a tag)."""
+        with self._lock:
+            self._tags.pop(repo_root, None)
+            self._tag_states.pop(repo_root, None)
+
+    def refresh(self):
+        """Drop files and tag indexes that changed on disk since they were read.
+
+        Only meaningful for a watched workspace. Returns the stale file paths
+        and repository roots.
+        """
+        with self._lock:
+            files = [(p, state) for p, state in self._states.items() if p not in self._pending]
+            repos = list(self._tag_states.items())
+        stale_files = [p for p, state in files if cache.file_state(self.path(p)) != state]
+        stale_repos = [repo for repo, state in repos if cache.ref_state(repo) != state]
+        with self._lock:
+            for rel_path in stale_files:
+                self.invalidate(rel_path)
+            for repo_root in stale_repos:
+                self.invalidate_tags(repo_root)
+        return stale_files + stale_repos
+
+    def tool_dependencies(self, tool_name):
+        """Raw contents of a tool's lex-deps.json, or {} when it has none."""
+        if tool_name not in self.tools:
+            return {}
+        deps_file = self.tools[tool_name].get("deps_file")
+        if not deps_file or not self.exists(deps_file):
+            return {}
+        return dict(self.read_json(deps_file))
+
+    def repo_details(self, component):
+        """(repo_root_abs_path, relative_path_in_repo) for a component."""
+        if component in self.crates:
+            parts = self.crates[component].split("/")
+            repo_root = os.path.join(self.root_dir, parts[0])
+            if len(parts) > 2:
+                return repo_root, os.path.dirname("/".join(parts[1:]))
+            return repo_root, "."
+        elif component in self.tools:
+            repo_dir = self.tools[component]["path"].split("/")[0]
+            return os.path.join(self.root_dir, repo_dir), "."
+        raise ValueError(f"Unknown component {component}")
+
+    def is_monorepo(self, component):
+        """Whether a component shares its repository (and so prefixes its tags)."""
+        repo_name = os.path.basename(self.repo_details(component)[0])
+        if repo_name in UNIFIED_TAG_REPOS:
+            return False
+        repo_map = self._repo_map if self._repo_map is not None else _REPO_ENTRIES
+        return len(repo_map.get(repo_name, ())) > 1
+
+    def tag_name(self, component, version):
+        """Standardized tag name: component-vVersion or vVersion."""
+        return f"{component}-v{version}" if self.is_monorepo(component) else f"v{version}"
+
+    def latest_tag(self, component):
+        """Latest git tag of a component."""
+        return self.tag_index(self.repo_details(component)[0]).latest_for_component(component)
+
+
+def atomic_write(path, content):
+    """Replace a file's contents via write-to-temp, fsync and rename."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
     try:
-        run_command("semver --help", check=False)
-    except Exception:
-        print("Error: 'semver' command not found. Please install it (e.g. npm install -g semver).")
-        sys.exit(1)
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        mode = os.stat(path).st_mode & 0o7777 if os.path.exists(path) else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+_WORKSPACE = None
+_WORKSPACE_LOCK = threading.Lock()
+
+
+def use_workspace(workspace):
+    """Install a workspace as the process-wide snapshot (e.g. a dry-run one).
+
+    Returns the previous snapshot (possibly None) so callers can restore it.
+    """
+    global _WORKSPACE
+    previous, _WORKSPACE = _WORKSPACE, workspace
+    return previous
+
+
+def get_workspace():
+    """Return the process-wide workspace snapshot, creating it on first use."""
+    global _WORKSPACE
+    if _WORKSPACE is None:
+        with _WORKSPACE_LOCK:
+            if _WORKSPACE is None:
+                _WORKSPACE = Workspace()
+    return _WORKSPACE
+
+
+def reset_workspace():
+    """Drop the process-wide snapshot so the next access re-reads from disk."""
+    global _WORKSPACE
+    _WORKSPACE = None
 
 
 def read_crate_version(crate_name):
     """Read version from a crate's Cargo.toml."""
-    if crate_name not in CRATES:
-        raise ValueError(f"Unknown crate: {crate_name}")
-    toml_path = os.path.join(ROOT_DIR, CRATES[crate_name])
-    with open(toml_path, 'r') as f:
-        content = f.read()
-    package_match = re.search(r'\[package\]', content)
-    if not package_match:
-        raise ValueError(f"Could not find [package] section in {toml_path}")
-    post_package = content[package_match.end():]
-    version_match = re.search(r'version\s*=\s*"([^"]+)"', post_package)
-    if version_match:
-        return version_match.group(1)
-    raise ValueError(f"Could not find version in {toml_path}")
+    return get_workspace().crate_version(crate_name)
 
 
 def read_json_version(file_path):
     """Read version from a package.json file."""
-    full_path = os.path.join(ROOT_DIR, file_path)
-    with open(full_path, 'r') as f:
-        data = json.load(f)
-        return data.get("version")
+    return get_workspace().read_json(file_path).get("version")
 
 
 def read_lua_version(file_path):
     """Read version from a Lua file."""
-    full_path = os.path.join(ROOT_DIR, file_path)
-    with open(full_path, 'r') as f:
-        content = f.read()
-    match = re.search(r'version\s*=\s*"([^"]+)"', content)
-    if match:
-        return match.group(1)
-    return None
+    return parse_lua_version(get_workspace().read_text(file_path))
 
 
 def get_current_version(component):
     """Get current version for any component (crate or tool)."""
-    check_semver_installed()
-    if component in CRATES:
-        return read_crate_version(component)
-    elif component in TOOLS:
-        tool_config = TOOLS[component]
-        if tool_config["type"] == "package.json":
-            return read_json_version(tool_config["version_file"])
-        elif tool_config["type"] == "lua":
-            return read_lua_version(tool_config["version_file"])
-    else:
-        raise ValueError(f"Unknown component: {component}")
+    return get_workspace().version(component)
 
 
 def replace_in_file(file_path, pattern, replacement):
     """Replace text in a file using regex."""
-    full_path = os.path.join(ROOT_DIR, file_path)
-    with open(full_path, 'r') as f:
-        content = f.read()
+    workspace = get_workspace()
+    content = workspace.read_text(file_path)
     new_content = re.sub(pattern, replacement, content, count=1)
     if content == new_content:
         return False
-    with open(full_path, 'w') as f:
-        f.write(new_content)
+    workspace.write_text(file_path, new_content)
     return True
 
 
 def get_repo_details(component):
     """Returns (repo_root_abs_path, relative_path_in_repo) for a component."""
-    if component in CRATES:
-        manifest_path = CRATES[component]
-        parts = manifest_path.split("/")
-        repo_dir = parts[0]
-        repo_root = os.path.join(ROOT_DIR, repo_dir)
-        if len(parts) > 2:
-            relative_crate_path = os.path.dirname("/".join(parts[1:]))
-        else:
-            relative_crate_path = "."
-        return repo_root, relative_crate_path
-    elif component in TOOLS:
-        config = TOOLS[component]
-        repo_dir = config["path"].split("/")[0]
-        repo_root = os.path.join(ROOT_DIR, repo_dir)
-        return repo_root, "."
-    raise ValueError(f"Unknown component {component}")
+    return get_workspace().repo_details(component)
 
 
-def _build_repo_map():
-    """Build map of repo directory to components."""
+def _build_repo_map(crates=None, tools=None):
+    """Build map of repo directory to components (of the process-wide registry by default)."""
+    crates = CRATES if crates is None else crates
+    tools = TOOLS if tools is None else tools
     repo_map = {}
 
     # Process Crates
-    for comp, path in CRATES.items():
+    for comp, path in crates.items():
         repo_dir = path.split("/")[0]
         if repo_dir not in repo_map:
             repo_map[repo_dir] = set()
         repo_map[repo_dir].add(comp)
 
     # Process Tools
-    for comp, config in TOOLS.items():
+    for comp, config in tools.items():
         repo_dir = config["path"].split("/")[0]
         if repo_dir not in repo_map:
             repo_map[repo_dir] = set()
@@ -198,85 +634,72 @@ def _build_repo_map():
 
 _REPO_ENTRIES = _build_repo_map()
 
+
+def registry_snapshot():
+    """Copy of the registry in use, in the form discovery produces."""
+    return {
+        "crates": dict(CRATES),
+        "crate_to_workspace": dict(CRATE_TO_WORKSPACE),
+        "tools": {name: dict(config) for name, config in TOOLS.items()},
+        "crate_deps": {name: list(deps) for name, deps in CRATE_DEPS.items()},
+        "lsp_clients": list(LSP_CLIENTS),
+        "cli_clients": list(CLI_CLIENTS),
+        "crate_order": list(CRATE_ORDER),
+    }
+
+
+_DEFAULT_REGISTRY = registry_snapshot()
+
 # Repos that use plain v* tags despite having multiple components
 UNIFIED_TAG_REPOS = {"editors"}
 
 
 def is_monorepo(component):
     """Check if component is in a monorepo (multiple components in same repo)."""
-    repo_root, _ = get_repo_details(component)
-    repo_name = os.path.basename(repo_root)
-
-    if repo_name in UNIFIED_TAG_REPOS:
-        return False
-
-    if repo_name in _REPO_ENTRIES:
-        return len(_REPO_ENTRIES[repo_name]) > 1
-    return False
+    return get_workspace().is_monorepo(component)
 
 
 def get_tag_name(component, version):
     """Get standardized tag name: component-vVersion or vVersion."""
-    if is_monorepo(component):
-        return f"{component}-v{version}"
-    else:
-        return f"v{version}"
+    return get_workspace().tag_name(component, version)
 
 
 def get_latest_tag(component):
     """Get the latest git tag for a component."""
+    return get_workspace().latest_tag(component)
+
+
+def tag_exists(component, tag_name):
+    """Check whether a tag exists in the component's repository."""
     repo_root, _ = get_repo_details(component)
+    return tag_name in get_workspace().tag_index(repo_root)
 
-    # First try component-prefixed tags (for monorepos)
-    prefix = f"{component}-v"
-    try:
-        result = run_command(f"git tag --list '{prefix}*' --sort=-v:refname | head -1", cwd=repo_root, check=False)
-        if result:
-            return result
-    except Exception:
-        pass
 
-    # Fall back to v* tags for single-component repos
-    try:
-        result = run_command("git tag --list 'v*' --sort=-v:refname | head -1", cwd=repo_root, check=False)
-        # Filter out test tags like v100.0.0
-        if result and not result.startswith("v100"):
-            return result
-        # Try second tag
-        result = run_command("git tag --list 'v*' --sort=-v:refname | head -2 | tail -1", cwd=repo_root, check=False)
-        if result and not result.startswith("v100"):
-            return result
-    except Exception:
-        pass
-    return None
+def get_tag_for_version(component, version):
+    """Return the tag for a component version if it exists, else None."""
+    tag_name = get_tag_name(component, version)
+    return tag_name if tag_exists(component, tag_name) else None
 
 
-def read_crate_dependencies(crate_name):
-    """Read lex-* dependencies from a crate's Cargo.toml or workspace manifest."""
-    if crate_name not in CRATES:
-        return {}
+@contextlib.contextmanager
+def edit_transaction():
+    """Flush staged manifest edits if the block completes, discard them if it fails."""
+    try:
+        yield
+    except BaseException:
+        get_workspace().discard()
+        raise
+    get_workspace().flush()
 
-    workspace_path = CRATE_TO_WORKSPACE.get(crate_name)
-    if not workspace_path:
-        workspace_path = CRATES[crate_name]
 
-    full_path = os.path.join(ROOT_DIR, workspace_path)
-    with open(full_path, 'r') as f:
-        content = f.read()
+def head_commit(repo_path):
+    """Full id of the commit at HEAD (read from the git directory when possible)."""
+    return cache.head_commit(repo_path) or run_command(["git", "rev-parse", "HEAD"], cwd=repo_path)
 
-    deps = {}
-    for dep in ["lex-core", "lex-babel", "lex-analysis", "lex-config"]:
-        if dep == crate_name:
-            continue
-        # Match: dep = "version" or dep = { version = "version", ... }
-        simple_match = re.search(rf'{re.escape(dep)}\s*=\s*"([^"]+)"', content)
-        table_match = re.search(rf'{re.escape(dep)}\s*=\s*\{{[^}}]*version\s*=\s*"([^"]+)"', content)
-        if simple_match:
-            deps[dep] = simple_match.group(1)
-        elif table_match:
-            deps[dep] = table_match.group(1)
 
-    return deps
+def read_crate_dependencies(crate_name):
+    """Read lex-* dependencies from a crate's Cargo.toml or workspace manifest."""
+    return get_workspace().crate_dependencies(crate_name)
 
 
 def extract_version_from_tag(tag):
@@ -302,22 +725,7 @@ def read_tool_dep_version(tool_name, dep_key):
     Returns:
         Version string (without tag prefix) or None if not found.
     """
-    if tool_name not in TOOLS:
-        return None
-
-    config = TOOLS[tool_name]
-    deps_file = config.get("deps_file")
-    if not deps_file:
-        return None
-
-    full_path = os.path.join(ROOT_DIR, deps_file)
-    if not os.path.exists(full_path):
-        return None
-
-    with open(full_path, 'r') as f:
-        data = json.load(f)
-
-    raw_version = data.get(dep_key)
+    raw_version = get_workspace().tool_dependencies(tool_name).get(dep_key)
     return extract_version_from_tag(raw_version)
 
 
@@ -331,6 +739,49 @@ def read_tool_cli_version(tool_name):
     return read_tool_dep_version(tool_name, "lex-cli")
 
 
+def discover_registry(root_dir, refresh=False):
+    """Registry of the components discovered under root_dir (the built-in defaults if none are).
+
+    The lockfile is reused while it is current unless refresh is given.
+    """
+    from . import discovery
+
+    with trace.span("load registry", "phase"):
+        registry = discovery.load(root_dir, refresh=refresh,
+                                  known_crates=list(_DEFAULT_REGISTRY["crates"]),
+                                  known_tools=list(_DEFAULT_REGISTRY["tools"]),
+                                  known_order=_DEFAULT_REGISTRY["crate_order"])
+    return registry or copy.deepcopy(_DEFAULT_REGISTRY)
+
+
+def load_registry(reload=False, refresh=False):
+    """Replace the built-in registry with the components discovered on disk.
+
+    The registries are updated in place, so modules holding references to
+    them see the discovered components. Discovery runs against the current
+    workspace's root, once per root unless reload (re-check the lockfile)
+    or refresh (ignore the lockfile) is given; the built-in defaults are
+    used when discovery finds nothing.
+    """
+    global _REGISTRY_ROOT
+    root_dir = get_workspace().root_dir
+    if _REGISTRY_ROOT == root_dir and not (reload or refresh):
+        return
+    registry = discover_registry(root_dir, refresh=refresh)
+    _REGISTRY_ROOT = root_dir
+    for target, source in ((CRATES, registry["crates"]),
+                           (CRATE_TO_WORKSPACE, registry["crate_to_workspace"]),
+                           (TOOLS, registry["tools"]),
+                           (CRATE_DEPS, registry["crate_deps"])):
+        target.clear()
+        target.update(source)
+    _REPO_ENTRIES.clear()
+    _REPO_ENTRIES.update(_build_repo_map())
+    LSP_CLIENTS[:] = registry["lsp_clients"]
+    CLI_CLIENTS[:] = registry["cli_clients"]
+    CRATE_ORDER[:] = registry["crate_order"]
+
+
 def get_all_components():
     """Get list of all component names."""
     return list(CRATES.keys()) + list(TOOLS.keys())
@@ -0,0 +1,222 @@
+"""
+Release manager daemon - answer read-only queries from a warm workspace.
+
+`release-manager serve` keeps one watched Workspace in memory and listens on
+a Unix domain socket. A poller re-stats every manifest it has read and every
+repository's refs, drops what changed and reads it back, so queries are
+answered from memory. The CLI forwards get-version, check-status and
+`--plan` runs to the daemon when one is listening and falls back to running
+them itself otherwise. Any other command sent to the socket is refused with
+exit status 2: the daemon never edits, commits or tags.
+
+The client side is imported by every CLI run, so the workspace modules are
+only loaded where they are needed.
+
+Protocol: one JSON object per line. A request is {"argv": [...]} (or
+{"op": "ping"} / {"op": "stop"}); the reply is {"exit": N, "stdout": "...",
+"stderr": "..."}.
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+SOCKET_PATH = "target/release-manager/daemon.sock"
+
+# Seconds between stat polls of manifests and refs
+POLL_INTERVAL = 1.0
+
+# Seconds a client waits for the daemon before running the command itself
+CLIENT_TIMEOUT = 60.0
+
+# sun_path is limited to ~108 bytes; longer paths fall back to the temp dir
+_MAX_SOCKET_PATH = 100
+
+
+def socket_path(root_dir=None):
+    """Socket of the daemon serving a workspace root."""
+    from . import common
+
+    root_dir = root_dir or common.ROOT_DIR
+    path = os.path.join(root_dir, SOCKET_PATH)
+    if len(path) > _MAX_SOCKET_PATH:
+        import hashlib
+        import tempfile
+        digest = hashlib.sha1(root_dir.encode("utf-8")).hexdigest()[:12]
+        path = os.path.join(tempfile.gettempdir(), f"release-manager-{digest}.sock")
+    return path
+
+
+def _exchange(request, path, timeout):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("daemon closed the connection")
+    return json.loads(line)
+
+
+def request(argv, path=None, timeout=CLIENT_TIMEOUT):
+    """Run a command in the daemon; returns the reply, or None if no daemon answered."""
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        return _exchange({"argv": list(argv)}, path, timeout)
+    except (OSError, ValueError):
+        return None
+
+
+def forward(argv):
+    """Run argv through the daemon and exit with its status, if one is listening."""
+    reply = request(argv)
+    if reply is None:
+        return
+    sys.stdout.write(reply.get("stdout", ""))
+    sys.stderr.write(reply.get("stderr", ""))
+    sys.stdout.flush()
+    sys.exit(reply.get("exit", 1))
+
+
+def is_running(path=None):
+    """Check whether a daemon answers on the socket."""
+    try:
+        return _exchange({"op": "ping"}, path or socket_path(), 5.0).get("exit") == 0
+    except (OSError, ValueError):
+        return False
+
+
+def stop(path=None):
+    """Ask a running daemon to shut down; returns False if none was running."""
+    try:
+        _exchange({"op": "stop"}, path or socket_path(), 5.0)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+class Daemon:
+    """Warm workspace plus the lock that serialises commands run against it."""
+
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        from . import common
+
+        self.poll_interval = poll_interval
+        self.workspace = common.Workspace(watch=True)
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+
+    def warm(self):
+        """Read every manifest and build every repository's tag index."""
+        from . import common
+
+        common.load_registry()
+        self.workspace.load()
+        for component in common.get_all_components():
+            self.workspace.tag_index(common.get_repo_details(component)[0])
+
+    def poll(self):
+        """Drop anything that changed on disk and read it back."""
+        from . import common
+
+        with self.lock:
+            # Re-check the registry lockfile so new or removed crates are picked up
+            common.load_registry(reload=True)
+            if self.workspace.refresh():
+                self.warm()
+
+    def poll_forever(self):
+        while not self.stopping.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Warning: refresh failed: {e}", file=sys.stderr)
+
+    def run(self, argv):
+        """Run one CLI command in-process and capture its output."""
+        from . import cli
+        from . import common
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with self.lock:
+            # Catch changes made since the last poll before answering
+            self.workspace.refresh()
+            previous = common.use_workspace(self.workspace)
+            try:
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    try:
+                        cli.main(argv, use_daemon=False, served=True)
+                        code = 0
+                    except SystemExit as e:
+                        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                        if isinstance(e.code, str):
+                            stderr.write(e.code + "\n")
+                    except Exception as e:
+                        stderr.write(f"Error: {e}\n")
+                        code = 1
+            finally:
+                common.use_workspace(previous)
+        return {"exit": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.daemon
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+            except ValueError:
+                reply = {"exit": 2, "stdout": "", "stderr": "Error: malformed request\n"}
+            else:
+                op = req.get("op", "run")
+                if op == "ping":
+                    reply = {"exit": 0, "stdout": "", "stderr": ""}
+                elif op == "stop":
+                    reply = {"exit": 0, "stdout": "", "stderr": ""}
+                    daemon.stopping.set()
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    reply = daemon.run(req.get("argv", []))
+            self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(poll_interval=POLL_INTERVAL, path=None):
+    """Run the daemon in the foreground until stopped (Ctrl-C or `serve --stop`)."""
+    path = path or socket_path()
+    if os.path.exists(path):
+        if is_running(path):
+            print(f"Error: a daemon is already listening on {path}")
+            sys.exit(1)
+        os.unlink(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    daemon = Daemon(poll_interval)
+    daemon.warm()
+    server = _Server(path, _Handler)
+    server.daemon = daemon
+    poller = threading.Thread(target=daemon.poll_forever, daemon=True)
+    poller.start()
+    print(f"Serving {daemon.workspace.root_dir} on {path}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stopping.set()
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+    print("Daemon stopped")
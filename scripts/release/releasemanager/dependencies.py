@@ -2,87 +2,62 @@
 Dependency management - update dependency versions in manifests.
 """
 
-import json
-import os
-import re
-
 from . import common
 
-# Dependency graph: target -> [sources]
-CRATE_DEPS = {
-    "lex-babel": ["lex-core"],
-    "lex-cli": ["lex-core", "lex-babel", "lex-config"],
-    "lex-config": ["lex-core"],
-    "lex-analysis": ["lex-core", "lex-babel"],
-    "lex-lsp": ["lex-core", "lex-babel", "lex-analysis"],
-}
+# Dependency graph: target -> [sources] (see common.load_registry)
+CRATE_DEPS = common.CRATE_DEPS
 
 # Tools that depend on lex-lsp binary
-LSP_CLIENTS = ["lexed", "vscode", "nvim"]
+LSP_CLIENTS = common.LSP_CLIENTS
 
 # Tools that depend on lex-cli binary
-CLI_CLIENTS = ["comms"]
+CLI_CLIENTS = common.CLI_CLIENTS
 
 
 def update_toml_dep(path, dep_name, new_version):
-    """Update a dependency version in a TOML file."""
-    full_path = os.path.join(common.ROOT_DIR, path)
-    with open(full_path, 'r') as f:
-        content = f.read()
-
-    # 1. Simple inline: `lex-core = "0.2.2"`
-    pattern_simple = r'(' + re.escape(dep_name) + r'\s*=\s*)"[^"]+"'
-    replacement_simple = f'\\g<1>"{new_version}"'
-
-    # 2. Table inline: `lex-core = { version = "0.2.2", ... }`
-    pattern_table = r'(' + re.escape(dep_name) + r'\s*=\s*\{[^}]*version\s*=\s*)"[^"]+"'
-    replacement_table = f'\\g<1>"{new_version}"'
-
-    count = 0
-    exists = bool(re.search(pattern_simple, content) or re.search(pattern_table, content))
-
-    new_content = re.sub(pattern_simple, replacement_simple, content)
-    if new_content != content:
-        count += 1
-        content = new_content
-
-    new_content = re.sub(pattern_table, replacement_table, content)
-    if new_content != content:
-        count += 1
-        content = new_content
-
-    if count == 0:
-        if exists:
-            print(f"Dependency {dep_name} in {path} already {new_version} (or no change needed)")
-            return "CLEAN"
-        else:
-            print(f"Warning: No usage of {dep_name} found in {path} to update.")
-            return "MISSING"
-    else:
-        with open(full_path, 'w') as f:
-            f.write(content)
-        print(f"Updated dependency {dep_name} to {new_version} in {path}")
-        return "UPDATED"
+    """Update a dependency version in a TOML file.
+
+    Every version requirement for dep_name in any dependency table is
+    rewritten in place, whether written as `dep = "x"`, as an inline table
+    `dep = { version = "x", ... }` or as a `[dependencies.dep]` table.
+    """
+    workspace = common.get_workspace()
+    doc = workspace.read_toml(path)
 
+    entries = [dep.version for dep in doc.find_dependency(dep_name) if dep.version]
+    if not entries:
+        print(f"Warning: No usage of {dep_name} found in {path} to update.")
+        return "MISSING"
 
-def update_cargo_dep(crate, dep_name, new_version):
-    """Update a crate dependency, handling workspace dependencies."""
+    edits = [(entry, new_version) for entry in entries if entry.value != new_version]
+    if not edits:
+        print(f"Dependency {dep_name} in {path} already {new_version} (or no change needed)")
+        return "CLEAN"
+
+    workspace.write_text(path, doc.with_strings_replaced(edits))
+    print(f"Updated dependency {dep_name} to {new_version} in {path}")
+    return "UPDATED"
+
+
+def dep_manifest(crate, dep_name):
+    """Manifest that holds a crate's version requirement for dep_name.
+
+    This is the workspace root manifest when the crate declares the dependency
+    with `workspace = true`, otherwise the crate's own Cargo.toml.
+    """
     crate_toml = common.CRATES[crate]
-    full_path = os.path.join(common.ROOT_DIR, crate_toml)
+    doc = common.get_workspace().read_toml(crate_toml)
 
-    with open(full_path, 'r') as f:
-        content = f.read()
+    if any(dep.workspace for dep in doc.find_dependency(dep_name)):
+        return common.CRATE_TO_WORKSPACE.get(crate) or crate_toml
+    return crate_toml
 
-    # Check for workspace = true
-    workspace_re = r'(' + re.escape(dep_name) + r'\s*=\s*\{[^}]*workspace\s*=\s*true)'
-    is_workspace = re.search(workspace_re, content)
 
-    target_toml = crate_toml
-    if is_workspace:
-        pkg_workspace = common.CRATE_TO_WORKSPACE.get(crate)
-        if pkg_workspace:
-            target_toml = pkg_workspace
-            print(f"Dependency {dep_name} is workspace-managed. Updating {target_toml}")
+def update_cargo_dep(crate, dep_name, new_version):
+    """Update a crate dependency, handling workspace dependencies."""
+    target_toml = dep_manifest(crate, dep_name)
+    if target_toml != common.CRATES[crate]:
+        print(f"Dependency {dep_name} is workspace-managed. Updating {target_toml}")
 
     return update_toml_dep(target_toml, dep_name, new_version)
 
@@ -104,23 +79,19 @@ def update_tool_dep(tool, dep_key, new_version):
         print(f"No deps_file configured for {tool}")
         return
 
-    full_path = os.path.join(common.ROOT_DIR, deps_file)
+    workspace = common.get_workspace()
 
     # Construct full tag name for GitHub release downloads
     tag_name = common.get_tag_name(dep_key, new_version)
 
-    with open(full_path, 'r') as f:
-        data = json.load(f)
+    data = dict(workspace.read_json(deps_file))
 
     if dep_key not in data:
         print(f"Warning: Key '{dep_key}' not found in {deps_file}")
         return
 
     data[dep_key] = tag_name
-
-    with open(full_path, 'w') as f:
-        json.dump(data, f, indent=2)
-        f.write('\n')
+    workspace.write_json(deps_file, data)
 
     print(f"Updated {dep_key} to {tag_name} in {tool}")
 
@@ -140,11 +111,11 @@ def propagate_deps():
     """Propagate latest library versions to dependent crates."""
     print("Propagating latest library versions to dependent crates...")
 
-    sources = {
-        "lex-core": common.get_current_version("lex-core"),
-        "lex-babel": common.get_current_version("lex-babel"),
-        "lex-analysis": common.get_current_version("lex-analysis"),
-    }
+    sources = {}
+    for required_sources in CRATE_DEPS.values():
+        for source in required_sources:
+            if source in common.CRATES and source not in sources:
+                sources[source] = common.get_current_version(source)
 
     print(f"Sources: {sources}")
 
@@ -0,0 +1,322 @@
+"""
+Workspace discovery - build the component registry from the repositories on disk.
+
+Walks the repositories listed in scripts/repos.txt: Cargo workspaces (and
+their `members`) give the crates, their manifests give the dependency graph,
+and package.json, lua/*/init.lua and shared/lex-deps.json give the client
+tools and the binaries they pin.
+
+The result is kept in a lockfile together with the (mtime_ns, size) and
+hash of every file and the matches of every glob it was derived from; as
+long as those are unchanged the registry is read back instead of
+rediscovered. A file is only read and hashed again when its stat changed.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from . import cache
+from . import common
+from . import tomlscan
+from . import trace
+
+REPOS_FILE = "scripts/repos.txt"
+LOCK_PATH = "target/release-manager/registry.lock.json"
+LOCK_FORMAT = 2
+
+# Only crates whose package name has this prefix are release components
+COMPONENT_PREFIX = "lex-"
+
+# Per-repo locations of tool metadata
+PACKAGE_JSON = "package.json"
+LUA_VERSION_GLOB = "lua/*/init.lua"
+DEPS_FILE = "shared/lex-deps.json"
+
+
+class _Reader:
+    """Reads workspace files and globs, remembering a fingerprint of each.
+
+    A file's fingerprint is [state, sha1], where state is its
+    [mtime_ns, size] (None while it is racily new, so it is always hashed);
+    a missing file's is None.
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.files = {}
+        self.globs = {}
+        self._texts = {}
+
+    def text(self, rel_path):
+        """File contents, or None if it does not exist (each file is read once)."""
+        if rel_path not in self._texts:
+            self._texts[rel_path] = self._read(rel_path)
+        return self._texts[rel_path]
+
+    def _read(self, rel_path):
+        path = os.path.join(self.root_dir, rel_path)
+        state = cache.file_state(path)
+        try:
+            if state is None:
+                raise FileNotFoundError(path)
+            with trace.span(f"read {rel_path}", "read", kind="discovery read", path=rel_path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+        except OSError:
+            self.files[rel_path] = None
+            return None
+        if state is not None and time.time_ns() - state[0] < cache.RACY_WINDOW_NS:
+            state = None
+        self.files[rel_path] = [state, hashlib.sha1(data).hexdigest()]
+        return data.decode("utf-8")
+
+    def unchanged(self, rel_path, fingerprint):
+        """Check a recorded fingerprint, reading the file only if its stat changed."""
+        state = cache.file_state(os.path.join(self.root_dir, rel_path))
+        if fingerprint is None or state is None:
+            self.files[rel_path] = None
+            return fingerprint is None and state is None
+        if fingerprint[0] == state:
+            self.files[rel_path] = fingerprint
+            return True
+        self.text(rel_path)
+        current = self.files[rel_path]
+        return current is not None and current[1] == fingerprint[1]
+
+    def toml(self, rel_path):
+        text = self.text(rel_path)
+        return tomlscan.TomlDocument(text) if text is not None else None
+
+    def json(self, rel_path):
+        text = self.text(rel_path)
+        if text is None:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+    def glob(self, pattern):
+        """Workspace-relative matches of a glob, sorted."""
+        matches = sorted(
+            os.path.relpath(path, self.root_dir).replace(os.sep, "/")
+            for path in glob.glob(os.path.join(self.root_dir, pattern))
+        )
+        self.globs[pattern] = matches
+        return matches
+
+
+def parse_repos(text):
+    """Repository directories listed in a repos.txt file (blank lines and # comments skipped)."""
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+
+
+def read_repos(root_dir):
+    """Repositories listed in the workspace's scripts/repos.txt ([] if it is missing)."""
+    try:
+        with open(os.path.join(root_dir, REPOS_FILE), 'r') as f:
+            return parse_repos(f.read())
+    except OSError:
+        return []
+
+
+def _fingerprint_matches(reader, files, globs):
+    """Check that every recorded file fingerprint and glob result still holds.
+
+    Afterwards reader.files holds the fingerprints as of now, which differ
+    from `files` where an unchanged file was touched.
+    """
+    for pattern, matches in globs.items():
+        if reader.glob(pattern) != matches:
+            return False
+    for rel_path, fingerprint in files.items():
+        if not reader.unchanged(rel_path, fingerprint):
+            return False
+    return True
+
+
+def _ordered(names, known):
+    """Names with those in `known` first, in known order, then the rest as found."""
+    rank = {name: i for i, name in enumerate(known)}
+    return sorted(names, key=lambda name: (rank.get(name, len(rank)), names.index(name)))
+
+
+def _crate_manifests(reader, repo):
+    """(crate manifest, workspace root manifest) pairs for a repository."""
+    root_manifest = f"{repo}/Cargo.toml"
+    doc = reader.toml(root_manifest)
+    if doc is None:
+        return []
+
+    pairs = []
+    if doc.package_version() is not None or doc.value("package", "name"):
+        pairs.append((root_manifest, root_manifest))
+    if ("workspace",) in doc.tables:
+        excluded = set(doc.array_values("workspace", "exclude"))
+        for member in doc.array_values("workspace", "members"):
+            for manifest in reader.glob(f"{repo}/{member}/Cargo.toml"):
+                member_dir = manifest[len(repo) + 1:-len("/Cargo.toml")]
+                if member_dir not in excluded and manifest != root_manifest:
+                    pairs.append((manifest, root_manifest))
+    return pairs
+
+
+def _discover_crates(reader, repo, crates, crate_to_workspace, crate_deps):
+    for manifest, workspace_manifest in _crate_manifests(reader, repo):
+        doc = reader.toml(manifest)
+        name = doc.value("package", "name") if doc else None
+        if not name or not name.startswith(COMPONENT_PREFIX):
+            continue
+        if doc.value("package", "publish") is False:
+            continue
+        crates[name] = manifest
+        crate_to_workspace[name] = workspace_manifest
+        crate_deps[name] = []
+        for dep in doc.dependencies():
+            # Development dependencies do not order releases; [workspace.dependencies]
+            # of a root package belong to the workspace, not the crate
+            if dep.table[-1] == "dev-dependencies" or dep.table[0] == "workspace":
+                continue
+            if dep.name.startswith(COMPONENT_PREFIX) and dep.name != name and dep.name not in crate_deps[name]:
+                crate_deps[name].append(dep.name)
+
+
+def _discover_tool(reader, repo):
+    """Registry entry for a client tool repository, or None."""
+    config = {"path": repo, "version_file": None, "type": None, "deps_file": None}
+
+    package = reader.json(f"{repo}/{PACKAGE_JSON}")
+    if isinstance(package, dict) and package.get("version"):
+        config["version_file"] = f"{repo}/{PACKAGE_JSON}"
+        config["type"] = "package.json"
+    else:
+        for lua_file in reader.glob(f"{repo}/{LUA_VERSION_GLOB}"):
+            if common.parse_lua_version(reader.text(lua_file) or ""):
+                config["version_file"] = lua_file
+                config["type"] = "lua"
+                break
+
+    deps = reader.json(f"{repo}/{DEPS_FILE}")
+    if isinstance(deps, dict):
+        config["deps_file"] = f"{repo}/{DEPS_FILE}"
+    if not config["version_file"] and not config["deps_file"]:
+        return None, {}
+    return config, deps if isinstance(deps, dict) else {}
+
+
+def _crate_order(crate_deps, known_order):
+    from . import graph
+
+    try:
+        return graph.DependencyGraph(crate_deps, order=known_order).order
+    except ValueError as e:
+        print(f"Warning: {e}; using discovery order")
+        return list(crate_deps)
+
+
+def discover(root_dir, known_crates=(), known_tools=(), known_order=()):
+    """Scan the workspace; returns (registry, files, globs) or None if nothing was found.
+
+    known_* are the built-in registry orders, used so that components that
+    were already known keep their familiar position in reports.
+    """
+    reader = _Reader(root_dir)
+    repos_text = reader.text(REPOS_FILE)
+    if repos_text is None:
+        return None
+    repos = parse_repos(repos_text)
+
+    crates, crate_to_workspace, crate_deps = {}, {}, {}
+    tools, tool_deps = {}, {}
+    for repo in repos:
+        if not os.path.isdir(os.path.join(root_dir, repo)):
+            continue
+        found = len(crates)
+        _discover_crates(reader, repo, crates, crate_to_workspace, crate_deps)
+        if len(crates) == found:
+            config, deps = _discover_tool(reader, repo)
+            if config:
+                tools[repo] = config
+                tool_deps[repo] = list(deps)
+    if not crates:
+        return None
+
+    for name in crate_deps:
+        crate_deps[name] = [dep for dep in crate_deps[name] if dep in crates]
+    crate_names = _ordered(list(crates), known_crates)
+    tool_names = _ordered(list(tools), known_tools)
+    registry = {
+        "crates": {name: crates[name] for name in crate_names},
+        "crate_to_workspace": {name: crate_to_workspace[name] for name in crate_names},
+        "tools": {name: tools[name] for name in tool_names},
+        "crate_deps": {name: crate_deps[name] for name in crate_names if crate_deps[name]},
+        "lsp_clients": [name for name in tool_names if "lex-lsp" in tool_deps[name]],
+        "cli_clients": [name for name in tool_names if "lex-cli" in tool_deps[name]],
+        "crate_order": _crate_order({name: crate_deps[name] for name in crate_names}, list(known_order)),
+    }
+    return registry, reader.files, reader.globs
+
+
+def load(root_dir, refresh=False, **known):
+    """Registry from the lockfile if it is still current, else from a fresh scan.
+
+    Returns None when discovery finds no crates (e.g. the repositories have
+    not been cloned), in which case callers keep the built-in registry.
+    """
+    lock_path = os.path.join(root_dir, LOCK_PATH)
+    if not refresh:
+        try:
+            with open(lock_path, 'r') as f:
+                lock = json.load(f)
+        except (OSError, ValueError):
+            lock = None
+        reader = _Reader(root_dir)
+        if (isinstance(lock, dict) and lock.get("format") == LOCK_FORMAT
+                and _fingerprint_matches(reader, lock["files"], lock["globs"])):
+            if reader.files != lock["files"]:
+                # Record the new stat state of touched files so they are not hashed again
+                _write_lock(lock_path, dict(lock, files=reader.files))
+            return lock["registry"]
+
+    result = discover(root_dir, **known)
+    if result is None:
+        return None
+    registry, files, globs = result
+    _write_lock(lock_path, {"format": LOCK_FORMAT, "files": files, "globs": globs, "registry": registry})
+    return registry
+
+
+def print_registry(as_json=False):
+    """Print the registry currently in use (see common.load_registry)."""
+    registry = common.registry_snapshot()
+    if as_json:
+        print(json.dumps(registry, indent=2))
+        return
+
+    print("Crates (release order):")
+    for crate in common.CRATE_ORDER:
+        deps = ", ".join(common.CRATE_DEPS.get(crate, [])) or "-"
+        print(f"  {crate:<20} {common.CRATES[crate]:<36} depends on: {deps}")
+    print("Tools:")
+    for tool, config in common.TOOLS.items():
+        pins = [dep for dep, clients in (("lex-lsp", common.LSP_CLIENTS), ("lex-cli", common.CLI_CLIENTS))
+                if tool in clients]
+        print(f"  {tool:<20} {config['version_file'] or '-':<36} pins: {', '.join(pins) or '-'}")
+
+
+def _write_lock(path, data):
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".registry.lock.")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, path)
+    except OSError:
+        # The lockfile is only an optimisation
+        pass
@@ -0,0 +1,175 @@
+"""
+Fan-out - run one command in many repositories at once.
+
+Backs `exec` (and scripts/run-in-sub-repos). The command runs in every
+repository from scripts/repos.txt, or a selection of them, with bounded
+concurrency, so `git fetch` or `cargo check` across the workspace takes
+about as long as the slowest repository instead of the sum of all of them.
+Output is prefixed with the repository name line by line, or buffered and
+printed per repository when it finishes; a summary of exit codes and
+durations follows. Commands read from /dev/null, since several run at
+once, unless they run one at a time (jobs=1): then stdin is passed through.
+"""
+
+import os
+import sys
+import threading
+
+from . import common
+from . import discovery
+from . import graph
+from . import runner
+from . import scheduler
+
+
+def repos_of(components):
+    """Repository directory names holding the given components."""
+    return {os.path.basename(common.get_repo_details(comp)[0]) for comp in components}
+
+
+def dependent_repos(name):
+    """Repositories with a component that depends, directly or not, on a component or repository.
+
+    The repository holding the named component(s) is not included. Exits if
+    the name is neither a component nor a repository with components.
+    """
+    all_components = common.get_all_components()
+    if name in all_components:
+        targets = {name}
+    else:
+        targets = {comp for comp in all_components if repos_of([comp]) == {name}}
+    if not targets:
+        print(f"Error: {name} is neither a component nor a repository with components")
+        sys.exit(1)
+
+    release_graph = graph.current()
+    found = set()
+    for comp in targets:
+        found.update(release_graph.descendants(comp))
+    # CLI clients pin the lex-cli binary but are not part of the release graph
+    if "lex-cli" in targets | found:
+        found.update(common.CLI_CLIENTS)
+    return repos_of(found) - repos_of(targets)
+
+
+def select_repos(repos=None, depends_on=None):
+    """Repositories to run in, in scripts/repos.txt order.
+
+    With neither argument every listed repository is selected; otherwise
+    the named repositories plus those depending on each depends_on name.
+    """
+    listed = discovery.read_repos(common.get_workspace().root_dir)
+    if not repos and not depends_on:
+        return listed
+    wanted = set(repos or [])
+    for name in depends_on or []:
+        wanted.update(dependent_repos(name))
+    unknown = sorted(wanted - set(listed))
+    if unknown:
+        print(f"Error: not listed in {discovery.REPOS_FILE}: {', '.join(unknown)}")
+        sys.exit(1)
+    return [repo for repo in listed if repo in wanted]
+
+
+class _Output:
+    """Serialised printing of per-repository output, prefixed or buffered."""
+
+    def __init__(self, repos, buffer):
+        self.buffer = buffer
+        self.width = max((len(repo) for repo in repos), default=0)
+        self._lock = threading.Lock()
+
+    def line(self, repo, lines, text):
+        if self.buffer:
+            lines.append(text)
+            return
+        with self._lock:
+            print(f"[{repo}]{' ' * (self.width - len(repo))} {text}", flush=True)
+
+    def finished(self, record, lines):
+        if not self.buffer:
+            return
+        with self._lock:
+            print("")
+            print("========================================")
+            print(f"{record['repo']}/ - exit {record['exit']} in {record['seconds']:.2f}s")
+            print("========================================")
+            for text in lines:
+                print(text)
+            sys.stdout.flush()
+
+
+def run_in_repo(root_dir, repo, argv, output, timeout=0, stop=None, inherit_stdin=False):
+    """Run argv in one repository; returns a result record.
+
+    stop, if given, is a threading.Event: once set the repository is
+    skipped, or its command killed if it is already running.
+    """
+    path = os.path.join(root_dir, repo)
+    if not os.path.isdir(path):
+        return {"repo": repo, "result": "missing", "exit": None, "seconds": 0.0}
+    if stop is not None and stop.is_set():
+        return {"repo": repo, "result": "skipped", "exit": None, "seconds": 0.0}
+    lines = []
+    result = runner.stream(argv, lambda text: output.line(repo, lines, text), cwd=path,
+                           timeout=timeout, merge_stderr=True, cancel=stop, inherit_stdin=inherit_stdin)
+    if result.timed_out:
+        record = {"repo": repo, "result": "timed out", "exit": None}
+    elif stop is not None and stop.is_set() and result.returncode < 0:
+        record = {"repo": repo, "result": "cancelled", "exit": result.returncode}
+    else:
+        record = {"repo": repo, "result": "ok" if result.ok else "failed", "exit": result.returncode}
+    if result.stderr:
+        # stderr is merged into the output, so this is why the program could not start
+        output.line(repo, lines, result.stderr)
+    record["seconds"] = result.duration
+    output.finished(record, lines)
+    return record
+
+
+def print_summary(records):
+    print("")
+    print(f"{'Repository':<15} {'Result':<10} {'Exit':>6} {'Seconds':>8}")
+    print(f"{'-' * 15} {'-' * 10} {'-' * 6} {'-' * 8}")
+    for r in records:
+        exit_code = "" if r["exit"] is None else r["exit"]
+        print(f"{r['repo']:<15} {r['result']:<10} {exit_code:>6} {r['seconds']:>8.2f}")
+
+
+def run_all(argv, repos=None, depends_on=None, jobs=None, buffer=False, fail_fast=False, timeout=0):
+    """Run a command in the selected repositories and print a summary.
+
+    Exits with status 1 if the command failed (or was cancelled) in any
+    repository; missing repositories are reported and skipped. With jobs=1
+    the commands run one after another with this process's stdin.
+    """
+    root_dir = common.get_workspace().root_dir
+    selected = select_repos(repos, depends_on)
+    if not selected:
+        print("No repositories selected.")
+        return []
+
+    output = _Output(selected, buffer)
+    stop = threading.Event() if fail_fast else None
+
+    def on_result(repo, record):
+        if record["result"] == "missing":
+            print(f"Warning: {repo}/ directory not found, skipping...")
+        elif stop is not None and record["result"] in ("failed", "timed out"):
+            stop.set()
+
+    try:
+        done = scheduler.run_grouped(
+            selected, lambda repo: repo,
+            lambda repo: run_in_repo(root_dir, repo, argv, output, timeout, stop, inherit_stdin=jobs == 1),
+            jobs, on_result,
+        )
+    finally:
+        if stop is not None:
+            # Releases the cancel watchers of commands that finished normally
+            stop.set()
+    records = [done[repo] for repo in selected]
+    print_summary(records)
+    if any(r["result"] not in ("ok", "missing") for r in records):
+        sys.exit(1)
+    return records
@@ -0,0 +1,218 @@
+"""
+Release dependency graph - topological order, reverse dependencies and impact queries.
+
+A DependencyGraph is built once from the component registry: the
+topological levels, the reverse (dependents) index and the transitive
+closures in both directions are computed up front, so release
+orchestration, the status report and `impact` all read the same answers
+without walking the graph again.
+"""
+
+import os
+
+from . import common
+from . import scheduler
+
+_CURRENT = None
+
+
+class DependencyGraph:
+    """Immutable dependency graph over release components.
+
+    Args:
+        deps: Mapping of node -> nodes it depends on
+        order: Optional preferred ordering for nodes within a level
+    """
+
+    def __init__(self, deps, order=None):
+        self.levels = scheduler.topological_levels(deps, order=order)
+        self.order = [node for level in self.levels for node in level]
+        self.position = {node: i for i, node in enumerate(self.order)}
+        self.level_of = {node: i for i, level in enumerate(self.levels) for node in level}
+
+        self._deps = {node: tuple(deps.get(node, ())) for node in self.order}
+        dependents = {node: [] for node in self.order}
+        for node in self.order:
+            for source in self._deps[node]:
+                dependents[source].append(node)
+        self._dependents = {node: tuple(nodes) for node, nodes in dependents.items()}
+
+        # Closures in topological order: every node's dependencies are complete first
+        self._ancestors = {}
+        for node in self.order:
+            closure = set(self._deps[node])
+            for source in self._deps[node]:
+                closure.update(self._ancestors[source])
+            self._ancestors[node] = frozenset(closure)
+        self._descendants = {}
+        for node in reversed(self.order):
+            closure = set(self._dependents[node])
+            for target in self._dependents[node]:
+                closure.update(self._descendants[target])
+            self._descendants[node] = frozenset(closure)
+
+    def __contains__(self, node):
+        return node in self.position
+
+    def sources(self, node):
+        """Direct dependencies of a node."""
+        return self._deps.get(node, ())
+
+    def dependents(self, node):
+        """Nodes that depend directly on a node."""
+        return self._dependents.get(node, ())
+
+    def ancestors(self, node):
+        """Everything a node depends on, directly or transitively."""
+        return self._ancestors.get(node, frozenset())
+
+    def descendants(self, node):
+        """Everything that depends on a node, directly or transitively."""
+        return self._descendants.get(node, frozenset())
+
+    def sort(self, nodes):
+        """Nodes in topological order."""
+        return sorted(nodes, key=self.position.__getitem__)
+
+    def impacted(self, changed):
+        """Changed nodes plus everything depending on them, in release order.
+
+        Runs in time linear in the size of the graph.
+        """
+        marked = set()
+        stack = [node for node in changed if node in self.position]
+        while stack:
+            node = stack.pop()
+            if node in marked:
+                continue
+            marked.add(node)
+            stack.extend(self._dependents[node])
+        return [node for node in self.order if node in marked]
+
+
+def _registry_key():
+    return (
+        tuple(common.CRATES),
+        tuple((target, tuple(sources)) for target, sources in common.CRATE_DEPS.items()),
+        tuple(common.LSP_CLIENTS),
+        tuple(common.TOOLS),
+    )
+
+
+def _build(crates, crate_deps, lsp_clients, crate_order, tools):
+    deps = {crate: [s for s in crate_deps.get(crate, []) if s in crates] for crate in crates}
+    for client in lsp_clients:
+        deps[client] = ["lex-lsp"]
+    order = [crate for crate in crate_order if crate in crates] + list(crates) + list(tools)
+    return DependencyGraph(deps, order=order)
+
+
+def current(workspace=None):
+    """Release graph of the current registry: crates plus the LSP clients.
+
+    Rebuilt only when the registry changes (e.g. a daemon picking up newly
+    discovered crates). A workspace carrying its own registry gets the graph
+    of that registry instead.
+    """
+    global _CURRENT
+    if workspace is not None and workspace.registry is not None:
+        registry = workspace.registry
+        return _build(registry["crates"], registry["crate_deps"], registry["lsp_clients"],
+                      registry["crate_order"], registry["tools"])
+    key = _registry_key()
+    if _CURRENT is None or _CURRENT[0] != key:
+        _CURRENT = (key, _build(common.CRATES, common.CRATE_DEPS, common.LSP_CLIENTS,
+                                common.CRATE_ORDER, common.TOOLS))
+    return _CURRENT[1]
+
+
+def _workspace_path(path, cwd=None):
+    """Path relative to the workspace root with / separators, or None if outside it."""
+    path = os.path.normpath(os.path.join(cwd or os.getcwd(), path))
+    rel_path = os.path.relpath(path, common.get_workspace().root_dir)
+    if rel_path == ".." or rel_path.startswith(".." + os.sep):
+        return None
+    return rel_path.replace(os.sep, "/")
+
+
+def _owner_dirs():
+    """Map of workspace directory -> components owning files below it.
+
+    A crate owns its manifest directory; a repository directory owns
+    everything in it that no crate claims (workspace manifest, lockfile, CI),
+    which affects every component in the repository.
+    """
+    owners = {}
+    for name, manifest in common.CRATES.items():
+        owners.setdefault(os.path.dirname(manifest), []).append(name)
+    for repo, components in common._REPO_ENTRIES.items():
+        owners.setdefault(repo, sorted(components))
+    return owners
+
+
+def owners_of(paths, cwd=None):
+    """Map changed paths to components.
+
+    Returns (components, unmatched_paths); each path is attributed to the
+    component with the closest enclosing directory.
+    """
+    owners = _owner_dirs()
+    components, unmatched = set(), []
+    for path in paths:
+        rel_path = _workspace_path(path, cwd)
+        directory = rel_path
+        while directory:
+            if directory in owners:
+                components.update(owners[directory])
+                break
+            directory = os.path.dirname(directory)
+        else:
+            unmatched.append(path)
+    return components, unmatched
+
+
+def impact(paths, cwd=None):
+    """Components to release for a set of changed paths.
+
+    Returns a dict with the directly "changed" components, every "impacted"
+    component in release order, the release "levels" restricted to them and
+    the "unmatched" paths.
+    """
+    release_graph = current()
+    changed, unmatched = owners_of(paths, cwd)
+    impacted = release_graph.impacted(changed)
+    selected = set(impacted)
+    levels = [[node for node in level if node in selected] for level in release_graph.levels]
+    return {
+        "changed": release_graph.sort(c for c in changed if c in release_graph)
+                   + sorted(c for c in changed if c not in release_graph),
+        "impacted": impacted,
+        "levels": [level for level in levels if level],
+        "unmatched": unmatched,
+    }
+
+
+def print_impact(result):
+    """Print an impact() result as a release order."""
+    release_graph = current()
+    for path in result["unmatched"]:
+        print(f"Warning: {path} is not part of any component")
+    if not result["changed"]:
+        print("No components affected.")
+        return
+
+    print(f"Changed: {', '.join(result['changed'])}")
+    print("Release order:")
+    changed = set(result["changed"])
+    impacted = set(result["impacted"])
+    for index, level in enumerate(result["levels"]):
+        for node in level:
+            if node in changed:
+                reason = "changed"
+            else:
+                via = [s for s in release_graph.sources(node) if s in impacted]
+                reason = f"depends on {', '.join(via)}"
+            print(f"  {index + 1}. {node:<20} ({reason})")
+    unreleased = [c for c in result["changed"] if c not in release_graph]
+    if unreleased:
+        print(f"Not in the release graph: {', '.join(unreleased)}")
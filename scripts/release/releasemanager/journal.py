@@ -0,0 +1,145 @@
+"""
+Release journal - append-only record of the steps a release run completed.
+
+`release-all` (and `release-all-crates`) appends one JSON line per completed
+step (propagation, version bump, commit, tag, component done) to
+target/release-manager/journal.jsonl, flushed to disk before the run moves
+on. `push` reads the last run's tags from it. If the run dies, `release-all
+--resume` replays the last run's records, checks them against the
+repositories and continues from the first incomplete step instead of
+redoing (and re-bumping) everything.
+
+Recording is a no-op unless a run is active, so the steps can be journalled
+from anywhere without callers knowing whether they are part of one.
+"""
+
+import json
+import os
+import threading
+import time
+
+JOURNAL_PATH = "target/release-manager/journal.jsonl"
+
+_ACTIVE = None
+
+
+class Journal:
+    """Open journal file; records are tagged with the id of the current run."""
+
+    def __init__(self, path, run_id):
+        self.path = path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+
+    def record(self, event, **fields):
+        entry = {"run": self.run_id, "event": event, "time": round(time.time(), 3)}
+        entry.update(fields)
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class RunState:
+    """What the last run of the journal completed, per component."""
+
+    def __init__(self, run_id, command, events):
+        self.run_id = run_id
+        self.command = command
+        self.finished = False
+        self.released = {}
+        self.shipped = set()
+        self.bumps = {}
+        self.commits = {}
+        self.tags = {}
+        self.tag_commits = {}
+        self.updated_manifests = set()
+        for entry in events:
+            event, comp = entry["event"], entry.get("component")
+            if event == "done":
+                self.finished = True
+            elif event == "release":
+                self.released[comp] = entry["version"]
+                if entry.get("released"):
+                    self.shipped.add(comp)
+            elif event == "bump":
+                self.bumps[comp] = (entry["from"], entry["to"])
+            elif event == "commit":
+                self.commits[comp] = entry["commit"]
+            elif event == "tag":
+                self.tags[comp] = entry["tag"]
+                if entry.get("commit"):
+                    self.tag_commits[comp] = entry["commit"]
+            elif event == "propagate" and entry.get("result") == "UPDATED":
+                self.updated_manifests.add(entry["manifest"])
+
+    def pending(self, comp):
+        """True if a component's release was started but not finished."""
+        return comp in self.bumps and comp not in self.released
+
+
+def path(root_dir):
+    return os.path.join(root_dir, JOURNAL_PATH)
+
+
+def last_run(root_dir):
+    """RunState of the most recent run in the journal, or None."""
+    try:
+        with open(path(root_dir), 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    events = []
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # A line cut short by a crash; everything before it is intact
+            continue
+        if entry.get("event") == "start":
+            events = []
+        events.append(entry)
+    if not events or events[0].get("event") != "start":
+        return None
+    return RunState(events[0]["run"], events[0].get("command"), events[1:])
+
+
+def start(root_dir, command, run_id=None):
+    """Begin journalling a run (a new one, or run_id to continue a previous one)."""
+    global _ACTIVE
+    journal_path = path(root_dir)
+    os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+    resumed = run_id is not None
+    if not resumed:
+        run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+    _ACTIVE = Journal(journal_path, run_id)
+    _ACTIVE.record("resume" if resumed else "start", command=command)
+    return _ACTIVE
+
+
+def finish():
+    """Mark the active run complete and stop journalling."""
+    global _ACTIVE
+    if _ACTIVE is not None:
+        _ACTIVE.record("done")
+    _ACTIVE = None
+
+
+def stop():
+    """Stop journalling without marking the run complete."""
+    global _ACTIVE
+    _ACTIVE = None
+
+
+def active():
+    """True while a run is being journalled."""
+    return _ACTIVE is not None
+
+
+def record(event, **fields):
+    """Append a record to the active run; a no-op when no run is active."""
+    if _ACTIVE is not None:
+        _ACTIVE.record(event, **fields)
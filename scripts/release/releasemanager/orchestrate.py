@@ -2,18 +2,32 @@
 Release orchestration - coordinate full release cycles across all components.
 """
 
+import contextlib
+import json
 import os
 import sys
 
+from . import changes
+from . import clean
+from . import commits
 from . import common
 from . import component
 from . import dependencies
+from . import graph
+from . import journal
+from . import plan
+from . import runner
+from . import scheduler
 from . import status
+from . import trace
 from . import version
 
 # Global list to collect push commands
 PUSH_COMMANDS = []
 
+# List the files behind each detected change (--explain)
+EXPLAIN = False
+
 
 def record_push_command(comp):
     """Record push command for a component's repo."""
@@ -28,50 +42,110 @@ def record_push_command(comp):
         PUSH_COMMANDS.append(cmd)
 
 
+def print_push_commands():
+    """Print the recorded push commands; returns False when there are none."""
+    if not PUSH_COMMANDS:
+        return False
+    print("\n" + "=" * 40)
+    print("SYNC REQUIRED! Push every repository at once with:")
+    print("    ./scripts/release/release-manager push")
+    print("or run these commands:")
+    print("=" * 40)
+    for cmd in PUSH_COMMANDS:
+        print(cmd)
+    print("=" * 40 + "\n")
+    return True
+
+
+def explain_changes(comp, repo_root, tag_name, rel_path):
+    """Print the files that changed since a tag, when --explain asked for them."""
+    if not EXPLAIN:
+        return
+    try:
+        files = changes.explain(repo_root, tag_name, rel_path)
+    except Exception as e:
+        print(f"[{comp}] Could not list changes: {e}")
+        return
+    for path in files:
+        print(f"[{comp}]   {path}")
+
+
 def release_if_changed(comp, force=False):
     """Check for changes and release if needed."""
     repo_root, rel_path = common.get_repo_details(comp)
     current_ver = common.get_current_version(comp)
     tag_name = common.get_tag_name(comp, current_ver)
 
-    # Check if tag exists
-    try:
-        common.run_command(f"git rev-parse {tag_name}", cwd=repo_root, check=False)
-        tag_exists = True
-    except Exception:
-        tag_exists = False
-
+    tag_exists = common.tag_exists(comp, tag_name)
     should_release = force
 
     if not tag_exists:
         print(f"[{comp}] Tag {tag_name} missing. Assuming initial or forced release needed.")
         should_release = True
     elif not should_release:
-        cmd = f"git diff --name-only {tag_name}..HEAD -- {rel_path}"
         try:
-            diff = common.run_command(cmd, cwd=repo_root, check=False)
-            if diff and diff.strip():
+            if changes.changed_since(repo_root, tag_name, rel_path):
                 print(f"[{comp}] Changes detected!")
+                explain_changes(comp, repo_root, tag_name, rel_path)
                 should_release = True
             else:
                 print(f"[{comp}] No changes.")
         except Exception:
-            print(f"[{comp}] Diff failed. Forcing check.")
+            print(f"[{comp}] Change check failed. Forcing check.")
             should_release = True
 
     if should_release:
         print(f"[{comp}] Releasing patch...")
         try:
-            component.release_component(comp, "patch")
+            with trace.span(f"release {comp}", "phase", kind="release component"):
+                component.release_component(comp, "patch")
             record_push_command(comp)
-            return common.get_current_version(comp)
+            new_ver = common.get_current_version(comp)
         except Exception as e:
             print(f"[{comp}] Release failed: {e}")
             sys.exit(1)
+        journal.record("release", component=comp, version=new_ver, released=True)
+        return new_ver
 
+    journal.record("release", component=comp, version=current_ver, released=False)
     return current_ver
 
 
+def resume_release(comp, state):
+    """Finish a release the journal shows as started but not completed.
+
+    Returns the released version, or None when the version bump never
+    reached disk and the component has to be released from scratch.
+    """
+    old_ver, new_ver = state.bumps[comp]
+    if common.get_current_version(comp) != new_ver:
+        print(f"[{comp}] Bump {old_ver} -> {new_ver} was not written; starting over.")
+        return None
+
+    repo_root, _ = common.get_repo_details(comp)
+    tag_name = common.get_tag_name(comp, new_ver)
+    print(f"[{comp}] Resuming release of {new_ver}...")
+    workspace = common.get_workspace()
+    if workspace.plan is not None:
+        workspace.plan.record_release(comp, old_ver, new_ver, tag_name)
+    commit = state.commits.get(comp)
+    if commit is None:
+        # The edits were flushed by the interrupted process, not this one
+        commit = commits.commit(repo_root, f"chore: release {tag_name}", commits.modified_manifests(repo_root))
+        if commit is not None:
+            journal.record("commit", component=comp, commit=commit)
+    if common.tag_exists(comp, tag_name):
+        print(f"Tag {tag_name} already exists, skipping tag creation")
+        commit = common.get_workspace().tag_index(repo_root).commit(tag_name)
+    else:
+        commit = commits.create_tag(repo_root, tag_name, commit)
+        print(f"Tagged {tag_name}")
+    journal.record("tag", component=comp, tag=tag_name, commit=commit)
+    record_push_command(comp)
+    journal.record("release", component=comp, version=new_ver, released=True)
+    return new_ver
+
+
 def propagate(target, source, source_ver):
     """Propagate a dependency version."""
     print(f"[{target}] Checking dependency on {source} ({source_ver})...")
@@ -82,129 +156,308 @@ def propagate(target, source, source_ver):
         return "MISSING"
 
 
-def release_all():
-    """One-click release orchestration following dependency order."""
-    global PUSH_COMMANDS
+def propagate_into(comp, versions):
+    """Write released source versions into a component's manifests.
+
+    Returns a list of (manifest, result) pairs for crates, where result is
+    the update status reported for that manifest.
+    """
+    if comp in dependencies.LSP_CLIENTS:
+        lsp_ver = versions["lex-lsp"]
+        print(f"[{comp}] Updating LSP to {lsp_ver}...")
+        try:
+            dependencies.update_tool_dep(comp, "lex-lsp", lsp_ver)
+        except Exception as e:
+            print(f"Failed to update {comp}: {e}")
+        journal.record("propagate", component=comp, source="lex-lsp", version=lsp_ver)
+        return []
+
+    results = []
+    for source in graph.current().sources(comp):
+        manifest = dependencies.dep_manifest(comp, source)
+        result = propagate(comp, source, versions[source])
+        journal.record("propagate", component=comp, source=source, version=versions[source],
+                       manifest=manifest, result=result)
+        results.append((manifest, result))
+    return results
+
+
+def run_release_levels(jobs=None, state=None):
+    """Propagate and release every component, level by level.
+
+    Each topological level is processed in two phases: propagate the
+    versions released by earlier levels, then release whatever changed.
+    Both phases run concurrently across repositories (at most `jobs`
+    workers); components in the same repository run one at a time.
+    Returns the resulting version of every component.
+
+    With the RunState of an interrupted run, components it completed are
+    skipped (keeping the version it recorded) and releases it started are
+    finished rather than bumped again.
+    """
+    versions = {}
+    if state is not None:
+        restore_tags(state)
+    # Manifests the interrupted run updated still force their crates' releases
+    updated_manifests = set(state.updated_manifests) if state is not None else set()
+
+    def repo_of(comp):
+        return common.get_repo_details(comp)[0]
+
+    def release_step(comp):
+        if state is not None and state.pending(comp):
+            version = resume_release(comp, state)
+            if version is not None:
+                return version
+        return release_if_changed(comp, force=(comp in forced))
+
+    for index, level in enumerate(graph.current().levels):
+        if state is not None:
+            for comp in level:
+                if comp in state.released:
+                    versions[comp] = state.released[comp]
+                    if comp in state.shipped:
+                        record_push_command(comp)
+            level = [comp for comp in level if comp not in state.released]
+
+        # 1. Propagate released versions into this level's manifests
+        with trace.span(f"level {index} propagate", "phase", kind="propagate", components=level):
+            propagated = scheduler.run_grouped(level, repo_of, lambda comp: propagate_into(comp, versions), jobs)
+        for results in propagated.values():
+            updated_manifests.update(m for m, res in results if res == "UPDATED")
+
+        # A crate is forced when one of its manifests changed this run, whether
+        # by its own propagation or a sibling's sharing the manifest. Clients
+        # always ship a release pinning the new LSP.
+        forced = {
+            comp for comp, results in propagated.items()
+            if comp in dependencies.LSP_CLIENTS
+            or any(res in ("UPDATED", "CLEAN") and m in updated_manifests for m, res in results)
+        }
+
+        # 2. Release
+        with trace.span(f"level {index} release", "phase", kind="release", components=level):
+            released = scheduler.run_grouped(level, repo_of, release_step, jobs)
+        versions.update(released)
+
+    return versions
+
+
+def verify_run(state):
+    """Check an interrupted run's journal against the repositories; returns a list of problems."""
+    problems = []
+    for comp, tag in state.tags.items():
+        repo_root, _ = common.get_repo_details(comp)
+        tagged = common.get_workspace().tag_index(repo_root).commit(tag)
+        expected = tagged_commit(state, comp)
+        if tagged is None and expected is None:
+            problems.append(f"{comp}: tag {tag} was created but no longer exists")
+        elif tagged is not None and expected is not None and tagged != expected:
+            problems.append(f"{comp}: tag {tag} no longer points at release commit {expected[:12]}")
+    # Release commits without a tag (yet) must still be on the branch
+    for comp in list(state.commits) + [comp for comp in state.tags if comp not in state.commits]:
+        commit = tagged_commit(state, comp)
+        if commit is None or (comp in state.tags and common.tag_exists(comp, state.tags[comp])):
+            continue
+        repo_root, _ = common.get_repo_details(comp)
+        result = runner.run(["git", "merge-base", "--is-ancestor", commit, "HEAD"], cwd=repo_root)
+        if not result.ok:
+            problems.append(f"{comp}: release commit {commit[:12]} is not on the current branch")
+    for comp in state.shipped:
+        if comp in common.get_all_components() and common.get_current_version(comp) != state.released[comp]:
+            problems.append(f"{comp}: version is no longer {state.released[comp]}")
+    return problems
+
+
+def tagged_commit(state, comp):
+    """Commit a component's journalled tag should point at, or None if unknown."""
+    return state.tag_commits.get(comp) or state.commits.get(comp)
+
+
+def restore_tags(state):
+    """Recreate the tags an interrupted run journalled but never wrote.
+
+    Tags are only written when a run ends, so a run that died keeps its
+    release commits but may have lost their tags.
+    """
+    for comp, tag in state.tags.items():
+        commit = tagged_commit(state, comp)
+        if commit is not None and not common.tag_exists(comp, tag):
+            repo_root, _ = common.get_repo_details(comp)
+            print(f"[{comp}] Restoring tag {tag}")
+            commits.create_tag(repo_root, tag, commit)
+
+
+def restore_unflushed(state):
+    """Put back manifests an interrupted run committed but never wrote to disk."""
+    by_repo = {}
+    for comp, commit in state.commits.items():
+        by_repo.setdefault(common.get_repo_details(comp)[0], []).append(commit)
+    for repo_root, commit_ids in by_repo.items():
+        for path in commits.restore_unflushed(repo_root, commit_ids):
+            print(f"Restoring {path} from its release commit")
+
+
+def resume_state():
+    """RunState of the interrupted run to resume, verified; None if the last run finished.
+
+    Exits when there is no run to resume or the journal disagrees with the
+    repositories.
+    """
+    state = journal.last_run(common.get_workspace().root_dir)
+    if state is None:
+        print(f"Error: no release run recorded in {journal.JOURNAL_PATH}")
+        sys.exit(1)
+    if state.finished:
+        print(f"Release run {state.run_id} completed; nothing to resume.")
+        return None
+    if state.command != "release-all":
+        print(f"Error: release run {state.run_id} was a {state.command} run; only release-all runs can be resumed.")
+        sys.exit(1)
+
+    restore_unflushed(state)
+    problems = verify_run(state)
+    if problems:
+        print(f"Error: journal of release run {state.run_id} does not match the repositories:")
+        for problem in problems:
+            print(f"  - {problem}")
+        print("Run release-all without --resume to start over.")
+        sys.exit(1)
+
+    pending = [comp for comp in state.bumps if state.pending(comp)]
+    print(f"Resuming release run {state.run_id}: {len(state.released)} components done, "
+          f"{len(pending)} in progress ({', '.join(pending) or 'none'})")
+    return state
+
+
+def release_all(jobs=None, resume=False, explain=False, require_clean=False):
+    """One-click release orchestration following dependency order.
+
+    Every completed step is journalled; with resume, an interrupted run is
+    continued from its first incomplete step. With explain, the files behind
+    every detected change are listed. With require_clean, a fresh run only
+    starts when every repository is clean and pushed.
+    """
+    global PUSH_COMMANDS, EXPLAIN
     PUSH_COMMANDS = []
+    EXPLAIN = explain
+
+    state = None
+    if resume:
+        state = resume_state()
+        if state is None:
+            return
+    elif require_clean:
+        clean.require_clean(jobs)
 
     print("Starting One-Click Release Orchestration...")
 
-    # 1. Lex Core
-    core_ver = release_if_changed("lex-core")
-
-    # 2. Propagate Core -> Tools
-    tools_crates = ["lex-babel", "lex-cli", "lex-config"]
-    forced_tools = set()
-    manifest_updated = False
-
-    for tool in tools_crates:
-        res = propagate(tool, "lex-core", core_ver)
-        if res == "UPDATED":
-            manifest_updated = True
-            forced_tools.add(tool)
-        elif res == "CLEAN" and manifest_updated:
-            forced_tools.add(tool)
-
-    # 3. Release Tools
-    for tool in tools_crates:
-        release_if_changed(tool, force=(tool in forced_tools))
-
-    # 4. Propagate Core/Babel -> Editors
-    babel_ver = common.get_current_version("lex-babel")
-
-    editors_crates = ["lex-analysis", "lex-lsp"]
-    forced_editors = set()
-    manifest_updated = False
-
-    # Propagate Core
-    for ed in editors_crates:
-        res = propagate(ed, "lex-core", core_ver)
-        if res == "UPDATED":
-            manifest_updated = True
-            forced_editors.add(ed)
-        elif res == "CLEAN" and manifest_updated:
-            forced_editors.add(ed)
-
-    # Propagate Babel
-    for ed in editors_crates:
-        res = propagate(ed, "lex-babel", babel_ver)
-        if res == "UPDATED":
-            manifest_updated = True
-            forced_editors.add(ed)
-        elif res == "CLEAN" and manifest_updated:
-            forced_editors.add(ed)
-
-    # lex-lsp also depends on analysis
-    analysis_ver = release_if_changed("lex-analysis", force=("lex-analysis" in forced_editors))
-
-    res = propagate("lex-lsp", "lex-analysis", analysis_ver)
-    if res == "UPDATED":
-        forced_editors.add("lex-lsp")
-
-    # 5. Release LSP
-    lsp_ver = release_if_changed("lex-lsp", force=("lex-lsp" in forced_editors))
-
-    # 6. Propagate LSP -> Clients
-    clients = ["lexed", "vscode", "nvim"]
-
-    for client in clients:
-        print(f"[{client}] Updating LSP to {lsp_ver}...")
-        try:
-            dependencies.update_tool_dep(client, dependencies.CLIENT_LSP_KEYS[client], lsp_ver)
-        except Exception as e:
-            print(f"Failed to update {client}: {e}")
-        release_if_changed(client, force=True)
+    journal.start(common.get_workspace().root_dir, "release-all", run_id=state.run_id if state else None)
+    try:
+        with commits.release_transaction():
+            run_release_levels(jobs, state)
+    except BaseException:
+        # Leave the run unfinished so --resume can pick it up
+        journal.stop()
+        raise
+    journal.finish()
 
     print("\nRelease Cycle Complete!")
-    status.check_status()
-
-    if PUSH_COMMANDS:
-        print("\n" + "=" * 40)
-        print("SYNC REQUIRED! Run these commands to push:")
-        print("=" * 40)
-        for cmd in PUSH_COMMANDS:
-            print(cmd)
-        print("=" * 40 + "\n")
-    else:
+    status.check_status(jobs=jobs)
+
+    if not print_push_commands():
         print("\nAll synced (or no releases needed).")
 
 
-def release_all_crates():
-    """Simpler alternative - check all crates for changes and release if found."""
+def plan_release(run, as_json=False):
+    """Compute what a release run would do without writing files or touching git.
+
+    The normal orchestration runs against a dry-run fork of the current
+    workspace: manifest edits stay in memory, and commits and tags are only
+    recorded. Progress output goes to stderr so stdout carries just the plan.
+    """
     global PUSH_COMMANDS
     PUSH_COMMANDS = []
 
+    release_plan = plan.ReleasePlan()
+    previous = common.use_workspace(common.get_workspace().fork(plan=release_plan))
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            run()
+    finally:
+        common.use_workspace(previous)
+
+    if as_json:
+        print(json.dumps(release_plan.to_dict(), indent=2))
+    else:
+        print(release_plan.render())
+    return release_plan
+
+
+def plan_release_all(jobs=None, as_json=False, resume=False, explain=False, require_clean=False):
+    """Release plan for release_all (with resume, for the rest of an interrupted run)."""
+    global EXPLAIN
+    EXPLAIN = explain
+    if require_clean and not resume:
+        clean.require_clean(jobs)
+
+    def run():
+        state = resume_state() if resume else None
+        if state is not None or not resume:
+            run_release_levels(jobs, state)
+
+    return plan_release(run, as_json)
+
+
+def plan_release_all_crates(as_json=False, explain=False):
+    """Release plan for release_all_crates."""
+    return plan_release(lambda: release_all_crates(explain), as_json)
+
+
+def release_all_crates(explain=False):
+    """Simpler alternative - check all crates for changes and release if found."""
+    global PUSH_COMMANDS, EXPLAIN
+    PUSH_COMMANDS = []
+    EXPLAIN = explain
+
     print("Checking for changes in all crates...")
 
-    order = [
-        "lex-core",
-        "lex-babel", "lex-cli", "lex-config",
-        "lex-analysis", "lex-lsp"
-    ]
+    crates = [c for c in graph.current().order if c in common.CRATES]
+    try:
+        changed = changes.changed_components(crates)
+    except Exception as e:
+        print(f"Change check failed ({e}); treating every crate as changed.")
+        changed = dict.fromkeys(crates, True)
+
+    # Journalled (for `push`) unless this is a dry run
+    if common.get_workspace().plan is None:
+        journal.start(common.get_workspace().root_dir, "release-all-crates")
+    try:
+        with commits.release_transaction():
+            release_crates(crates, changed)
+    except BaseException:
+        journal.stop()
+        raise
+    journal.finish()
+
+    print_push_commands()
+
 
-    for crate in order:
+def release_crates(crates, changed):
+    """Release every crate marked as changed, in order (part of release_all_crates)."""
+    for crate in crates:
         repo_root, rel_path = common.get_repo_details(crate)
         current_ver = common.get_current_version(crate)
-        tag_name = f"v{current_ver}"
+        tag_name = common.get_tag_name(crate, current_ver)
 
         print(f"Checking {crate} ({current_ver}) in {rel_path}...")
 
-        # Check if tag exists
-        try:
-            common.run_command(f"git rev-parse {tag_name}", cwd=repo_root, check=False)
-        except Exception:
+        if not common.tag_exists(crate, tag_name):
             print(f"  Tag {tag_name} not found. Assuming generic 'main' or fresh release?")
-            pass
-
-        # Diff
-        cmd = f"git diff --name-only {tag_name}..HEAD -- {rel_path}"
-        try:
-            diff = common.run_command(cmd, cwd=repo_root, check=False)
-        except Exception:
-            diff = "FORCE_UPDATE"
 
-        if diff and diff.strip():
+        if changed[crate]:
             print(f"  Changes detected in {crate}!")
+            explain_changes(crate, repo_root, tag_name, rel_path)
             print(f"  Releasing {crate} (patch bump)...")
             try:
                 component.release_component(crate, "patch")
@@ -213,11 +466,3 @@ def release_all_crates():
                 print(f"  Failed to release {crate}: {e}")
         else:
             print(f"  No changes in {crate}.")
-
-    if PUSH_COMMANDS:
-        print("\n" + "=" * 40)
-        print("SYNC REQUIRED! Run these commands to push:")
-        print("=" * 40)
-        for cmd in PUSH_COMMANDS:
-            print(cmd)
-        print("=" * 40 + "\n")
@@ -0,0 +1,102 @@
+"""
+Release plan - record what an orchestration would do instead of doing it.
+
+A Workspace created with a ReleasePlan keeps manifest writes in memory and
+routes commits and tags here, so `release-all --plan` can run the normal
+release logic end to end without touching files or git.
+"""
+
+import difflib
+import threading
+
+
+def _changed_lines(old_content, new_content):
+    """Lines removed and added between two versions of a file."""
+    removed, added = [], []
+    for line in difflib.unified_diff(old_content.splitlines(), new_content.splitlines(), n=0, lineterm=""):
+        if line.startswith("---") or line.startswith("+++"):
+            continue
+        if line.startswith("-"):
+            removed.append(line[1:])
+        elif line.startswith("+"):
+            added.append(line[1:])
+    return removed, added
+
+
+class ReleasePlan:
+    """Everything a release run would change: versions, manifest edits, commits and tags."""
+
+    def __init__(self):
+        self.releases = []
+        self.edits = []
+        self.commits = []
+        self.tags = []
+        self._uncommitted = {}
+        self._lock = threading.Lock()
+
+    def record_release(self, component, old_version, new_version, tag_name):
+        with self._lock:
+            self.releases.append({
+                "component": component,
+                "from": old_version,
+                "to": new_version,
+                "tag": tag_name,
+            })
+
+    def record_edit(self, repo, rel_path, old_content, new_content):
+        removed, added = _changed_lines(old_content or "", new_content)
+        with self._lock:
+            self.edits.append({"repo": repo, "file": rel_path, "removed": removed, "added": added})
+            files = self._uncommitted.setdefault(repo, [])
+            if rel_path not in files:
+                files.append(rel_path)
+
+    def uncommitted(self, repo):
+        """Files edited in a repo since its last planned commit."""
+        with self._lock:
+            return list(self._uncommitted.get(repo, []))
+
+    def record_commit(self, repo, message, files=None):
+        with self._lock:
+            edited = self._uncommitted.pop(repo, [])
+            files = edited + [f for f in files or [] if f not in edited]
+            self.commits.append({"repo": repo, "message": message, "files": files})
+
+    def record_tag(self, repo, tag_name):
+        with self._lock:
+            self.tags.append({"repo": repo, "tag": tag_name})
+
+    def to_dict(self):
+        return {
+            "releases": self.releases,
+            "edits": self.edits,
+            "commits": self.commits,
+            "tags": self.tags,
+        }
+
+    def render(self):
+        """Human-readable plan."""
+        lines = ["Release Plan", "============", "", "[Releases]"]
+        if self.releases:
+            for release in self.releases:
+                lines.append(f"{release['component']:<15} : {release['from']} -> {release['to']} ({release['tag']})")
+        else:
+            lines.append("  None - nothing to release")
+
+        lines.extend(["", "[Manifest Edits]"])
+        for edit in self.edits:
+            lines.append(f"{edit['file']}")
+            for line in edit["removed"]:
+                lines.append(f"    - {line.strip()}")
+            for line in edit["added"]:
+                lines.append(f"    + {line.strip()}")
+
+        lines.extend(["", "[Commits]"])
+        for commit in self.commits:
+            files = ", ".join(commit["files"]) or "working tree changes"
+            lines.append(f"{commit['repo']:<15} : {commit['message']} ({files})")
+
+        lines.extend(["", "[Tags]"])
+        for tag in self.tags:
+            lines.append(f"{tag['repo']:<15} : {tag['tag']}")
+        return "\n".join(lines)
@@ -0,0 +1,118 @@
+"""
+Push - publish what the last release run committed and tagged.
+
+The repositories and tags come from the release journal. Each repository's
+branch and new tags go out in one `git push --atomic` (the remote takes all
+of them or none), and repositories are pushed in parallel with bounded
+concurrency, so pushing every repository takes about as long as the slowest
+one. Failed pushes are retried with backoff unless the remote rejected them.
+"""
+
+import os
+import sys
+import time
+
+from . import common
+from . import graph
+from . import journal
+from . import runner
+from . import scheduler
+
+DEFAULT_REMOTE = "origin"
+
+# Attempts after the first one, and the delay before the first retry (doubled each time)
+RETRIES = 2
+RETRY_DELAY = 1.0
+
+# `git push --porcelain` flag for refs the remote already had
+_UP_TO_DATE = "="
+
+
+def targets(state):
+    """Map of repository root -> tags the run created there, in release order."""
+    repos = {}
+    release_graph = graph.current()
+    comps = sorted(state.tags, key=lambda c: (c not in release_graph, release_graph.position.get(c, 0)))
+    for comp in comps:
+        repo_root, _ = common.get_repo_details(comp)
+        tags = repos.setdefault(repo_root, [])
+        if state.tags[comp] not in tags:
+            tags.append(state.tags[comp])
+    return repos
+
+
+def _outcome(result):
+    """Summarise a `git push --porcelain` result: pushed, up to date, rejected or failed."""
+    flags = [line[0] for line in result.stdout.splitlines() if line[:1] in " +-*!=" and "\t" in line]
+    if result.ok:
+        return "up to date" if flags and all(flag == _UP_TO_DATE for flag in flags) else "pushed"
+    return "rejected" if "!" in flags else "failed"
+
+
+def push_repo(repo_root, tags, remote=DEFAULT_REMOTE, retries=RETRIES, dry_run=False):
+    """Push a repository's branch and tags atomically; returns a result dict."""
+    argv = ["git", "push", "--atomic", "--porcelain"] + (["--dry-run"] if dry_run else [])
+    argv += [remote, "HEAD"] + [f"refs/tags/{tag}" for tag in tags]
+    start = time.perf_counter()
+    delay = RETRY_DELAY
+    for attempt in range(1, retries + 2):
+        result = runner.run(argv, cwd=repo_root)
+        outcome = _outcome(result)
+        if dry_run and outcome == "pushed":
+            outcome = "would push"
+        # A rejection (e.g. non-fast-forward) will not go away by retrying
+        if outcome != "failed" or attempt > retries:
+            break
+        time.sleep(delay)
+        delay *= 2
+    return {
+        "repo": os.path.basename(repo_root),
+        "result": outcome,
+        "attempts": attempt,
+        "seconds": time.perf_counter() - start,
+        "refs": ["HEAD"] + tags,
+        "error": "" if result.ok else (result.stderr or result.stdout).strip(),
+    }
+
+
+def print_summary(results):
+    print(f"{'Repository':<15} {'Result':<11} {'Attempts':>8} {'Seconds':>8}  Refs")
+    print(f"{'-' * 15} {'-' * 11} {'-' * 8} {'-' * 8}  {'-' * 4}")
+    for r in results:
+        print(f"{r['repo']:<15} {r['result']:<11} {r['attempts']:>8} {r['seconds']:>8.2f}  {', '.join(r['refs'])}")
+    for r in results:
+        if r["error"]:
+            print(f"\n[{r['repo']}] {r['error']}")
+
+
+def push(jobs=None, remote=DEFAULT_REMOTE, retries=RETRIES, dry_run=False):
+    """Push every repository the last release run touched.
+
+    Exits with status 1 if there is no finished run to push or any
+    repository fails to push.
+    """
+    root_dir = common.get_workspace().root_dir
+    state = journal.last_run(root_dir)
+    if state is None:
+        print(f"Error: no release run recorded in {journal.JOURNAL_PATH}")
+        sys.exit(1)
+    if not state.finished:
+        print(f"Error: release run {state.run_id} ({state.command}) did not finish; complete it before pushing.")
+        sys.exit(1)
+
+    repos = targets(state)
+    if not repos:
+        print(f"Release run {state.run_id} created no tags; nothing to push.")
+        return []
+
+    names = ", ".join(os.path.basename(repo_root) for repo_root in repos)
+    print(f"Pushing release run {state.run_id} to {remote}: {names}")
+    pushed = scheduler.run_grouped(
+        list(repos), lambda repo_root: repo_root,
+        lambda repo_root: push_repo(repo_root, repos[repo_root], remote, retries, dry_run), jobs,
+    )
+    results = [pushed[repo_root] for repo_root in repos]
+    print_summary(results)
+    if any(r["result"] in ("failed", "rejected") for r in results):
+        sys.exit(1)
+    return results
@@ -0,0 +1,294 @@
+"""
+Command runner - run external programs from argv lists, without a shell.
+
+Every call returns a Result with the return code, stdout, stderr and
+duration. Calls are traced, bounded by a per-call timeout (a hung git
+process is killed instead of stalling a release) and limited to
+MAX_PROCS concurrent processes across all threads.
+"""
+
+import os
+import shlex
+import signal
+import subprocess
+import threading
+import time
+
+from . import trace
+
+# Seconds before a command is killed; None disables the limit
+DEFAULT_TIMEOUT = 300
+
+# Upper bound on concurrently running child processes
+MAX_PROCS = max(4, os.cpu_count() or 1)
+
+_slots = threading.BoundedSemaphore(MAX_PROCS)
+
+
+class Result:
+    """Outcome of one command."""
+
+    __slots__ = ("argv", "cwd", "returncode", "stdout", "stderr", "duration", "timed_out")
+
+    def __init__(self, argv, cwd, returncode, stdout, stderr, duration, timed_out=False):
+        self.argv = argv
+        self.cwd = cwd
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+        self.timed_out = timed_out
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.timed_out
+
+    @property
+    def command(self):
+        """The argv as a copy-pasteable shell string (for messages only)."""
+        return shlex.join(self.argv)
+
+    def __repr__(self):
+        return f"Result({self.command!r}, returncode={self.returncode}, duration={self.duration:.3f})"
+
+
+class CommandError(Exception):
+    """A command exited non-zero, timed out or could not be started."""
+
+    def __init__(self, result):
+        self.result = result
+        if result.timed_out:
+            reason = "timed out"
+        else:
+            reason = f"exited with status {result.returncode}"
+        detail = (result.stderr or result.stdout or "").strip()
+        message = f"{result.command} {reason}"
+        super().__init__(f"{message}: {detail}" if detail else message)
+
+
+def configure(timeout=None, max_procs=None):
+    """Change the default timeout and/or the process limit."""
+    global DEFAULT_TIMEOUT, MAX_PROCS, _slots
+    if timeout is not None:
+        DEFAULT_TIMEOUT = timeout if timeout > 0 else None
+    if max_procs is not None:
+        MAX_PROCS = max(1, max_procs)
+        _slots = threading.BoundedSemaphore(MAX_PROCS)
+
+
+def _timeout(timeout):
+    """Resolve a per-call timeout: None means the default, 0 means no limit."""
+    if timeout is None:
+        return DEFAULT_TIMEOUT
+    return timeout or None
+
+
+def run(argv, cwd=None, timeout=None, input=None, env=None, check=False):
+    """Run a command to completion and capture its output.
+
+    Args:
+        argv: Program and arguments (never passed through a shell)
+        cwd: Working directory
+        timeout: Seconds before the process is killed (default DEFAULT_TIMEOUT, 0 for no limit)
+        input: Text written to stdin
+        env: Environment for the child (default: inherit)
+        check: Raise CommandError unless the command succeeds
+
+    Returns:
+        Result
+    """
+    argv = list(argv)
+    timeout = _timeout(timeout)
+    with trace.span(shlex.join(argv), "subprocess", kind=trace.command_kind(argv), argv=argv, cwd=cwd) as span:
+        with _slots:
+            start = time.perf_counter()
+            try:
+                proc = _spawn(argv, cwd, env, subprocess.PIPE if input is not None else subprocess.DEVNULL)
+            except OSError as e:
+                result = Result(argv, cwd, 127, "", str(e), time.perf_counter() - start)
+            else:
+                timed_out = False
+                try:
+                    stdout, stderr = proc.communicate(input, timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    timed_out = True
+                    _kill(proc)
+                    stdout, stderr = proc.communicate()
+                except BaseException:
+                    _kill(proc)
+                    raise
+                result = Result(argv, cwd, None if timed_out else proc.returncode, stdout, stderr,
+                                time.perf_counter() - start, timed_out=timed_out)
+        span.set(exit_code=result.returncode, bytes_out=len(result.stdout), timed_out=result.timed_out)
+    if check and not result.ok:
+        raise CommandError(result)
+    return result
+
+
+def _spawn(argv, cwd, env, stdin, stderr=subprocess.PIPE):
+    # A new session lets a timeout kill the whole process group (e.g. git and its ssh child)
+    return subprocess.Popen(
+        argv, cwd=cwd, env=env, stdin=stdin,
+        stdout=subprocess.PIPE, stderr=stderr,
+        text=True, encoding="utf-8", errors="replace",
+        start_new_session=hasattr(os, "killpg"),
+    )
+
+
+def _kill(proc):
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
+
+
+def stream(argv, on_line, cwd=None, timeout=None, env=None, check=False, merge_stderr=False, cancel=None,
+           inherit_stdin=False):
+    """Run a command, calling on_line(line) for each stdout line as it arrives.
+
+    stderr is collected into the Result, or with merge_stderr passed to
+    on_line along with stdout; stdout is not (it has already been handed to
+    on_line). The process is killed once the timeout expires, or when the
+    optional cancel event (a threading.Event) is set. stdin is /dev/null
+    unless inherit_stdin is true.
+    """
+    argv = list(argv)
+    timeout = _timeout(timeout)
+    with trace.span(shlex.join(argv), "subprocess", kind=trace.command_kind(argv), argv=argv, cwd=cwd) as span:
+        with _slots:
+            start = time.perf_counter()
+            try:
+                proc = _spawn(argv, cwd, env, None if inherit_stdin else subprocess.DEVNULL,
+                              subprocess.STDOUT if merge_stderr else subprocess.PIPE)
+            except OSError as e:
+                result = Result(argv, cwd, 127, "", str(e), time.perf_counter() - start)
+            else:
+                expired = threading.Event()
+
+                def kill():
+                    expired.set()
+                    _kill(proc)
+
+                def watch():
+                    cancel.wait()
+                    if proc.poll() is None:
+                        _kill(proc)
+
+                timer = threading.Timer(timeout, kill) if timeout else None
+                stderr = []
+                reader = None
+                if not merge_stderr:
+                    reader = threading.Thread(target=lambda: stderr.append(proc.stderr.read()), daemon=True)
+                    reader.start()
+                if cancel is not None:
+                    threading.Thread(target=watch, daemon=True).start()
+                if timer:
+                    timer.start()
+                try:
+                    for line in proc.stdout:
+                        on_line(line.rstrip("\n"))
+                except BaseException:
+                    _kill(proc)
+                    raise
+                finally:
+                    if timer:
+                        timer.cancel()
+                    returncode = proc.wait()
+                    if reader:
+                        reader.join()
+                result = Result(argv, cwd, None if expired.is_set() else returncode, "", "".join(stderr),
+                                time.perf_counter() - start, timed_out=expired.is_set())
+        span.set(exit_code=result.returncode, timed_out=result.timed_out)
+    if check and not result.ok:
+        raise CommandError(result)
+    return result
+
+
+class Batch:
+    """Long-lived process answering one stdout line per stdin line.
+
+    Used for git's --batch modes (e.g. `git cat-file --batch-check`), where
+    one process serves any number of lookups. The spawn is traced like any
+    other command; it does not take a MAX_PROCS slot since it lives for the
+    whole run. A query that gets no answer within the timeout kills the
+    process and raises CommandError.
+    """
+
+    def __init__(self, argv, cwd=None, env=None, timeout=None):
+        self.argv = list(argv)
+        self.cwd = cwd
+        self.timeout = _timeout(timeout)
+        self._lock = threading.Lock()
+        with trace.span(shlex.join(self.argv), "subprocess", kind=trace.command_kind(self.argv),
+                        argv=self.argv, cwd=cwd):
+            self._proc = _spawn(self.argv, cwd, env, subprocess.PIPE)
+
+    def query(self, lines):
+        """Send lines and return the matching response lines (without newlines)."""
+        lines = list(lines)
+        if not lines:
+            return []
+        with self._lock:
+            expired = threading.Event()
+
+            def kill():
+                expired.set()
+                _kill(self._proc)
+
+            timer = threading.Timer(self.timeout, kill) if self.timeout else None
+            if timer:
+                timer.start()
+            try:
+                self._proc.stdin.write("".join(line + "\n" for line in lines))
+                self._proc.stdin.flush()
+                answers = [self._proc.stdout.readline() for _ in lines]
+            except OSError:
+                answers = [""]
+            finally:
+                if timer:
+                    timer.cancel()
+        if not all(answer.endswith("\n") for answer in answers):
+            self.close()
+            stderr = self._proc.stderr.read() if self._proc.stderr else ""
+            raise CommandError(Result(self.argv, self.cwd, self._proc.returncode, "", stderr, 0.0,
+                                      timed_out=expired.is_set()))
+        return [answer[:-1] for answer in answers]
+
+    def close(self):
+        """Stop the process."""
+        if self._proc.poll() is None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                _kill(self._proc)
+                self._proc.wait()
+
+    @property
+    def alive(self):
+        return self._proc.poll() is None
+
+
+def run_many(calls, jobs=None, timeout=None):
+    """Run several commands concurrently.
+
+    Args:
+        calls: Iterable of (argv, cwd) pairs
+        jobs: Maximum commands in flight (default: MAX_PROCS)
+
+    Returns:
+        List of Results in the order of calls.
+    """
+    # Imported here: concurrent.futures is slow to import and most commands never need it
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = list(calls)
+    if not calls:
+        return []
+    workers = max(1, min(jobs or MAX_PROCS, len(calls)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run, argv, cwd, timeout) for argv, cwd in calls]
+    return [future.result() for future in futures]
@@ -0,0 +1,87 @@
+"""
+Dependency-graph scheduler - run per-component steps level by level in parallel.
+
+Components are grouped into topological levels; everything within a level is
+independent and may run concurrently, except that components living in the
+same repository are always run one after another because they share a git
+index and working tree.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def topological_levels(deps, order=None):
+    """Split a dependency graph into levels of mutually independent nodes.
+
+    Args:
+        deps: Mapping of node -> iterable of nodes it depends on
+        order: Optional preferred ordering used to sort nodes within a level
+
+    Returns:
+        List of levels (lists of nodes); every node appears after all of its
+        dependencies.
+    """
+    nodes = []
+    for node, sources in deps.items():
+        for n in list(sources) + [node]:
+            if n not in nodes:
+                nodes.append(n)
+
+    rank = {node: i for i, node in enumerate(order or [])}
+    seen = {node: i for i, node in enumerate(nodes)}
+    nodes.sort(key=lambda n: (rank.get(n, len(rank)), seen[n]))
+
+    level_of = {}
+    remaining = list(nodes)
+    while remaining:
+        ready = [n for n in remaining if all(s in level_of for s in deps.get(n, ()))]
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {', '.join(remaining)}")
+        for n in ready:
+            level_of[n] = max((level_of[s] + 1 for s in deps.get(n, ())), default=0)
+        remaining = [n for n in remaining if n not in level_of]
+
+    levels = [[] for _ in range(max(level_of.values(), default=-1) + 1)]
+    for n in nodes:
+        levels[level_of[n]].append(n)
+    return levels
+
+
+def run_grouped(items, group_of, step, jobs=None, on_result=None):
+    """Run step(item) for every item, one worker per group.
+
+    Items sharing a group (e.g. a repository) run sequentially in the given
+    order; different groups run concurrently on at most `jobs` threads.
+    Returns a dict of item -> result. An exception raised by any step
+    (including SystemExit) is re-raised once all groups have finished.
+
+    on_result(item, result), if given, is called from the worker thread as
+    soon as each item finishes, in completion order; calls are serialised.
+    """
+    groups = {}
+    for item in items:
+        groups.setdefault(group_of(item), []).append(item)
+    if not groups:
+        return {}
+
+    lock = threading.Lock()
+
+    def run_group(group_items):
+        done = []
+        for item in group_items:
+            result = step(item)
+            if on_result is not None:
+                with lock:
+                    on_result(item, result)
+            done.append((item, result))
+        return done
+
+    results = {}
+    workers = max(1, min(jobs or len(groups), len(groups)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_group, group_items) for group_items in groups.values()]
+    for future in futures:
+        for item, result in future.result():
+            results[item] = result
+    return {item: results[item] for item in items}
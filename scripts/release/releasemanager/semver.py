@@ -0,0 +1,223 @@
+"""
+Semantic versioning - parse, compare, sort and increment versions in-process.
+
+Follows the node-semver rules the release flow used to get from the `semver`
+CLI, so bumps and precedence match what `semver -i <part> [--preid <id>]`
+produced.
+"""
+
+import functools
+import re
+
+# node-semver refuses numeric parts above Number.MAX_SAFE_INTEGER
+MAX_SAFE_INTEGER = 2 ** 53 - 1
+
+_NUMERIC = r'0|[1-9]\d*'
+_PRERELEASE_ID = r'(?:0|[1-9]\d*|\d*[a-zA-Z-][a-zA-Z0-9-]*)'
+_BUILD_ID = r'[0-9A-Za-z-]+'
+
+_VERSION_RE = re.compile(
+    rf'^v?({_NUMERIC})\.({_NUMERIC})\.({_NUMERIC})'
+    rf'(?:-({_PRERELEASE_ID}(?:\.{_PRERELEASE_ID})*))?'
+    rf'(?:\+({_BUILD_ID}(?:\.{_BUILD_ID})*))?$'
+)
+_IDENTIFIER_RE = re.compile(rf'^{_PRERELEASE_ID}(?:\.{_PRERELEASE_ID})*$')
+_DIGITS_RE = re.compile(r'^[0-9]+$')
+
+# Parts accepted by inc(), in the order the CLI documents them
+RELEASE_TYPES = ["major", "minor", "patch", "premajor", "preminor", "prepatch", "prerelease"]
+
+
+class Version:
+    """A parsed semantic version.
+
+    Prerelease identifiers are stored as ints when numeric and as strings
+    otherwise. Build metadata is kept but ignored for precedence and dropped
+    by str(), as node-semver does.
+    """
+
+    __slots__ = ("major", "minor", "patch", "prerelease", "build")
+
+    def __init__(self, major, minor, patch, prerelease=(), build=()):
+        self.major = major
+        self.minor = minor
+        self.patch = patch
+        self.prerelease = list(prerelease)
+        self.build = list(build)
+
+    def __str__(self):
+        version = f"{self.major}.{self.minor}.{self.patch}"
+        if self.prerelease:
+            version += "-" + ".".join(str(part) for part in self.prerelease)
+        return version
+
+    def __repr__(self):
+        return f"Version('{self}')"
+
+    def __eq__(self, other):
+        return isinstance(other, Version) and compare(self, other) == 0
+
+    def __lt__(self, other):
+        return compare(self, other) < 0
+
+    def __hash__(self):
+        return hash((self.major, self.minor, self.patch, tuple(self.prerelease)))
+
+    def copy(self):
+        return Version(self.major, self.minor, self.patch, self.prerelease, self.build)
+
+
+def _prerelease_part(part):
+    if _DIGITS_RE.match(part):
+        number = int(part)
+        if number <= MAX_SAFE_INTEGER:
+            return number
+    return part
+
+
+def parse(version):
+    """Parse a version string, raising ValueError if it is not valid semver."""
+    if isinstance(version, Version):
+        return version.copy()
+    text = str(version).strip()
+    match = _VERSION_RE.match(text) if len(text) <= 256 else None
+    if not match:
+        raise ValueError(f"Invalid version: {version}")
+
+    major, minor, patch = (int(match.group(i)) for i in (1, 2, 3))
+    if max(major, minor, patch) > MAX_SAFE_INTEGER:
+        raise ValueError(f"Invalid version: {version}")
+
+    prerelease = [_prerelease_part(p) for p in match.group(4).split(".")] if match.group(4) else []
+    build = match.group(5).split(".") if match.group(5) else []
+    return Version(major, minor, patch, prerelease, build)
+
+
+def valid(version):
+    """Return the normalised version string, or None if it does not parse."""
+    try:
+        return str(parse(version))
+    except ValueError:
+        return None
+
+
+def compare_identifiers(a, b):
+    """Compare two prerelease identifiers: numeric ones sort before alphanumeric."""
+    a_num = bool(_DIGITS_RE.match(str(a)))
+    b_num = bool(_DIGITS_RE.match(str(b)))
+    if a_num and b_num:
+        a, b = int(a), int(b)
+    elif a_num:
+        return -1
+    elif b_num:
+        return 1
+    else:
+        a, b = str(a), str(b)
+    if a == b:
+        return 0
+    return -1 if a < b else 1
+
+
+def _compare_pre(a, b):
+    if a.prerelease and not b.prerelease:
+        return -1
+    if not a.prerelease and b.prerelease:
+        return 1
+    for left, right in zip(a.prerelease, b.prerelease):
+        result = compare_identifiers(left, right)
+        if result:
+            return result
+    return (len(a.prerelease) > len(b.prerelease)) - (len(a.prerelease) < len(b.prerelease))
+
+
+def compare(a, b):
+    """Return -1, 0 or 1 according to semver precedence (build metadata ignored)."""
+    a = a if isinstance(a, Version) else parse(a)
+    b = b if isinstance(b, Version) else parse(b)
+    for left, right in ((a.major, b.major), (a.minor, b.minor), (a.patch, b.patch)):
+        if left != right:
+            return -1 if left < right else 1
+    return _compare_pre(a, b)
+
+
+def sort_versions(versions, reverse=False):
+    """Sort version strings by precedence."""
+    return sorted(versions, key=functools.cmp_to_key(compare), reverse=reverse)
+
+
+def _inc_pre(version, identifier, identifier_base):
+    base = 1 if identifier_base == 1 else 0
+    if not version.prerelease:
+        version.prerelease = [base]
+    else:
+        for i in range(len(version.prerelease) - 1, -1, -1):
+            if isinstance(version.prerelease[i], int):
+                version.prerelease[i] += 1
+                break
+        else:
+            # Nothing numeric to increment
+            version.prerelease.append(base)
+
+    if identifier:
+        if compare_identifiers(version.prerelease[0], identifier) == 0:
+            if len(version.prerelease) < 2 or not isinstance(version.prerelease[1], int):
+                version.prerelease = [identifier, base]
+        else:
+            version.prerelease = [identifier, base]
+
+
+def _inc(version, release, identifier, identifier_base):
+    if release == "premajor":
+        version.prerelease = []
+        version.patch = 0
+        version.minor = 0
+        version.major += 1
+        _inc_pre(version, identifier, identifier_base)
+    elif release == "preminor":
+        version.prerelease = []
+        version.patch = 0
+        version.minor += 1
+        _inc_pre(version, identifier, identifier_base)
+    elif release == "prepatch":
+        version.prerelease = []
+        _inc(version, "patch", identifier, identifier_base)
+        _inc_pre(version, identifier, identifier_base)
+    elif release == "prerelease":
+        if not version.prerelease:
+            _inc(version, "patch", identifier, identifier_base)
+        _inc_pre(version, identifier, identifier_base)
+    elif release == "major":
+        # 1.0.0-rc.1 releases as 1.0.0, not 2.0.0
+        if version.minor != 0 or version.patch != 0 or not version.prerelease:
+            version.major += 1
+        version.minor = 0
+        version.patch = 0
+        version.prerelease = []
+    elif release == "minor":
+        if version.patch != 0 or not version.prerelease:
+            version.minor += 1
+        version.patch = 0
+        version.prerelease = []
+    elif release == "patch":
+        if not version.prerelease:
+            version.patch += 1
+        version.prerelease = []
+    else:
+        raise ValueError(f"Invalid increment argument: {release}")
+
+
+def inc(version, release, identifier=None, identifier_base=0):
+    """Return the next version string for a release type.
+
+    Args:
+        version: Current version string
+        release: One of RELEASE_TYPES
+        identifier: Prerelease identifier (the CLI's --preid), e.g. "beta"
+        identifier_base: Starting number for a fresh prerelease (0 or 1)
+    """
+    if identifier and not _IDENTIFIER_RE.match(identifier):
+        raise ValueError(f"Invalid prerelease identifier: {identifier}")
+    result = parse(version)
+    result.build = []
+    _inc(result, release, identifier, identifier_base)
+    return str(result)
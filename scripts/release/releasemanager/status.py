@@ -2,10 +2,17 @@
 Release status checker - shows versions, tags, and dependency status.
 """
 
-from . import common
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
 
-# Crate order for display (dependency chain)
-CRATE_ORDER = ["lex-core", "lex-babel", "lex-config", "lex-cli", "lex-analysis", "lex-lsp"]
+from . import common
+from . import graph
+from . import scheduler
+from . import trace
 
 
 def format_tag_status(version, tag):
@@ -36,78 +43,275 @@ def format_deps(deps, indent="    "):
     return "\n".join(lines)
 
 
-def check_status():
-    """Print release status report."""
-    print("Release Status Report")
-    print("=====================")
+def collect_component(component, workspace=None):
+    """Gather the status record for a single crate or client (of the current workspace by default)."""
+    workspace = workspace or common.get_workspace()
+    ver = workspace.version(component)
+    record = {
+        "name": component,
+        "kind": "crate" if component in workspace.crates else "client",
+        "version": ver,
+        "tag": workspace.latest_tag(component),
+        "expected_tag": workspace.tag_name(component, ver),
+    }
+    record["tag_status"] = tag_status(record)
+    if component in workspace.crates:
+        record["deps"] = workspace.crate_dependencies(component)
+    else:
+        pins = workspace.tool_dependencies(component)
+        record["lsp"] = common.extract_version_from_tag(pins.get("lex-lsp"))
+        record["pins"] = {dep: common.extract_version_from_tag(pin) for dep, pin in sorted(pins.items())}
+    return record
 
-    # 1. Crates
-    print("\n[Crates]")
-    for crate in CRATE_ORDER:
-        if crate not in common.CRATES:
-            continue
-        ver = common.get_current_version(crate)
-        tag = common.get_latest_tag(crate)
-        deps = common.read_crate_dependencies(crate)
 
-        status = format_tag_status(ver, tag)
-        print(f"{crate:<15} : {status}")
+def tag_status(record):
+    """"tagged" if the current version is tagged, "untagged" if an older tag exists, else "no tag"."""
+    if not record["tag"]:
+        return "no tag"
+    return "tagged" if record["tag"] == record["expected_tag"] else "untagged"
 
-        if deps:
-            dep_str = format_deps(deps)
-            print(dep_str)
 
-    # 2. Clients
-    print("\n[Clients]")
-    for tool in common.TOOLS:
-        ver = common.get_current_version(tool)
-        tag = common.get_latest_tag(tool)
-        lsp_ver = common.read_tool_lsp_version(tool)
+def status_components(workspace=None):
+    """Components in report order: crates by dependency chain, then clients."""
+    workspace = workspace or common.get_workspace()
+    crates = [crate for crate in graph.current(workspace).order if crate in workspace.crates]
+    return crates + list(workspace.tools)
 
-        status = format_tag_status(ver, tag)
-        print(f"{tool:<15} : {status}")
 
-        if lsp_ver:
-            print(f"    lex-lsp: {lsp_ver}")
+def collect_status(jobs=None, on_record=None, workspace=None):
+    """Collect status records for every component, keyed by name.
 
-    # 3. Summary of issues
-    print("\n[Issues]")
+    Components are grouped by repository and each repository is handled by
+    one worker, so git and file I/O for independent repos overlap while work
+    within a repo stays sequential. on_record(record) is called as each
+    component resolves. workspace defaults to the current one.
+    """
+    workspace = workspace or common.get_workspace()
+
+    def repo_of(component):
+        return workspace.repo_details(component)[0]
+
+    def collect(component):
+        return collect_component(component, workspace)
+
+    def on_result(component, record):
+        on_record(record)
+
+    with trace.span("collect status", "phase", kind="collect status"):
+        return scheduler.run_grouped(status_components(workspace), repo_of, collect, jobs,
+                                     on_result=on_result if on_record else None)
+
+
+def find_issues(records, workspace=None):
+    """Compute the list of version/tag/dependency issues from status records."""
+    workspace = workspace or common.get_workspace()
     issues = []
+    components = status_components(workspace)
+    crates = [records[name] for name in components if records[name]["kind"] == "crate"]
+    clients = [records[name] for name in components if records[name]["kind"] == "client"]
 
     # Check for stale LSP versions in clients
-    lsp_ver = common.get_current_version("lex-lsp")
-    for tool in common.TOOLS:
-        tool_lsp = common.read_tool_lsp_version(tool)
-        if tool_lsp and tool_lsp != lsp_ver:
-            issues.append(f"{tool}: lex-lsp {tool_lsp} -> {lsp_ver}")
+    lsp_ver = records["lex-lsp"]["version"] if "lex-lsp" in records else workspace.version("lex-lsp")
+    for record in clients:
+        if record["lsp"] and record["lsp"] != lsp_ver:
+            issues.append(f"{record['name']}: lex-lsp {record['lsp']} -> {lsp_ver}")
 
     # Check for stale crate dependencies
-    for crate in CRATE_ORDER:
-        if crate not in common.CRATES:
-            continue
-        deps = common.read_crate_dependencies(crate)
-        for dep, dep_ver in deps.items():
-            current_dep_ver = common.get_current_version(dep)
+    for record in crates:
+        for dep, dep_ver in record["deps"].items():
+            if dep in records:
+                current_dep_ver = records[dep]["version"]
+            elif dep in workspace.crates:
+                current_dep_ver = workspace.version(dep)
+            else:
+                continue
             if dep_ver != current_dep_ver:
-                issues.append(f"{crate}: {dep} {dep_ver} -> {current_dep_ver}")
+                issues.append(f"{record['name']}: {dep} {dep_ver} -> {current_dep_ver}")
 
     # Check for version/tag mismatches
-    for crate in CRATE_ORDER:
-        if crate not in common.CRATES:
+    for record in crates + clients:
+        if record["tag"] != record["expected_tag"]:
+            issues.append(f"{record['name']}: missing tag {record['expected_tag']} (latest: {record['tag']})")
+
+    return issues
+
+
+def check_status(jobs=None, use_cache=True, rebuild_cache=False, output_format="text"):
+    """Print release status report.
+
+    With use_cache, parsed manifests and tag indexes are reused from the
+    on-disk status cache where still valid, and the cache is refreshed
+    afterwards; rebuild_cache ignores its previous contents.
+
+    output_format is "text" (the human report), "json" (one document with
+    all components and issues) or "ndjson" (one component record per line
+    as soon as it resolves, then a final issues record).
+    """
+    workspace = common.get_workspace()
+    if use_cache:
+        workspace.enable_cache(rebuild=rebuild_cache)
+
+    on_record = None
+    if output_format == "ndjson":
+        def on_record(record):
+            emit_json({"type": "component", **record})
+
+    records = collect_status(jobs, on_record=on_record)
+    workspace.save_cache()
+    issues = find_issues(records)
+
+    if output_format == "ndjson":
+        emit_json({"type": "issues", "issues": issues})
+    elif output_format == "json":
+        components = [records[name] for name in status_components()]
+        print(json.dumps({"components": components, "issues": issues}, indent=2))
+    else:
+        print_report(records, issues)
+
+
+def workspace_status(root_dir, jobs=None, use_cache=True, rebuild_cache=False):
+    """Status of one workspace checkout: its component records and issues.
+
+    Runs against a Workspace rooted at root_dir that carries that
+    checkout's own discovered registry, passed explicitly to every helper:
+    neither the process-wide workspace nor the process-wide registry is
+    touched. What the helpers print is captured with redirect_stdout, which
+    swaps sys.stdout for the whole process, so run one call per process at
+    a time (check_workspaces gives each root its own worker process).
+    Failures are reported in the result (with the captured output) rather
+    than raised, so one broken checkout does not abort a batch.
+    """
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            workspace = common.Workspace(root_dir, registry=common.discover_registry(root_dir))
+            if use_cache:
+                workspace.enable_cache(rebuild=rebuild_cache)
+            records = collect_status(jobs, workspace=workspace)
+            workspace.save_cache()
+            issues = find_issues(records, workspace)
+        components = [records[name] for name in status_components(workspace)]
+        return {"root": root_dir, "components": components, "issues": issues}
+    except (Exception, SystemExit) as e:
+        detail = output.getvalue().strip() or str(e) or type(e).__name__
+        return {"root": root_dir, "error": detail}
+
+
+def expand_workspaces(patterns):
+    """Absolute workspace roots for directories and glob patterns, without duplicates."""
+    roots = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            root = os.path.abspath(match)
+            if os.path.isdir(root) and root not in roots:
+                roots.append(root)
+    return roots
+
+
+def check_workspaces(patterns, jobs=None, processes=None, use_cache=True, rebuild_cache=False,
+                     output_format="text"):
+    """Status report across several workspace checkouts.
+
+    Every checkout is evaluated in its own worker process (at most
+    `processes`, default one per CPU), so throughput scales with cores;
+    `jobs` still bounds the threads used inside each checkout. Results are
+    merged into one report in the order the roots were given; ndjson
+    streams one line per checkout as it completes.
+    """
+    roots = expand_workspaces(patterns)
+    if not roots:
+        print("Error: no workspace directories matched")
+        sys.exit(1)
+
+    results = {}
+
+    def done(result):
+        results[result["root"]] = result
+        if output_format == "ndjson":
+            emit_json({"type": "workspace", **result})
+
+    workers = max(1, min(processes or os.cpu_count() or 1, len(roots)))
+    if workers == 1:
+        for root in roots:
+            done(workspace_status(root, jobs, use_cache, rebuild_cache))
+    else:
+        # Imported here: only batch runs need worker processes
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with trace.span("collect workspaces", "phase", kind="collect workspaces", workspaces=len(roots)):
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(workspace_status, root, jobs, use_cache, rebuild_cache) for root in roots]
+                for future in as_completed(futures):
+                    done(future.result())
+
+    ordered = [results[root] for root in roots]
+    if output_format == "json":
+        print(json.dumps({"workspaces": ordered}, indent=2))
+    elif output_format == "text":
+        print_workspaces_report(ordered)
+    if any("error" in result for result in ordered):
+        sys.exit(1)
+
+
+def print_workspaces_report(results):
+    """Print the human-readable report for several workspaces."""
+    print("Workspace Status Report")
+    print("=======================")
+    for result in results:
+        print(f"\n[{result['root']}]")
+        if "error" in result:
+            print(f"  Error: {result['error']}")
             continue
-        ver = common.get_current_version(crate)
-        tag = common.get_latest_tag(crate)
-        expected_tag = common.get_tag_name(crate, ver)
-        if tag != expected_tag:
-            issues.append(f"{crate}: missing tag {expected_tag} (latest: {tag})")
-
-    for tool in common.TOOLS:
-        ver = common.get_current_version(tool)
-        tag = common.get_latest_tag(tool)
-        expected_tag = common.get_tag_name(tool, ver)
-        if tag != expected_tag:
-            issues.append(f"{tool}: missing tag {expected_tag} (latest: {tag})")
+        for record in result["components"]:
+            print(f"  {record['name']:<15} : {format_tag_status(record['version'], record['tag'])}")
+        if result["issues"]:
+            print("  Issues:")
+            for issue in result["issues"]:
+                print(f"    - {issue}")
+
+    failed = sum(1 for result in results if "error" in result)
+    with_issues = sum(1 for result in results if result.get("issues"))
+    print(f"\n{len(results)} workspaces: {with_issues} with issues, {failed} failed")
+
+
+def emit_json(obj):
+    """Write one NDJSON line and flush it so consumers see it immediately."""
+    sys.stdout.write(json.dumps(obj) + "\n")
+    sys.stdout.flush()
+
 
+def print_report(records, issues):
+    """Print the human-readable status report."""
+    print("Release Status Report")
+    print("=====================")
+
+    # 1. Crates
+    print("\n[Crates]")
+    for name in status_components():
+        record = records[name]
+        if record["kind"] != "crate":
+            continue
+        status = format_tag_status(record["version"], record["tag"])
+        print(f"{name:<15} : {status}")
+
+        if record["deps"]:
+            print(format_deps(record["deps"]))
+
+    # 2. Clients
+    print("\n[Clients]")
+    for name in status_components():
+        record = records[name]
+        if record["kind"] != "client":
+            continue
+        status = format_tag_status(record["version"], record["tag"])
+        print(f"{name:<15} : {status}")
+
+        if record["lsp"]:
+            print(f"    lex-lsp: {record['lsp']}")
+
+    # 3. Summary of issues
+    print("\n[Issues]")
     if issues:
         for issue in issues:
             print(f"  - {issue}")
@@ -0,0 +1,87 @@
+"""
+Git tag index - answer tag lookups for a repository from one ref listing.
+
+The index is built from a single `git for-each-ref refs/tags` call per repo
+and then serves latest-tag, tag-exists and tag-for-version queries in memory.
+"""
+
+from . import semver
+
+# One line per tag: "<object> <peeled object or empty> <tag name>"
+FOR_EACH_REF_COMMAND = ["git", "for-each-ref", "refs/tags", "--format=%(objectname) %(*objectname) %(refname:strip=2)"]
+
+# Test tags (e.g. v100.0.0) that must never be reported as the latest release
+TEST_TAG_PREFIX = "v100"
+
+
+def _version_key(version):
+    """Sort key putting valid semver in precedence order above anything else."""
+    parsed = semver.valid(version)
+    return (parsed is not None, semver.parse(parsed) if parsed else version)
+
+
+class TagIndex:
+    """In-memory view of a repository's tags.
+
+    Maps each tag to the commit it points at (annotated tags are peeled) and
+    groups tags by prefix so per-component version lists are sorted once.
+    """
+
+    def __init__(self, tags=None):
+        self._commits = dict(tags or {})
+        self._by_prefix = {}
+
+    @classmethod
+    def parse(cls, output):
+        """Build an index from FOR_EACH_REF_COMMAND output."""
+        tags = {}
+        for line in (output or "").splitlines():
+            parts = line.strip().split(" ", 2)
+            if len(parts) != 3:
+                continue
+            obj, peeled, name = parts
+            tags[name] = peeled or obj
+        return cls(tags)
+
+    def __len__(self):
+        return len(self._commits)
+
+    def __contains__(self, tag_name):
+        return tag_name in self._commits
+
+    def commit(self, tag_name):
+        """Commit a tag points at, or None if the tag does not exist."""
+        return self._commits.get(tag_name)
+
+    def commits(self):
+        """Copy of the tag->commit map."""
+        return dict(self._commits)
+
+    def add(self, tag_name, commit):
+        """Record a tag created by this process."""
+        self._commits[tag_name] = commit
+        self._by_prefix.clear()
+
+    def versions(self, prefix):
+        """Versions of all tags starting with prefix, newest first."""
+        if prefix not in self._by_prefix:
+            versions = [name[len(prefix):] for name in self._commits if name.startswith(prefix)]
+            versions.sort(key=_version_key, reverse=True)
+            self._by_prefix[prefix] = versions
+        return self._by_prefix[prefix]
+
+    def latest(self, prefix, skip_prefix=None):
+        """Newest tag with the given prefix, optionally ignoring tags starting with skip_prefix."""
+        for version in self.versions(prefix):
+            tag_name = prefix + version
+            if skip_prefix and tag_name.startswith(skip_prefix):
+                continue
+            return tag_name
+        return None
+
+    def latest_for_component(self, component):
+        """Latest tag for a component: `component-v*` first, then plain `v*`."""
+        tag_name = self.latest(f"{component}-v")
+        if tag_name:
+            return tag_name
+        return self.latest("v", skip_prefix=TEST_TAG_PREFIX)
@@ -0,0 +1,370 @@
+"""
+Lossless TOML scanner - index Cargo manifests in one pass and edit them in place.
+
+This is not a general TOML parser. It walks a manifest once, recording every
+value together with its table, key path and exact position in the text, so
+callers can look up `[package]` versions and dependency requirements and
+rewrite individual strings without disturbing formatting, comments or key
+order. Keys and values inside comments or other strings are never matched.
+"""
+
+# Tables whose keys are dependency names
+DEP_TABLES = ("dependencies", "dev-dependencies", "build-dependencies")
+
+_BARE_KEY_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-")
+_ESCAPES = {'"': '"', '\\': '\\', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class Entry:
+    """One value in the document.
+
+    `path` is the full key path (table header parts followed by the key and
+    any inline-table keys). For strings, `start`/`end` delimit the contents
+    between the quotes; for other values they delimit the raw value text.
+    """
+
+    __slots__ = ("path", "kind", "value", "start", "end")
+
+    def __init__(self, path, kind, value, start, end):
+        self.path = path
+        self.kind = kind
+        self.value = value
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"Entry({'.'.join(map(str, self.path))}={self.value!r})"
+
+
+class Dependency:
+    """A dependency declaration found in any dependency table."""
+
+    __slots__ = ("name", "table", "version", "workspace", "path")
+
+    def __init__(self, name, table):
+        self.name = name
+        self.table = table
+        self.version = None
+        self.workspace = False
+        self.path = None
+
+
+def _decode_basic(raw):
+    """Decode escapes in a basic string."""
+    if '\\' not in raw:
+        return raw
+    out = []
+    i = 0
+    while i < len(raw):
+        c = raw[i]
+        if c == '\\' and i + 1 < len(raw):
+            nxt = raw[i + 1]
+            if nxt in _ESCAPES:
+                out.append(_ESCAPES[nxt])
+                i += 2
+                continue
+            if nxt in "uU":
+                width = 4 if nxt == "u" else 8
+                try:
+                    out.append(chr(int(raw[i + 2:i + 2 + width], 16)))
+                    i += 2 + width
+                    continue
+                except ValueError:
+                    pass
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _encode_basic(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+class TomlDocument:
+    """Single-pass index of a TOML document with byte-exact string edits."""
+
+    def __init__(self, text):
+        self.text = text
+        self.entries = []
+        self.tables = []
+        self._by_path = {}
+        self._pos = 0
+        self._scan()
+
+    def _add(self, entry):
+        self.entries.append(entry)
+        self._by_path.setdefault(entry.path, entry)
+        return entry
+
+    # --- scanning -------------------------------------------------------
+
+    def _peek(self, offset=0):
+        i = self._pos + offset
+        return self.text[i] if i < len(self.text) else ""
+
+    def _skip_inline_ws(self):
+        while self._pos < len(self.text) and self.text[self._pos] in " \t":
+            self._pos += 1
+
+    def _skip_to_eol(self):
+        end = self.text.find("\n", self._pos)
+        self._pos = len(self.text) if end < 0 else end + 1
+
+    def _skip_ws_comments(self):
+        """Skip whitespace, newlines and comments (inside arrays)."""
+        while self._pos < len(self.text):
+            c = self.text[self._pos]
+            if c in " \t\r\n":
+                self._pos += 1
+            elif c == "#":
+                self._skip_to_eol()
+            else:
+                break
+
+    def _scan(self):
+        table = ()
+        while self._pos < len(self.text):
+            self._skip_ws_comments()
+            if self._pos >= len(self.text):
+                break
+            try:
+                if self._peek() == "[":
+                    table = self._scan_header()
+                    self.tables.append(table)
+                else:
+                    keys = self._scan_key()
+                    self._expect("=")
+                    self._scan_value(table + keys)
+                self._skip_inline_ws()
+                if self._peek() == "#":
+                    self._skip_to_eol()
+            except ValueError:
+                # Not something we understand; resume on the next line
+                self._skip_to_eol()
+
+    def _expect(self, char):
+        self._skip_inline_ws()
+        if self._peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self._pos}")
+        self._pos += 1
+        self._skip_inline_ws()
+
+    def _scan_header(self):
+        array = self.text.startswith("[[", self._pos)
+        self._pos += 2 if array else 1
+        self._skip_inline_ws()
+        keys = self._scan_key()
+        self._skip_inline_ws()
+        closing = "]]" if array else "]"
+        if not self.text.startswith(closing, self._pos):
+            raise ValueError(f"unterminated table header at offset {self._pos}")
+        self._pos += len(closing)
+        return keys
+
+    def _scan_key(self):
+        parts = []
+        while True:
+            self._skip_inline_ws()
+            c = self._peek()
+            if c == '"':
+                start, end = self._scan_quoted('"')
+                parts.append(_decode_basic(self.text[start:end]))
+            elif c == "'":
+                start, end = self._scan_quoted("'")
+                parts.append(self.text[start:end])
+            else:
+                start = self._pos
+                while self._pos < len(self.text) and self.text[self._pos] in _BARE_KEY_CHARS:
+                    self._pos += 1
+                if self._pos == start:
+                    raise ValueError(f"expected key at offset {self._pos}")
+                parts.append(self.text[start:self._pos])
+            self._skip_inline_ws()
+            if self._peek() != ".":
+                return tuple(parts)
+            self._pos += 1
+
+    def _scan_quoted(self, quote):
+        """Scan a single-line string; returns the span of its contents."""
+        self._pos += 1
+        start = self._pos
+        while self._pos < len(self.text):
+            c = self.text[self._pos]
+            if c == "\\" and quote == '"':
+                self._pos += 2
+                continue
+            if c == quote:
+                end = self._pos
+                self._pos += 1
+                return start, end
+            if c == "\n":
+                break
+            self._pos += 1
+        raise ValueError(f"unterminated string at offset {start}")
+
+    def _scan_multiline(self, delim):
+        self._pos += 3
+        start = self._pos
+        while self._pos < len(self.text):
+            if self.text[self._pos] == "\\" and delim == '"""':
+                self._pos += 2
+                continue
+            if self.text.startswith(delim, self._pos):
+                # Up to two quotes may directly precede the closing delimiter
+                run = 3
+                while run < 5 and self._peek(run) == delim[0]:
+                    run += 1
+                end = self._pos + run - 3
+                self._pos += run
+                return start, end
+            self._pos += 1
+        raise ValueError(f"unterminated string at offset {start}")
+
+    def _scan_value(self, path):
+        c = self._peek()
+        if self.text.startswith('"""', self._pos) or self.text.startswith("'''", self._pos):
+            delim = self.text[self._pos:self._pos + 3]
+            start, end = self._scan_multiline(delim)
+            raw = self.text[start:end]
+            value = _decode_basic(raw) if delim == '"""' else raw
+            self._add(Entry(path, "string", value, start, end))
+        elif c in ('"', "'"):
+            start, end = self._scan_quoted(c)
+            raw = self.text[start:end]
+            value = _decode_basic(raw) if c == '"' else raw
+            self._add(Entry(path, "string", value, start, end))
+        elif c == "{":
+            start = self._pos
+            self._pos += 1
+            entry = Entry(path, "table", None, start, start)
+            self._add(entry)
+            while True:
+                self._skip_ws_comments()
+                if self._peek() == "}":
+                    self._pos += 1
+                    break
+                keys = self._scan_key()
+                self._expect("=")
+                self._scan_value(path + keys)
+                self._skip_ws_comments()
+                if self._peek() == ",":
+                    self._pos += 1
+                elif self._peek() != "}":
+                    raise ValueError(f"expected ',' or '}}' at offset {self._pos}")
+            entry.end = self._pos
+        elif c == "[":
+            start = self._pos
+            self._pos += 1
+            entry = Entry(path, "array", None, start, start)
+            self._add(entry)
+            index = 0
+            while True:
+                self._skip_ws_comments()
+                if self._peek() == "]":
+                    self._pos += 1
+                    break
+                self._scan_value(path + (index,))
+                index += 1
+                self._skip_ws_comments()
+                if self._peek() == ",":
+                    self._pos += 1
+                elif self._peek() != "]":
+                    raise ValueError(f"expected ',' or ']' at offset {self._pos}")
+            entry.end = self._pos
+        else:
+            start = self._pos
+            while self._pos < len(self.text) and self.text[self._pos] not in ",]}#\r\n":
+                self._pos += 1
+            raw = self.text[start:self._pos].rstrip()
+            if not raw:
+                raise ValueError(f"expected value at offset {start}")
+            value = {"true": True, "false": False}.get(raw, raw)
+            self._add(Entry(path, "scalar", value, start, start + len(raw)))
+
+    # --- queries ---------------------------------------------------------
+
+    def get(self, *path):
+        """Entry at an exact key path, or None."""
+        return self._by_path.get(path)
+
+    def value(self, *path):
+        """Decoded value at an exact key path, or None."""
+        entry = self.get(*path)
+        return entry.value if entry else None
+
+    def package_version(self):
+        """The [package] version entry, or None."""
+        entry = self.get("package", "version")
+        return entry if entry and entry.kind == "string" else None
+
+    def array_values(self, *path):
+        """String items of an array, e.g. workspace members."""
+        return [e.value for e in self.entries
+                if len(e.path) == len(path) + 1 and e.path[:-1] == path and e.kind == "string"]
+
+    def dependencies(self):
+        """All dependency declarations, in document order.
+
+        Covers [dependencies], [dev-dependencies], [build-dependencies],
+        [workspace.dependencies], target-specific tables and the
+        [dependencies.<name>] table form.
+        """
+        deps = {}
+        for entry in self.entries:
+            path = entry.path
+            for i in range(len(path) - 2, -1, -1):
+                if path[i] in DEP_TABLES and isinstance(path[i + 1], str):
+                    break
+            else:
+                continue
+            rest = path[i + 2:]
+            if len(rest) > 1:
+                continue
+            key = (path[:i + 1], path[i + 1])
+            dep = deps.get(key)
+            if dep is None:
+                dep = deps[key] = Dependency(path[i + 1], path[:i + 1])
+            if not rest and entry.kind == "string":
+                dep.version = entry
+            elif rest == ("version",) and entry.kind == "string":
+                dep.version = entry
+            elif rest == ("workspace",) and entry.value is True:
+                dep.workspace = True
+            elif rest == ("path",) and entry.kind == "string":
+                dep.path = entry.value
+        return list(deps.values())
+
+    def dependency_versions(self, prefix=""):
+        """Map of dependency name -> version requirement for names with prefix.
+
+        Only declarations carrying a version are included; the first one in
+        the document wins.
+        """
+        versions = {}
+        for dep in self.dependencies():
+            if dep.name.startswith(prefix) and dep.version and dep.name not in versions:
+                versions[dep.name] = dep.version.value
+        return versions
+
+    def find_dependency(self, name):
+        """All declarations of one dependency."""
+        return [dep for dep in self.dependencies() if dep.name == name]
+
+    # --- edits ------------------------------------------------------------
+
+    def with_strings_replaced(self, edits):
+        """Return the text with string entries replaced.
+
+        Args:
+            edits: Iterable of (Entry, new_value) pairs for string entries
+
+        Everything outside the replaced string contents is kept byte for byte.
+        """
+        text = self.text
+        for entry, new_value in sorted(edits, key=lambda e: e[0].start, reverse=True):
+            if entry.kind != "string":
+                raise ValueError(f"Can only replace string values, not {entry}")
+            literal = entry.start > 0 and self.text[entry.start - 1] == "'"
+            encoded = new_value if literal else _encode_basic(new_value)
+            text = text[:entry.start] + encoded + text[entry.end:]
+        return text
@@ -0,0 +1,160 @@
+"""
+Tracing - record subprocesses, manifest I/O and orchestration phases as spans.
+
+Enabled with the global `--trace FILE` flag. Spans are written as Chrome
+trace-event JSON (load it in chrome://tracing or Perfetto) and a per-kind
+summary is printed to stderr when the command exits. When tracing is off,
+span() hands back a shared no-op object, so instrumented code pays only a
+function call.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+_TRACER = None
+
+
+class _NullSpan:
+    """Span used when tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, cat, kind, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.kind = kind
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self.start
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add(self.name, self.cat, self.kind, self.start, duration, self.args)
+        return False
+
+    def set(self, **args):
+        """Attach extra arguments (e.g. exit code) to the span."""
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects complete ("X") trace events from any thread."""
+
+    def __init__(self):
+        self.events = []
+        self.origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def add(self, name, cat, kind, start_ns, duration_ns, args):
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start_ns - self.origin) / 1000.0,
+            "dur": duration_ns / 1000.0,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": dict(args, kind=kind),
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def write(self, path):
+        """Write collected events as Chrome trace-event JSON."""
+        with self._lock:
+            data = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    def summary(self):
+        """Rows of (category, kind, count, total_ms), busiest first."""
+        totals = {}
+        with self._lock:
+            for event in self.events:
+                key = (event["cat"], event["args"]["kind"])
+                count, total = totals.get(key, (0, 0.0))
+                totals[key] = (count + 1, total + event["dur"] / 1000.0)
+        rows = [(cat, kind, count, total) for (cat, kind), (count, total) in totals.items()]
+        rows.sort(key=lambda row: (-row[3], row[0], row[1]))
+        return rows
+
+
+def enable():
+    """Start recording spans for this process."""
+    global _TRACER
+    _TRACER = Tracer()
+    return _TRACER
+
+
+def disable():
+    """Stop recording spans."""
+    global _TRACER
+    _TRACER = None
+
+
+def enabled():
+    return _TRACER is not None
+
+
+def counts(cat):
+    """Number of recorded spans in a category (0 when tracing is off)."""
+    if _TRACER is None:
+        return 0
+    with _TRACER._lock:
+        return sum(1 for event in _TRACER.events if event["cat"] == cat)
+
+
+def span(name, cat, kind=None, **args):
+    """Context manager timing a span; a no-op when tracing is disabled.
+
+    Args:
+        name: Event name shown in the trace viewer
+        cat: Category ("subprocess", "read", "write", "phase")
+        kind: Grouping key for the summary table (defaults to name)
+    """
+    if _TRACER is None:
+        return _NULL_SPAN
+    return _Span(_TRACER, name, cat, kind or name, args)
+
+
+def command_kind(cmd):
+    """Summary key for a command: the program and its subcommand (e.g. `git tag`)."""
+    argv = cmd.split() if isinstance(cmd, str) else list(cmd)
+    words = [w for w in argv[:2] if not w.startswith("-")]
+    return " ".join(words) or "?"
+
+
+def finish(path, stream=None):
+    """Write the trace file and print the summary table."""
+    if _TRACER is None:
+        return
+    stream = stream or sys.stderr
+    _TRACER.write(path)
+    rows = _TRACER.summary()
+    print("", file=stream)
+    print(f"Trace written to {path}", file=stream)
+    print(f"{'Category':<12} {'Kind':<28} {'Count':>6} {'Total ms':>10}", file=stream)
+    print(f"{'-' * 12} {'-' * 28} {'-' * 6} {'-' * 10}", file=stream)
+    for cat, kind, count, total in rows:
+        print(f"{cat:<12} {kind[:28]:<28} {count:>6} {total:>10.1f}", file=stream)
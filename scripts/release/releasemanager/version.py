@@ -2,11 +2,8 @@
 Version management - get, set, and bump versions.
 """
 
-import json
-import os
-import re
-
 from . import common
+from . import semver
 
 
 def get_version(component):
@@ -17,41 +14,29 @@ def get_version(component):
 def set_crate_version(name, new_version):
     """Update version in a crate's Cargo.toml."""
     path = common.CRATES[name]
-    full_path = os.path.join(common.ROOT_DIR, path)
-
-    with open(full_path, 'r') as f:
-        content = f.read()
+    workspace = common.get_workspace()
+    doc = workspace.read_toml(path)
 
-    package_match = re.search(r'\[package\]', content)
-    if not package_match:
+    if ("package",) not in doc.tables:
         raise ValueError(f"Could not find [package] in {path}")
 
-    pre = content[:package_match.end()]
-    post = content[package_match.end():]
-
-    new_post = re.sub(r'(version\s*=\s*)"[^"]+"', f'\\g<1>"{new_version}"', post, count=1)
-
-    if post == new_post:
+    entry = doc.package_version()
+    if not entry:
         raise ValueError(f"Could not find valid 'version =' string to replace in {path} under [package]")
 
-    with open(full_path, 'w') as f:
-        f.write(pre + new_post)
+    workspace.write_text(path, doc.with_strings_replaced([(entry, new_version)]))
     print(f"Updated {name} to {new_version}")
 
 
 def set_json_version(name, new_version):
     """Update version in a package.json file."""
     config = common.TOOLS[name]
-    path = os.path.join(common.ROOT_DIR, config["version_file"])
-
-    with open(path, 'r') as f:
-        data = json.load(f)
+    path = config["version_file"]
+    workspace = common.get_workspace()
 
+    data = dict(workspace.read_json(path))
     data["version"] = new_version
-
-    with open(path, 'w') as f:
-        json.dump(data, f, indent=2)
-        f.write('\n')
+    workspace.write_json(path, data)
     print(f"Updated {name} to {new_version}")
 
 
@@ -83,17 +68,8 @@ def set_version(component, new_version):
 
 
 def bump_version(version, bump_type, preid=None):
-    """Calculate next version using semver CLI."""
-    common.check_semver_installed()
-
-    cmd = f"semver -i {bump_type} {version}"
-    if preid:
-        cmd += f" --preid {preid}"
-
-    new_version = common.run_command(cmd)
-    if not new_version:
-        raise ValueError("semver returned empty string")
-    return new_version
+    """Calculate next version (same rules as `semver -i <bump_type> --preid <preid>`)."""
+    return semver.inc(version, bump_type, preid)
 
 
 def update_component_version(component, part):
@@ -0,0 +1,102 @@
+"""
+Shared helpers for the release manager tests: git identity and fixture workspaces.
+
+The fixture is the synthetic workspace `bench.build_fixture` creates (local
+repositories with bare remotes under `remotes/`), kept small so a test
+class can build it once and copy it per test.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+RELEASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RELEASE_DIR not in sys.path:
+    sys.path.insert(0, RELEASE_DIR)
+
+from releasemanager import bench  # noqa: E402
+from releasemanager import common  # noqa: E402
+from releasemanager import trace  # noqa: E402
+
+GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "Release Test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Release Test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def git(repo, *args, stdin=None, check=True):
+    """Run git in a repository and return its stdout."""
+    result = subprocess.run(["git", "-C", repo] + list(args), input=stdin, capture_output=True, text=True,
+                            env=dict(os.environ, **GIT_IDENTITY))
+    if check and result.returncode != 0:
+        raise AssertionError(f"git {' '.join(args)} failed: {result.stderr}")
+    return result.stdout
+
+
+def release_manager(root, *argv, input=None, daemon=False):
+    """Run the fixture's release-manager in a subprocess; returns the CompletedProcess.
+
+    Commands run locally unless daemon is true, in which case read-only
+    ones are forwarded to a daemon listening for root.
+    """
+    script = os.path.join(root, "scripts", "release", "release-manager")
+    flags = [] if daemon else ["--no-daemon"]
+    return subprocess.run([sys.executable, script] + flags + list(argv), cwd=root, input=input,
+                          capture_output=True, text=True, env=dict(os.environ, **GIT_IDENTITY))
+
+
+def write(path, content, mtime=None):
+    """Write a file, optionally with a fixed mtime (seconds)."""
+    with open(path, 'w') as f:
+        f.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+class FixtureTestCase(unittest.TestCase):
+    """Builds one small fixture workspace per class; self.root is a fresh copy per test.
+
+    In-process tests run against self.root: the process-wide workspace and
+    registry are reset around every test.
+    """
+
+    fixture_args = {"crates": 1, "tags": 3, "commits": 2}
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.mkdtemp(prefix="release-test-")
+        cls._base = os.path.join(cls._tmp, "base")
+        bench.build_fixture(cls._base, **cls.fixture_args)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls._tmp, ignore_errors=True)
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="ws-", dir=self._tmp)
+        os.rmdir(self.root)
+        shutil.copytree(self._base, self.root, symlinks=True)
+        self._environ = dict(os.environ)
+        os.environ.update(GIT_IDENTITY)
+        self.use_root(self.root)
+
+    def tearDown(self):
+        trace.disable()
+        common.reset_workspace()
+        common.use_workspace(None)
+        os.environ.clear()
+        os.environ.update(self._environ)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def use_root(self, root):
+        """Make root the process-wide workspace (with its discovered registry)."""
+        common.use_workspace(common.Workspace(root))
+        common.load_registry(reload=True)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
@@ -0,0 +1,59 @@
+"""
+Benchmark budgets: every scenario, run once cold and warm on the small
+fixture, stays within its traced subprocess, read and write budgets.
+
+This is the CI gate for bench.BUDGETS; `release-manager bench` reports the
+same counts (plus timings) on a larger fixture.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import support
+
+from releasemanager import bench
+
+
+class BudgetTest(support.FixtureTestCase):
+
+    # Cold read budgets are stated for bench's default number of extra crates
+    fixture_args = dict(support.FixtureTestCase.fixture_args, crates=4)
+
+    def assert_within_budget(self, name):
+        scratch = tempfile.mkdtemp(prefix="bench-", dir=self._tmp)
+        try:
+            results = bench._bench_scenario(self.root, scratch, name, 1)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        self.assertEqual([r["mode"] for r in results], ["cold", "warm"])
+        for r in results:
+            counts = {cat: r[cat] for cat in ("subprocess", "read", "write", "rewrite")}
+            self.assertEqual(r["over_budget"], {}, f"{name} ({r['mode']}): {counts} > {r['budget']}")
+
+    def test_every_scenario_has_budgets(self):
+        for name in bench.SCENARIOS:
+            for mode in ("cold", "warm"):
+                self.assertIn((name, mode), bench.BUDGETS)
+
+    def test_check_status(self):
+        self.assert_within_budget("check-status")
+
+    def test_get_version(self):
+        self.assert_within_budget("get-version")
+
+    def test_plan(self):
+        self.assert_within_budget("release-all --plan")
+
+    def test_release_all(self):
+        self.assert_within_budget("release-all")
+
+    def test_push(self):
+        self.assert_within_budget("push")
+
+
+if __name__ == "__main__":
+    unittest.main()
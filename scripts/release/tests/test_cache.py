@@ -0,0 +1,123 @@
+"""
+Tests for the persistent status cache: entries are reused only while the
+manifest stat state or the repository's ref state is unchanged.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import os
+import unittest
+
+import support
+from support import git
+
+from releasemanager import cache
+from releasemanager import common
+from releasemanager import trace
+
+# Old enough to be outside the cache's racy window
+OLD = 1700000000
+
+
+class StatusCacheTest(support.FixtureTestCase):
+
+    def cached_workspace(self):
+        """Fresh workspace backed by the on-disk cache, as a new check-status run would use."""
+        workspace = common.Workspace(self.root)
+        workspace.enable_cache()
+        return workspace
+
+    def warm(self):
+        workspace = self.cached_workspace()
+        version = workspace.crate_version("lex-core")
+        workspace.tag_index(self.path("core"))
+        workspace.save_cache()
+        return version
+
+    def reads(self, compute):
+        trace.enable()
+        try:
+            value = compute()
+            return value, trace.counts("read"), trace.counts("subprocess")
+        finally:
+            trace.disable()
+
+    def set_core_version(self, version, mtime):
+        path = self.path("core", "Cargo.toml")
+        with open(path) as f:
+            content = f.read()
+        support.write(path, content.replace('version = "0.3.0"', f'version = "{version}"'), mtime)
+
+    def test_unchanged_manifest_is_served_from_cache(self):
+        self.assertEqual(self.warm(), "0.3.0")
+        version, reads, _ = self.reads(lambda: self.cached_workspace().crate_version("lex-core"))
+        self.assertEqual(version, "0.3.0")
+        self.assertEqual(reads, 0)
+
+    def test_mtime_change_invalidates(self):
+        self.warm()
+        # Same size, new contents and mtime
+        self.set_core_version("0.4.0", OLD + 10)
+        version, reads, _ = self.reads(lambda: self.cached_workspace().crate_version("lex-core"))
+        self.assertEqual(version, "0.4.0")
+        self.assertEqual(reads, 1)
+
+    def test_size_change_invalidates(self):
+        self.warm()
+        path = self.path("core", "Cargo.toml")
+        mtime = os.stat(path).st_mtime
+        # Same mtime, different size
+        self.set_core_version("0.10.0", mtime)
+        self.assertEqual(self.cached_workspace().crate_version("lex-core"), "0.10.0")
+
+    def test_racy_entries_are_not_persisted(self):
+        path = self.path("core", "Cargo.toml")
+        os.utime(path, None)
+        self.warm()
+        _, reads, _ = self.reads(lambda: self.cached_workspace().crate_version("lex-core"))
+        self.assertEqual(reads, 1)
+
+    def tags_of(self, repo):
+        workspace = self.cached_workspace()
+        index, _, spawns = self.reads(lambda: workspace.tag_index(self.path(repo)))
+        workspace.save_cache()
+        return index, spawns
+
+    def test_unchanged_refs_are_served_from_cache(self):
+        self.warm()
+        index, spawns = self.tags_of("core")
+        self.assertIn("v0.3.0", index)
+        self.assertEqual(spawns, 0)
+
+    def test_new_tag_invalidates(self):
+        self.warm()
+        git(self.path("core"), "tag", "v0.9.9")
+        index, spawns = self.tags_of("core")
+        self.assertIn("v0.9.9", index)
+        self.assertEqual(spawns, 1)
+
+    def test_new_commit_invalidates(self):
+        self.warm()
+        before = cache.ref_state(self.path("core"))
+        git(self.path("core"), "commit", "-q", "--allow-empty", "-m", "Move HEAD")
+        self.assertNotEqual(cache.ref_state(self.path("core")), before)
+        _, spawns = self.tags_of("core")
+        self.assertEqual(spawns, 1)
+
+    def test_deleted_tag_invalidates(self):
+        self.warm()
+        git(self.path("core"), "tag", "-d", "v0.3.0")
+        index, _ = self.tags_of("core")
+        self.assertNotIn("v0.3.0", index)
+
+    def test_check_status_reports_moved_version(self):
+        support.release_manager(self.root, "check-status")
+        self.set_core_version("0.4.0", OLD + 10)
+        result = support.release_manager(self.root, "check-status", "--format", "json")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('"version": "0.4.0"', result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Tests for releasemanager.clean: the porcelain v2 status parser on fixed
+`git status --porcelain=v2 --branch -z` output, the problems it reports,
+and `check_repo` on the fixture's repositories.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import os
+import unittest
+
+import support
+from support import git
+
+from releasemanager import clean
+
+OID = "70bac285394ca8f19941a3e1b7f1d1e121193136"
+BLOB = "587be6b4c3f93f93c489c0111bba5596147a26cb"
+SYNCED = [f"# branch.oid {OID}", "# branch.head main", "# branch.upstream origin/main", "# branch.ab +0 -0"]
+
+
+def porcelain(*records):
+    """NUL-terminated records, as `git status -z` prints them."""
+    return "".join(record + "\0" for record in records)
+
+
+class ParseStatusTest(unittest.TestCase):
+
+    def parse(self, *records):
+        return clean.parse_status(porcelain(*records))
+
+    def test_branch_headers(self):
+        cases = [
+            # (records, commit, branch, upstream, ahead, behind)
+            (SYNCED, OID, "main", "origin/main", 0, 0),
+            ([f"# branch.oid {OID}", "# branch.head main", "# branch.upstream origin/main", "# branch.ab +2 -3"],
+             OID, "main", "origin/main", 2, 3),
+            # No upstream configured: no upstream or ab header
+            ([f"# branch.oid {OID}", "# branch.head topic"], OID, "topic", None, None, None),
+            # Upstream deleted on the remote: upstream header without ab
+            ([f"# branch.oid {OID}", "# branch.head main", "# branch.upstream origin/gone"],
+             OID, "main", "origin/gone", None, None),
+            ([f"# branch.oid {OID}", "# branch.head (detached)"], OID, None, None, None, None),
+            (["# branch.oid (initial)", "# branch.head main"], None, "main", None, None, None),
+            ([f"# branch.oid {OID}", "# branch.head release/0.3", "# branch.upstream upstream/release/0.3",
+              "# branch.ab +0 -1"], OID, "release/0.3", "upstream/release/0.3", 0, 1),
+        ]
+        for records, commit, branch, upstream, ahead, behind in cases:
+            with self.subTest(records=records):
+                info = self.parse(*records)
+                self.assertEqual((info["commit"], info["branch"], info["upstream"], info["ahead"], info["behind"]),
+                                 (commit, branch, upstream, ahead, behind))
+                self.assertEqual((info["changed"], info["untracked"]), ([], []))
+
+    def test_entries(self):
+        cases = [
+            # (records after the headers, changed, untracked)
+            ([f"1 .M N... 100644 100644 100644 {BLOB} {BLOB} Cargo.toml"], ["Cargo.toml"], []),
+            ([f"1 A. N... 000000 100644 100644 {'0' * 40} {BLOB} src/new file.rs"], ["src/new file.rs"], []),
+            ([f"1 .D N... 100644 100644 000000 {BLOB} {BLOB} lex-babel/Cargo.toml"], ["lex-babel/Cargo.toml"], []),
+            ([f"2 R. N... 100644 100644 100644 {BLOB} {BLOB} R100 new.rs", "old.rs"], ["new.rs"], []),
+            # Rename with tabs and spaces in both paths: -z leaves them unquoted
+            ([f"2 R. N... 100644 100644 100644 {BLOB} {BLOB} R100 c\td e", "a\tb c"], ["c\td e"], []),
+            ([f"2 C. N... 100644 100644 100644 {BLOB} {BLOB} C075 copy.rs", "? orig.rs"], ["copy.rs"], []),
+            ([f"u UU N... 100644 100644 100644 100644 {BLOB} {BLOB} {BLOB} Cargo.lock"], ["Cargo.lock"], []),
+            (["? scratch.txt", "? dir with space/"], [], ["scratch.txt", "dir with space/"]),
+            ([f"1 .M S.M. 160000 160000 160000 {BLOB} {BLOB} vendor/lib"], ["vendor/lib"], []),
+            (["! target/"], [], []),
+        ]
+        for records, changed, untracked in cases:
+            with self.subTest(records=records):
+                info = self.parse(*SYNCED, *records)
+                self.assertEqual(info["changed"], changed)
+                self.assertEqual(info["untracked"], untracked)
+                self.assertEqual((info["branch"], info["ahead"], info["behind"]), ("main", 0, 0))
+
+    def test_mixed_records_keep_their_order(self):
+        info = self.parse(*SYNCED,
+                          f"1 M. N... 100644 100644 100644 {BLOB} {BLOB} b.rs",
+                          f"2 R. N... 100644 100644 100644 {BLOB} {BLOB} R100 c.rs", "a.rs",
+                          f"u AA N... 000000 100644 100644 100644 {BLOB} {BLOB} {BLOB} d.rs",
+                          "? e.rs")
+        self.assertEqual(info["changed"], ["b.rs", "c.rs", "d.rs"])
+        self.assertEqual(info["untracked"], ["e.rs"])
+
+    def test_empty_output(self):
+        info = clean.parse_status("")
+        self.assertEqual((info["branch"], info["changed"], info["untracked"]), (None, [], []))
+
+
+class ProblemsTest(unittest.TestCase):
+
+    def problems(self, *records):
+        return clean.problems(clean.parse_status(porcelain(*records)))
+
+    def test_clean_and_pushed(self):
+        self.assertEqual(self.problems(*SYNCED), [])
+
+    def test_reported_problems(self):
+        cases = [
+            ([*SYNCED, f"1 .M N... 100644 100644 100644 {BLOB} {BLOB} Cargo.toml"], ["Has uncommitted changes"]),
+            ([*SYNCED, "? notes.md"], ["Has untracked files"]),
+            ([f"# branch.oid {OID}", "# branch.head (detached)"], ["Not on any branch (detached HEAD)"]),
+            ([f"# branch.oid {OID}", "# branch.head topic"], ["Branch 'topic' has no upstream"]),
+            ([f"# branch.oid {OID}", "# branch.head main", "# branch.upstream origin/gone"],
+             ["Branch 'main' tracks origin/gone, which no longer exists"]),
+            ([f"# branch.oid {OID}", "# branch.head main", "# branch.upstream origin/main", "# branch.ab +1 -2"],
+             ["Branch 'main' is not in sync with remote (1 ahead, 2 behind)"]),
+        ]
+        for records, expected in cases:
+            with self.subTest(records=records):
+                self.assertEqual(self.problems(*records), expected)
+
+
+class CheckRepoTest(support.FixtureTestCase):
+
+    def test_synced_repository_is_clean(self):
+        record = clean.check_repo(self.root, "tools")
+        self.assertEqual(record["status"], "clean")
+        self.assertEqual((record["branch"], record["upstream"], record["ahead"], record["behind"]),
+                         ("main", "origin/main", 0, 0))
+
+    def test_unpushed_commit(self):
+        record = clean.check_repo(self.root, "core")
+        self.assertEqual(record["problems"], ["Branch 'main' is not in sync with remote (1 ahead, 0 behind)"])
+
+    def test_rename_with_a_tab_in_the_path(self):
+        repo = self.path("tools")
+        support.write(self.path("tools", "a\tb.txt"), "notes\n")
+        git(repo, "add", "a\tb.txt")
+        git(repo, "commit", "-q", "-m", "Add notes")
+        git(repo, "mv", "a\tb.txt", "c\td.txt")
+        support.write(self.path("tools", "new \"quoted\".txt"), "untracked\n")
+        record = clean.check_repo(self.root, "tools")
+        self.assertEqual(record["changed"], ["c\td.txt"])
+        self.assertEqual(record["untracked"], ['new "quoted".txt'])
+        self.assertEqual(record["ahead"], 1)
+
+    def test_deleted_upstream_and_detached_head(self):
+        git(self.path("remotes", "tools.git"), "branch", "-q", "-m", "main", "trunk")
+        git(self.path("tools"), "fetch", "-q", "--prune")
+        self.assertEqual(clean.check_repo(self.root, "tools")["problems"],
+                         ["Branch 'main' tracks origin/main, which no longer exists"])
+        git(self.path("tools"), "checkout", "-q", "--detach")
+        self.assertEqual(clean.check_repo(self.root, "tools")["problems"], ["Not on any branch (detached HEAD)"])
+
+    def test_missing_repository(self):
+        os.rename(self.path("comms"), self.path("comms.moved"))
+        self.assertEqual(clean.check_repo(self.root, "comms"), {"repo": "comms", "status": "missing", "problems": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
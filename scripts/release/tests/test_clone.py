@@ -0,0 +1,213 @@
+"""
+Tests for releasemanager.clone (`setup`) against the fixture's bare
+remotes through `--url file://.../{repo}.git`: concurrent clones, skipping
+existing repositories, `--reference` mirrors with `--refresh-reference`
+and `--dissociate`, and recursive submodule initialisation.
+
+Clones run through the CLI, whose git processes read GIT_CONFIG_GLOBAL from
+the test: it allows file:// submodules and can slow every clone down.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import os
+import shutil
+import time
+import unittest
+
+import support
+from support import git
+
+# The fixture's client repositories, removed so that setup clones them again
+CLONED = ["lexed", "vscode", "nvim"]
+KEPT = ["core", "tools", "editors", "comms"]
+
+
+class SetupTest(support.FixtureTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for repo in CLONED:
+            shutil.rmtree(self.path(repo))
+        self.url = f"file://{self.path('remotes')}/{{repo}}.git"
+        self.mirrors = self.path("mirrors")
+        self.global_config()
+
+    def global_config(self, pack_delay=None):
+        """Point git at a test global config allowing file:// submodules, optionally with slow clones."""
+        config = "[protocol \"file\"]\n\tallow = always\n"
+        if pack_delay:
+            # Every upload-pack waits before packing: a clone takes at least pack_delay seconds
+            hook = self.path("slow-pack")
+            support.write(hook, f"#!/bin/sh\nsleep {pack_delay}\nexec \"$@\"\n")
+            os.chmod(hook, 0o755)
+            config += f"[uploadpack]\n\tpackObjectsHook = {hook}\n"
+        support.write(self.path("gitconfig"), config)
+        os.environ["GIT_CONFIG_GLOBAL"] = self.path("gitconfig")
+
+    def setup(self, *args, code=0):
+        result = support.release_manager(self.root, "setup", "--url", self.url, *args)
+        self.assertEqual(result.returncode, code, result.stdout + result.stderr)
+        return result.stdout
+
+    def summary(self, output):
+        """Summary table rows: repo -> (result, mirror, submodules, seconds)."""
+        lines = output.splitlines()
+        start = lines.index(next(line for line in lines if line.startswith("Repository "))) + 2
+        rows = {}
+        for line in lines[start:]:
+            if not line.strip():
+                break
+            rows[line[:15].strip()] = (line[16:24].strip(), line[25:31].strip(), line[32:42].strip(),
+                                       float(line[43:]))
+        return rows
+
+    def remote_head(self, repo):
+        return git(self.path("remotes", f"{repo}.git"), "rev-parse", "main").strip()
+
+    def commit_to_remote(self, repo, message):
+        """Push a new commit to a fixture remote; returns its id."""
+        work = self.path("work", repo)
+        git(self.root, "clone", "-q", self.path("remotes", f"{repo}.git"), work)
+        git(work, "commit", "-q", "--allow-empty", "-m", message)
+        git(work, "push", "-q", "origin", "HEAD")
+        return git(work, "rev-parse", "HEAD").strip()
+
+    def alternates(self, repo):
+        path = self.path(repo, ".git", "objects", "info", "alternates")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [os.path.realpath(line.strip()) for line in f if line.strip()]
+
+    def test_clones_missing_repositories_and_skips_existing_ones(self):
+        head = git(self.path("core"), "rev-parse", "HEAD")
+        output = self.setup("--verbose")
+        rows = self.summary(output)
+        self.assertEqual({repo: row[0] for repo, row in rows.items()},
+                         dict([(repo, "skipped") for repo in KEPT] + [(repo, "cloned") for repo in CLONED]))
+        for repo in KEPT:
+            self.assertIn(f"Skipping {repo} (already exists)", output)
+        for repo in CLONED:
+            self.assertIn(f"Cloned {repo} (", output)
+            self.assertEqual(git(self.path(repo), "rev-parse", "HEAD").strip(), self.remote_head(repo))
+            self.assertEqual(git(self.path(repo), "remote", "get-url", "origin").strip(),
+                             self.url.format(repo=repo))
+        self.assertIn("Setup complete: 3 cloned, 4 skipped, 0 failed", output)
+        self.assertEqual(git(self.path("core"), "rev-parse", "HEAD"), head)
+
+        output = self.setup()
+        self.assertIn("Setup complete: 0 cloned, 7 skipped, 0 failed", output)
+        self.assertNotIn("Skipping", output)
+
+    def test_clones_run_concurrently(self):
+        self.global_config(pack_delay=1)
+        start = time.perf_counter()
+        rows = self.summary(self.setup())
+        elapsed = time.perf_counter() - start
+        for repo in CLONED:
+            self.assertGreaterEqual(rows[repo][3], 1.0)
+        # Three one-second clones at once, not one after another
+        self.assertLess(elapsed, 2.5)
+
+        for repo in CLONED:
+            shutil.rmtree(self.path(repo))
+        start = time.perf_counter()
+        self.setup("--jobs", "1")
+        self.assertGreaterEqual(time.perf_counter() - start, 3.0)
+
+    def test_reference_borrows_objects_from_mirrors(self):
+        for repo in ("lexed", "vscode"):
+            git(self.root, "clone", "-q", "--mirror", self.path("remotes", f"{repo}.git"),
+                os.path.join(self.mirrors, f"{repo}.git"))
+        rows = self.summary(self.setup("--reference", self.mirrors))
+        self.assertEqual({repo: rows[repo][:2] for repo in CLONED},
+                         {"lexed": ("cloned", "yes"), "vscode": ("cloned", "yes"), "nvim": ("cloned", "no")})
+        for repo in ("lexed", "vscode"):
+            self.assertEqual(self.alternates(repo),
+                             [os.path.realpath(os.path.join(self.mirrors, f"{repo}.git", "objects"))])
+        self.assertEqual(self.alternates("nvim"), [])
+        self.assertEqual(git(self.path("lexed"), "rev-parse", "HEAD").strip(), self.remote_head("lexed"))
+
+    def test_dissociate_leaves_no_link_to_the_mirror(self):
+        git(self.root, "clone", "-q", "--mirror", self.path("remotes", "lexed.git"),
+            os.path.join(self.mirrors, "lexed.git"))
+        rows = self.summary(self.setup("--reference", self.mirrors, "--dissociate"))
+        self.assertEqual(rows["lexed"][:2], ("cloned", "yes"))
+        self.assertEqual(self.alternates("lexed"), [])
+        shutil.rmtree(self.mirrors)
+        git(self.path("lexed"), "fsck", "--no-progress")
+        self.assertEqual(git(self.path("lexed"), "rev-parse", "HEAD").strip(), self.remote_head("lexed"))
+
+    def test_refresh_reference_creates_and_fetches_mirrors(self):
+        # lexed has a stale mirror; vscode and nvim have none
+        git(self.root, "clone", "-q", "--mirror", self.path("remotes", "lexed.git"),
+            os.path.join(self.mirrors, "lexed.git"))
+        latest = self.commit_to_remote("lexed", "Newer than the mirror")
+        rows = self.summary(self.setup("--reference", self.mirrors, "--refresh-reference"))
+        self.assertEqual({repo: rows[repo][:2] for repo in CLONED}, {repo: ("cloned", "yes") for repo in CLONED})
+        self.assertEqual(git(os.path.join(self.mirrors, "lexed.git"), "rev-parse", "main").strip(), latest)
+        for repo in CLONED:
+            self.assertTrue(os.path.isdir(os.path.join(self.mirrors, f"{repo}.git")))
+            self.assertEqual(git(self.path(repo), "rev-parse", "HEAD").strip(), self.remote_head(repo))
+
+    def test_submodules_are_initialised_recursively(self):
+        # lexed -> sub -> nested, each a bare repository next to the fixture remotes
+        libs = self.path("remotes", "libs")
+        for name in ("nested", "sub"):
+            git(self.root, "init", "-q", "--bare", "-b", "main", os.path.join(libs, f"{name}.git"))
+            work = self.path("work", name)
+            git(self.root, "clone", "-q", os.path.join(libs, f"{name}.git"), work)
+            support.write(os.path.join(work, "README.txt"), f"{name}\n")
+            git(work, "add", "README.txt")
+            if name == "sub":
+                git(work, "submodule", "add", "-q", os.path.join(libs, "nested.git"), "nested")
+            git(work, "commit", "-q", "-m", f"Add {name}")
+            git(work, "push", "-q", "origin", "HEAD:main")
+        work = self.path("work", "lexed")
+        git(self.root, "clone", "-q", self.path("remotes", "lexed.git"), work)
+        git(work, "submodule", "add", "-q", os.path.join(libs, "sub.git"), "sub")
+        git(work, "commit", "-q", "-m", "Add sub")
+        git(work, "push", "-q", "origin", "HEAD")
+
+        rows = self.summary(self.setup())
+        self.assertEqual(rows["lexed"][0::2], ("cloned", "ok"))
+        self.assertEqual(rows["vscode"][0::2], ("cloned", ""))
+        for path in (("sub", "README.txt"), ("sub", "nested", "README.txt")):
+            self.assertTrue(os.path.isfile(self.path("lexed", *path)), path)
+        status = git(self.path("lexed"), "submodule", "status", "--recursive").splitlines()
+        self.assertEqual([line.split()[1] for line in status], ["sub", "sub/nested"])
+        self.assertFalse([line for line in status if not line.startswith(" ")], status)
+
+        # An existing checkout with uninitialised submodules gets them on the next run
+        git(self.path("lexed"), "submodule", "deinit", "-q", "--all", "--force")
+        rows = self.summary(self.setup())
+        self.assertEqual(rows["lexed"][0::2], ("skipped", "ok"))
+        self.assertTrue(os.path.isfile(self.path("lexed", "sub", "nested", "README.txt")))
+
+    def test_failed_clone_is_reported(self):
+        shutil.rmtree(self.path("remotes", "vscode.git"))
+        output = self.setup(code=1)
+        self.assertEqual({repo: self.summary(output)[repo][0] for repo in CLONED},
+                         {"lexed": "cloned", "vscode": "failed", "nvim": "cloned"})
+        self.assertIn("Failed to clone vscode", output)
+        self.assertIn("[vscode] ", output)
+        self.assertIn("Setup complete: 2 cloned, 4 skipped, 1 failed", output)
+
+    def test_option_errors(self):
+        cases = [
+            (["--url", "/srv/git/lexed.git"], "--url must contain {repo}"),
+            (["--dissociate"], "need --reference DIR"),
+            (["--refresh-reference"], "need --reference DIR"),
+        ]
+        for args, message in cases:
+            with self.subTest(args=args):
+                result = support.release_manager(self.root, "setup", *args)
+                self.assertEqual(result.returncode, 1)
+                self.assertIn(message, result.stdout)
+        self.assertFalse(any(os.path.exists(self.path(repo)) for repo in CLONED))
+
+
+if __name__ == "__main__":
+    unittest.main()
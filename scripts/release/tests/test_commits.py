@@ -0,0 +1,115 @@
+"""
+Tests for release commits built with git plumbing: only the files the
+release wrote are committed, the tree is what `git add` of those files would
+give, and other work in the worktree and index is left alone.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import os
+import unittest
+
+import support
+from support import git
+
+from releasemanager import commits
+from releasemanager import common
+
+
+class ReleaseCommitTest(support.FixtureTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.repo = self.path("tools")
+        # Unrelated work in progress: an unstaged edit, a staged new file and untracked files
+        with open(self.path("tools", "HISTORY.txt"), 'a') as f:
+            f.write("local edit\n")
+        support.write(self.path("tools", "notes.md"), "staged notes\n")
+        git(self.repo, "add", "notes.md")
+        support.write(self.path("tools", "scratch.txt"), "untracked\n")
+        os.makedirs(self.path("tools", "target", "debug"))
+        support.write(self.path("tools", "target", "debug", "build.log"), "untracked\n")
+        self.unrelated = sorted(git(self.repo, "status", "--porcelain", "--untracked-files=all").splitlines())
+        self.head = git(self.repo, "rev-parse", "HEAD").strip()
+
+    def bump(self, rel_path, old, new):
+        """Stage a version edit through the workspace; returns the new contents."""
+        workspace = common.get_workspace()
+        content = workspace.read_text(rel_path).replace(f'version = "{old}"', f'version = "{new}"', 1)
+        workspace.write_text(rel_path, content)
+        return content
+
+    def tree_from_git_add(self, *files):
+        """Tree `git add` of files would give on top of the original HEAD (in a scratch index)."""
+        index = self.path("target", "scratch.index")
+        os.makedirs(os.path.dirname(index), exist_ok=True)
+        os.environ["GIT_INDEX_FILE"] = index
+        try:
+            git(self.repo, "read-tree", self.head)
+            git(self.repo, "add", "--", *files)
+            return git(self.repo, "write-tree").strip()
+        finally:
+            del os.environ["GIT_INDEX_FILE"]
+
+    def assert_release_commit(self, commit_id, files):
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD").strip(), commit_id)
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD~1").strip(), self.head)
+        changed = git(self.repo, "diff-tree", "--no-commit-id", "--name-only", "-r", "HEAD").splitlines()
+        self.assertEqual(sorted(changed), sorted(files))
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD^{tree}").strip(), self.tree_from_git_add(*files))
+        # Only the unrelated work is left; the committed files are clean
+        status = sorted(git(self.repo, "status", "--porcelain", "--untracked-files=all").splitlines())
+        self.assertEqual(status, self.unrelated)
+
+    def test_commits_only_the_files_the_release_wrote(self):
+        self.bump("tools/lex-babel/Cargo.toml", "0.3.0", "0.3.1")
+        self.bump("tools/Cargo.toml", "0.3.0", "0.3.1")
+        commit_id = commits.commit(self.repo, "chore: release lex-babel-v0.3.1")
+        self.assertEqual(git(self.repo, "log", "-1", "--format=%s"), "chore: release lex-babel-v0.3.1\n")
+        self.assert_release_commit(commit_id, ["Cargo.toml", "lex-babel/Cargo.toml"])
+        self.assertIn("A  notes.md", self.unrelated)
+
+    def test_transaction_commits_staged_contents_and_flushes_once(self):
+        manifest = self.path("tools", "lex-babel", "Cargo.toml")
+        with open(manifest) as f:
+            original = f.read()
+        with commits.release_transaction():
+            content = self.bump("tools/lex-babel/Cargo.toml", "0.3.0", "0.3.1")
+            commit_id = commits.commit(self.repo, "chore: release lex-babel-v0.3.1")
+            # Committed from memory; the worktree is only written when the block ends
+            with open(manifest) as f:
+                self.assertEqual(f.read(), original)
+            self.assertEqual(git(self.repo, "show", "HEAD:lex-babel/Cargo.toml"), content)
+        with open(manifest) as f:
+            self.assertEqual(f.read(), content)
+        self.assert_release_commit(commit_id, ["lex-babel/Cargo.toml"])
+
+    def test_second_commit_in_a_transaction_builds_on_the_first(self):
+        with commits.release_transaction():
+            self.bump("tools/lex-babel/Cargo.toml", "0.3.0", "0.3.1")
+            first = commits.commit(self.repo, "chore: release lex-babel-v0.3.1")
+            self.bump("tools/lex-config/Cargo.toml", "0.3.0", "0.3.1")
+            second = commits.commit(self.repo, "chore: release lex-config-v0.3.1")
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD~1").strip(), first)
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD").strip(), second)
+        self.assertEqual(git(self.repo, "diff-tree", "--no-commit-id", "--name-only", "-r", "HEAD").splitlines(),
+                         ["lex-config/Cargo.toml"])
+        status = sorted(git(self.repo, "status", "--porcelain", "--untracked-files=all").splitlines())
+        self.assertEqual(status, self.unrelated)
+
+    def test_unchanged_files_make_no_commit(self):
+        workspace = common.get_workspace()
+        workspace.write_text("tools/lex-babel/Cargo.toml", workspace.read_text("tools/lex-babel/Cargo.toml"))
+        self.assertIsNone(commits.commit(self.repo, "chore: nothing"))
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD").strip(), self.head)
+
+    def test_executable_bit_is_kept(self):
+        os.chmod(self.path("tools", "lex-babel", "Cargo.toml"), 0o755)
+        self.bump("tools/lex-babel/Cargo.toml", "0.3.0", "0.3.1")
+        commits.commit(self.repo, "chore: release lex-babel-v0.3.1")
+        self.assertTrue(git(self.repo, "ls-tree", "HEAD", "lex-babel/Cargo.toml").startswith("100755 "))
+
+
+if __name__ == "__main__":
+    unittest.main()
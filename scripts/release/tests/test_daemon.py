@@ -0,0 +1,117 @@
+"""
+Tests for the `serve` daemon: round trips over its Unix socket, refusal of
+commands that would change the workspace, and the local fallback when the
+socket is stale.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import unittest
+
+import support
+from support import git
+
+from releasemanager import daemon
+
+
+class DaemonTest(support.FixtureTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server = None
+
+    def tearDown(self):
+        # Before the fixture (and the socket in it) is removed
+        if self.server:
+            daemon.stop(daemon.socket_path(self.root))
+            try:
+                self.server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.server.kill()
+                self.server.wait()
+            self.server.stdout.close()
+            self.server.stderr.close()
+        super().tearDown()
+
+    def start_daemon(self):
+        """Run `serve` for the fixture root; returns its socket path once it listens."""
+        script = self.path("scripts", "release", "release-manager")
+        proc = self.server = subprocess.Popen([sys.executable, script, "serve", "--poll", "0.2"], cwd=self.root,
+                                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                              env=dict(os.environ, **support.GIT_IDENTITY))
+        path = daemon.socket_path(self.root)
+        # The banner is printed once the workspace is warm and the socket is bound
+        self.assertIn("Serving", proc.stdout.readline())
+        self.assertTrue(daemon.is_running(path))
+        return path
+
+    def test_round_trip(self):
+        path = self.start_daemon()
+        reply = daemon.request(["get-version", "lex-core"], path)
+        self.assertEqual(reply, {"exit": 0, "stdout": "0.3.0\n", "stderr": ""})
+
+    def test_answers_match_a_local_run(self):
+        path = self.start_daemon()
+        argv = ["check-status", "--format", "json"]
+        local = support.release_manager(self.root, *argv)
+        self.assertEqual(daemon.request(argv, path)["stdout"], local.stdout)
+        forwarded = support.release_manager(self.root, *argv, daemon=True)
+        self.assertEqual(forwarded.returncode, 0, forwarded.stderr)
+        self.assertEqual(forwarded.stdout, local.stdout)
+
+    def test_sees_changes_made_since_the_last_poll(self):
+        path = self.start_daemon()
+        manifest = self.path("core", "Cargo.toml")
+        with open(manifest) as f:
+            content = f.read()
+        support.write(manifest, content.replace('version = "0.3.0"', 'version = "0.3.7"'))
+        self.assertEqual(daemon.request(["get-version", "lex-core"], path)["stdout"], "0.3.7\n")
+
+    def test_refuses_mutating_commands(self):
+        path = self.start_daemon()
+        head = git(self.path("core"), "rev-parse", "HEAD")
+        with open(self.path("core", "Cargo.toml")) as f:
+            manifest = f.read()
+        for argv in (["release-all"], ["set-version", "lex-core", "9.9.9"], ["release", "lex-core", "patch"],
+                     ["--trace", self.path("trace.json"), "get-version", "lex-core"]):
+            reply = daemon.request(argv, path)
+            self.assertEqual(reply["exit"], 2, argv)
+            self.assertIn("read-only", reply["stderr"])
+            self.assertEqual(reply["stdout"], "")
+        self.assertEqual(git(self.path("core"), "rev-parse", "HEAD"), head)
+        with open(self.path("core", "Cargo.toml")) as f:
+            self.assertEqual(f.read(), manifest)
+        self.assertFalse(os.path.exists(self.path("trace.json")))
+        # Dry runs are still answered
+        self.assertEqual(daemon.request(["release-all", "--plan"], path)["exit"], 0)
+
+    def make_stale_socket(self):
+        """Leave a socket file behind with nobody listening, as a killed daemon would."""
+        path = daemon.socket_path(self.root)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(path)
+        self.assertTrue(os.path.exists(path))
+        return path
+
+    def test_stale_socket_falls_back_to_a_local_run(self):
+        path = self.make_stale_socket()
+        self.assertIsNone(daemon.request(["get-version", "lex-core"], path))
+        self.assertFalse(daemon.is_running(path))
+        result = support.release_manager(self.root, "get-version", "lex-core", daemon=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout, "0.3.0\n")
+
+    def test_serve_replaces_a_stale_socket(self):
+        self.make_stale_socket()
+        path = self.start_daemon()
+        self.assertEqual(daemon.request(["get-version", "lex-core"], path)["exit"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
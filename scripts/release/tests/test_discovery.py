@@ -0,0 +1,121 @@
+"""
+Tests for the registry lockfile: a current lockfile is reused after only
+stat calls, touched files are hashed once, and changed files, new files or
+new glob matches trigger a rescan.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import json
+import os
+import shutil
+import unittest
+
+import support
+
+from releasemanager import discovery
+from releasemanager import trace
+
+# Old enough to be outside the racy window
+OLD = 1700000000
+
+
+class LockfileTest(support.FixtureTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.lock_path = self.path(discovery.LOCK_PATH)
+
+    def load(self, refresh=False):
+        """Load the registry; returns (registry, traced reads)."""
+        trace.enable()
+        try:
+            registry = discovery.load(self.root, refresh=refresh)
+            return registry, trace.counts("read")
+        finally:
+            trace.disable()
+
+    def lock(self):
+        with open(self.lock_path) as f:
+            return json.load(f)
+
+    def existing_files(self):
+        return [path for path, fingerprint in self.lock()["files"].items() if fingerprint is not None]
+
+    def test_miss_scans_and_writes_the_lock(self):
+        os.unlink(self.lock_path)
+        registry, reads = self.load()
+        self.assertIn("lex-core", registry["crates"])
+        lock = self.lock()
+        self.assertEqual(lock["format"], discovery.LOCK_FORMAT)
+        self.assertEqual(lock["registry"], registry)
+        self.assertEqual(reads, len(self.existing_files()))
+        self.assertIsNone(lock["files"]["lexed/Cargo.toml"])
+        state, digest = lock["files"]["core/Cargo.toml"]
+        st = os.stat(self.path("core", "Cargo.toml"))
+        self.assertEqual(state, [st.st_mtime_ns, st.st_size])
+        self.assertEqual(len(digest), 40)
+
+    def test_hit_reads_nothing(self):
+        expected, _ = self.load(refresh=True)
+        registry, reads = self.load()
+        self.assertEqual(registry, expected)
+        self.assertEqual(reads, 0)
+
+    def test_refresh_ignores_the_lock(self):
+        _, reads = self.load(refresh=True)
+        self.assertEqual(reads, len(self.existing_files()))
+
+    def test_touched_file_is_hashed_once(self):
+        before = self.lock()
+        os.utime(self.path("core", "Cargo.toml"), (OLD + 5, OLD + 5))
+        registry, reads = self.load()
+        self.assertEqual(registry, before["registry"])
+        self.assertEqual(reads, 1)
+        # The lock now carries the new stat state, so the next check reads nothing
+        self.assertEqual(self.lock()["files"]["core/Cargo.toml"][0][0], (OLD + 5) * 10 ** 9)
+        self.assertEqual(self.load()[1], 0)
+
+    def test_changed_file_invalidates(self):
+        manifest = self.path("tools", "lex-config", "Cargo.toml")
+        with open(manifest) as f:
+            content = f.read()
+        support.write(manifest, content.replace('version = "0.3.0"', 'version = "0.3.0"\npublish = false'), OLD + 5)
+        registry, reads = self.load()
+        self.assertNotIn("lex-config", registry["crates"])
+        self.assertNotIn("lex-config", self.lock()["registry"]["crates"])
+        self.assertGreater(reads, 1)
+
+    def test_new_file_invalidates(self):
+        support.write(self.path("comms", "package.json"), '{"name": "comms", "version": "0.1.0"}\n', OLD + 5)
+        registry, _ = self.load()
+        self.assertEqual(registry["tools"]["comms"]["version_file"], "comms/package.json")
+
+    def test_new_glob_match_invalidates(self):
+        os.makedirs(self.path("comms", "lua", "comms"))
+        shutil.copy2(self.path("nvim", "lua", "lex", "init.lua"), self.path("comms", "lua", "comms", "init.lua"))
+        registry, _ = self.load()
+        self.assertEqual(registry["tools"]["comms"]["version_file"], "comms/lua/comms/init.lua")
+        self.assertEqual(self.lock()["globs"]["comms/lua/*/init.lua"], ["comms/lua/comms/init.lua"])
+
+    def test_racily_new_files_are_always_hashed(self):
+        # Written just now: a same-size edit within the timestamp granularity
+        # would keep (mtime, size), so the stat state is not trusted
+        manifest = self.path("core", "Cargo.toml")
+        with open(manifest) as f:
+            support.write(manifest, f.read())
+        self.load()
+        self.assertIsNone(self.lock()["files"]["core/Cargo.toml"][0])
+        self.assertEqual(self.load()[1], 1)
+
+    def test_old_format_lock_is_rebuilt(self):
+        lock = self.lock()
+        lock["format"] = discovery.LOCK_FORMAT - 1
+        support.write(self.lock_path, json.dumps(lock))
+        self.load()
+        self.assertEqual(self.lock()["format"], discovery.LOCK_FORMAT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Tests for releasemanager.fanout (`exec`): repository selection with
+--depends-on, --fail-fast cancellation, prefixed and buffered output, the
+exit code, and stdin with --jobs 1.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import contextlib
+import io
+import time
+import unittest
+
+import support
+
+from releasemanager import fanout
+
+# Prints the repository name three times, pausing so concurrent repositories interleave
+CHATTY = ["sh", "-c", 'for i in 1 2 3; do echo "${PWD##*/} $i"; sleep 0.05; done']
+
+
+class FanoutTest(support.FixtureTestCase):
+
+    def run_all(self, argv, **kwargs):
+        """fanout.run_all() in-process; returns (records, exit code, output)."""
+        output = io.StringIO()
+        code = 0
+        with contextlib.redirect_stdout(output):
+            try:
+                records = fanout.run_all(argv, **kwargs)
+            except SystemExit as e:
+                records, code = None, e.code
+        return records, code, output.getvalue()
+
+    def test_depends_on_selection(self):
+        cases = [
+            (["core"], ["tools", "editors", "lexed", "vscode", "nvim", "comms"]),
+            (["lex-lsp"], ["lexed", "vscode", "nvim"]),
+            # lex-cli lives next to lex-config; only its CLI clients are elsewhere
+            (["lex-config"], ["comms"]),
+            (["vscode"], []),
+            (["lex-lsp", "lex-config"], ["lexed", "vscode", "nvim", "comms"]),
+        ]
+        for depends_on, expected in cases:
+            with self.subTest(depends_on=depends_on):
+                self.assertEqual(fanout.select_repos(depends_on=depends_on), expected)
+        # Named repositories are added, and the result keeps repos.txt order
+        self.assertEqual(fanout.select_repos(repos=["nvim", "core"], depends_on=["lex-config"]),
+                         ["core", "nvim", "comms"])
+        self.assertEqual(fanout.select_repos(), ["core", "tools", "editors", "lexed", "vscode", "nvim", "comms"])
+
+    def test_unknown_names_are_refused(self):
+        for kwargs in ({"depends_on": ["nothing"]}, {"repos": ["nothing"]}):
+            with self.subTest(**kwargs):
+                with self.assertRaises(SystemExit) as raised, contextlib.redirect_stdout(io.StringIO()):
+                    fanout.select_repos(**kwargs)
+                self.assertEqual(raised.exception.code, 1)
+
+    def test_runs_only_in_selected_repositories(self):
+        records, code, _ = self.run_all(["pwd"], depends_on=["lex-lsp"])
+        self.assertEqual(code, 0)
+        self.assertEqual([r["repo"] for r in records], ["lexed", "vscode", "nvim"])
+        self.assertEqual({r["result"] for r in records}, {"ok"})
+
+    def test_fail_fast_kills_running_commands_and_skips_queued_ones(self):
+        # core fails once tools is running; the other five wait for a worker
+        argv = ["sh", "-c", 'if [ "${PWD##*/}" = core ]; then sleep 0.3; exit 3; fi; sleep 30']
+        start = time.perf_counter()
+        _, code, output = self.run_all(argv, jobs=2, fail_fast=True)
+        self.assertLess(time.perf_counter() - start, 10)
+        self.assertEqual(code, 1)
+        results = {line.split()[0]: line.split()[1] for line in output.splitlines()[-7:]}
+        self.assertEqual(results, {"core": "failed", "tools": "cancelled", "editors": "skipped",
+                                   "lexed": "skipped", "vscode": "skipped", "nvim": "skipped", "comms": "skipped"})
+
+    def test_without_fail_fast_every_repository_runs(self):
+        argv = ["sh", "-c", 'test "${PWD##*/}" != core']
+        _, code, output = self.run_all(argv, jobs=2)
+        self.assertEqual(code, 1)
+        results = [line.split()[:2] for line in output.splitlines()[-7:]]
+        self.assertEqual(results, [["core", "failed"]] + [[repo, "ok"] for repo in
+                                                           ["tools", "editors", "lexed", "vscode", "nvim", "comms"]])
+
+    def test_lines_are_prefixed_as_they_arrive(self):
+        _, code, output = self.run_all(CHATTY, repos=["core", "tools"])
+        self.assertEqual(code, 0)
+        lines = [line for line in output.splitlines() if line.startswith("[")]
+        self.assertEqual(sorted(lines), ["[core]  core 1", "[core]  core 2", "[core]  core 3",
+                                         "[tools] tools 1", "[tools] tools 2", "[tools] tools 3"])
+        # Each repository's lines keep their order
+        for repo in ("core", "tools"):
+            self.assertEqual([line for line in lines if line.startswith(f"[{repo}]")],
+                             [f"[{repo}]{' ' * (5 - len(repo))} {repo} {i}" for i in (1, 2, 3)])
+
+    def test_buffered_output_is_one_block_per_repository(self):
+        _, code, output = self.run_all(CHATTY, repos=["core", "tools"], buffer=True)
+        self.assertEqual(code, 0)
+        self.assertNotIn("[core]", output)
+        lines = output.splitlines()
+        for repo in ("core", "tools"):
+            header = next(i for i, line in enumerate(lines) if line.startswith(f"{repo}/ - exit 0 in "))
+            self.assertEqual(lines[header - 1], "=" * 40)
+            self.assertEqual(lines[header + 1:header + 5], ["=" * 40, f"{repo} 1", f"{repo} 2", f"{repo} 3"])
+
+    def test_stderr_is_merged_and_start_failures_are_reported(self):
+        _, code, output = self.run_all(["sh", "-c", "echo oops >&2; exit 2"], repos=["core"])
+        self.assertEqual(code, 1)
+        self.assertIn("[core] oops", output)
+        _, code, output = self.run_all(["no-such-program-here"], repos=["core"])
+        self.assertEqual(code, 1)
+        self.assertIn("no-such-program-here", output)
+
+    def test_exit_code(self):
+        for argv, expected in ((["true"], 0), (["false"], 1)):
+            with self.subTest(argv=argv):
+                result = support.release_manager(self.root, "exec", "--", *argv)
+                self.assertEqual(result.returncode, expected, result.stdout + result.stderr)
+        result = support.release_manager(self.root, "exec", "--repo", "core", "--shell", "--", "exit 7")
+        self.assertEqual(result.returncode, 1)
+        self.assertRegex(result.stdout, r"core\s+failed\s+7")
+
+    def test_stdin_is_passed_through_only_with_one_job(self):
+        result = support.release_manager(self.root, "exec", "--jobs", "1", "--repo", "core", "--", "cat",
+                                         input="typed answer\n")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("[core] typed answer", result.stdout)
+        result = support.release_manager(self.root, "exec", "--repo", "core", "--", "cat", input="typed answer\n")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertNotIn("typed answer", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Tests for releasemanager.graph: reverse-dependency closures and the
+`impact` query from changed paths to a release order.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import itertools
+import unittest
+
+import support
+
+from releasemanager import graph
+
+# The built-in crate graph plus the LSP clients
+LEX_DEPS = {
+    "lex-core": [],
+    "lex-babel": ["lex-core"],
+    "lex-cli": ["lex-core", "lex-babel", "lex-config"],
+    "lex-config": ["lex-core"],
+    "lex-analysis": ["lex-core", "lex-babel"],
+    "lex-lsp": ["lex-core", "lex-babel", "lex-analysis"],
+    "lexed": ["lex-lsp"],
+    "vscode": ["lex-lsp"],
+    "nvim": ["lex-lsp"],
+}
+LEX_ORDER = list(LEX_DEPS)
+CLIENTS = ["lexed", "vscode", "nvim"]
+
+
+class ClosureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = graph.DependencyGraph(LEX_DEPS, order=LEX_ORDER)
+
+    def test_dependents_are_the_reverse_edges(self):
+        self.assertEqual(set(self.graph.dependents("lex-babel")), {"lex-cli", "lex-analysis", "lex-lsp"})
+        self.assertEqual(self.graph.dependents("nvim"), ())
+
+    def test_descendants(self):
+        self.assertEqual(self.graph.descendants("lex-core"), frozenset(LEX_ORDER) - {"lex-core"})
+        self.assertEqual(self.graph.descendants("lex-config"), {"lex-cli"})
+        self.assertEqual(self.graph.descendants("lex-analysis"), {"lex-lsp", *CLIENTS})
+        self.assertEqual(self.graph.descendants("vscode"), frozenset())
+
+    def test_ancestors(self):
+        self.assertEqual(self.graph.ancestors("nvim"), {"lex-lsp", "lex-analysis", "lex-babel", "lex-core"})
+        self.assertEqual(self.graph.ancestors("lex-core"), frozenset())
+
+    def test_impacted_in_release_order(self):
+        self.assertEqual(self.graph.impacted(["lex-babel"]),
+                         ["lex-babel", "lex-cli", "lex-analysis", "lex-lsp", *CLIENTS])
+        self.assertEqual(self.graph.impacted(["lex-config"]), ["lex-config", "lex-cli"])
+        self.assertEqual(self.graph.impacted(["nvim", "lex-config"]), ["lex-config", "lex-cli", "nvim"])
+        self.assertEqual(self.graph.impacted([]), [])
+
+    def test_unknown_nodes_are_ignored(self):
+        self.assertEqual(self.graph.impacted(["comms", "lex-config"]), ["lex-config", "lex-cli"])
+
+    def test_impacted_is_the_descendant_closure(self):
+        for size in (1, 2, 3):
+            for changed in itertools.combinations(LEX_ORDER, size):
+                expected = set(changed).union(*(self.graph.descendants(node) for node in changed))
+                impacted = self.graph.impacted(changed)
+                self.assertEqual(set(impacted), expected, changed)
+                self.assertEqual(impacted, self.graph.sort(expected))
+
+    def test_diamond_is_visited_once(self):
+        diamond = graph.DependencyGraph({"top": ["left", "right"], "left": ["base"], "right": ["base"]})
+        self.assertEqual(diamond.impacted(["base"]), ["base", "left", "right", "top"])
+        self.assertEqual(diamond.descendants("base"), {"left", "right", "top"})
+        self.assertEqual(diamond.ancestors("top"), {"left", "right", "base"})
+
+    def test_cycle_is_rejected(self):
+        with self.assertRaises(ValueError):
+            graph.DependencyGraph({"a": ["b"], "b": ["a"]})
+
+
+class ImpactTest(support.FixtureTestCase):
+
+    def impact(self, *paths):
+        return graph.impact(list(paths), cwd=self.root)
+
+    def test_crate_change_impacts_its_dependents(self):
+        result = self.impact("tools/lex-config/src/lib.rs")
+        self.assertEqual(result["changed"], ["lex-config"])
+        self.assertEqual(result["impacted"], ["lex-config", "lex-cli"])
+        self.assertEqual(result["levels"], [["lex-config"], ["lex-cli"]])
+        self.assertEqual(result["unmatched"], [])
+
+    def test_core_change_releases_everything(self):
+        result = self.impact("core/src/lib.rs")
+        self.assertEqual(result["changed"], ["lex-core"])
+        self.assertEqual(set(result["impacted"]), set(graph.current().order))
+        self.assertEqual([node for level in result["levels"] for node in level], result["impacted"])
+
+    def test_repository_files_belong_to_every_component_in_it(self):
+        result = self.impact("editors/Cargo.lock")
+        self.assertEqual(result["changed"], ["lex-analysis", "lex-lsp"])
+        self.assertEqual(result["impacted"], ["lex-analysis", "lex-lsp", *CLIENTS])
+
+    def test_client_change_impacts_only_itself(self):
+        self.assertEqual(self.impact("vscode/src/extension.ts")["impacted"], ["vscode"])
+
+    def test_unmatched_paths(self):
+        result = self.impact("README.md", "../elsewhere/file", "core/src/lib.rs")
+        self.assertEqual(result["unmatched"], ["README.md", "../elsewhere/file"])
+        self.assertEqual(result["changed"], ["lex-core"])
+
+    def test_paths_relative_to_cwd(self):
+        result = graph.impact(["src/lib.rs"], cwd=self.path("tools", "lex-babel"))
+        self.assertEqual(result["changed"], ["lex-babel"])
+
+
+if __name__ == "__main__":
+    unittest.main()
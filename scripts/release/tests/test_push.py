@@ -0,0 +1,151 @@
+"""
+Tests for `push` against the fixture's local bare remotes: atomic pushes of
+branch and tags, rejected pushes, retries with backoff and dry runs.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import time
+import types
+import unittest
+
+import support
+from support import git
+
+from releasemanager import common
+from releasemanager import journal
+from releasemanager import push
+
+
+class PushTest(support.FixtureTestCase):
+
+    def setUp(self):
+        super().setUp()
+        result = support.release_manager(self.root, "release-all")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.state = journal.last_run(self.root)
+        self.core = self.path("core")
+        self.core_tag = self.state.tags["lex-core"]
+
+    def remote(self, repo):
+        return self.path("remotes", f"{repo}.git")
+
+    def remote_refs(self, repo):
+        return git(self.remote(repo), "for-each-ref", "--format=%(refname) %(objectname)")
+
+    def run_push(self, **kwargs):
+        """push.push() in-process; returns (results, exit code, output)."""
+        output = io.StringIO()
+        code = 0
+        with contextlib.redirect_stdout(output):
+            try:
+                results = push.push(**kwargs)
+            except SystemExit as e:
+                results, code = None, e.code
+        return results, code, output.getvalue()
+
+    def push_repo(self, sleep, **kwargs):
+        """push.push_repo() for core with the backoff waits sent to sleep."""
+        real_time = push.time
+        push.time = types.SimpleNamespace(sleep=sleep, perf_counter=time.perf_counter)
+        try:
+            return push.push_repo(self.core, [self.core_tag], **kwargs)
+        finally:
+            push.time = real_time
+
+    def test_pushes_branch_and_tags_of_every_released_repo(self):
+        result = support.release_manager(self.root, "push")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        for repo in push.targets(self.state):
+            name = os.path.basename(repo)
+            self.assertEqual(git(self.remote(name), "rev-parse", "main"), git(repo, "rev-parse", "HEAD"))
+        for comp, tag in self.state.tags.items():
+            repo = os.path.basename(common.get_repo_details(comp)[0])
+            self.assertEqual(git(self.remote(repo), "rev-parse", f"refs/tags/{tag}"),
+                             git(self.path(repo), "rev-parse", f"refs/tags/{tag}"))
+        # A second push finds everything there already
+        results, code, _ = self.run_push()
+        self.assertEqual(code, 0)
+        self.assertEqual({r["result"] for r in results}, {"up to date"})
+
+    def test_push_is_atomic(self):
+        # The remote already has the release tag at another commit: the tag is
+        # rejected, so the branch must not move either
+        before = git(self.remote("core"), "rev-parse", "main").strip()
+        git(self.remote("core"), "tag", self.core_tag, before)
+        refs = self.remote_refs("core")
+        result = push.push_repo(self.core, [self.core_tag], retries=0)
+        self.assertEqual(result["result"], "rejected")
+        self.assertEqual(self.remote_refs("core"), refs)
+
+    def test_rejected_push_is_not_retried(self):
+        # Someone else pushed to main in the meantime
+        other = self.path("other-clone")
+        git(self.root, "clone", "-q", self.remote("core"), other)
+        git(other, "commit", "-q", "--allow-empty", "-m", "Concurrent change")
+        git(other, "push", "-q", "origin", "HEAD")
+        refs = self.remote_refs("core")
+
+        delays = []
+        result = self.push_repo(delays.append, retries=2)
+        self.assertEqual(result["result"], "rejected")
+        self.assertEqual(result["attempts"], 1)
+        self.assertEqual(delays, [])
+        self.assertIn("main", result["error"])
+        self.assertEqual(self.remote_refs("core"), refs)
+
+        results, code, output = self.run_push()
+        self.assertEqual(code, 1)
+        self.assertIn("rejected", output)
+
+    def test_transient_failure_is_retried_with_backoff(self):
+        remote = self.remote("core")
+        away = remote + ".away"
+        os.rename(remote, away)
+        delays = []
+
+        def sleep(seconds):
+            # The remote comes back while the first retry waits
+            delays.append(seconds)
+            if os.path.exists(away):
+                os.rename(away, remote)
+
+        result = self.push_repo(sleep, retries=2)
+        self.assertEqual(result["result"], "pushed")
+        self.assertEqual(result["attempts"], 2)
+        self.assertEqual(delays, [push.RETRY_DELAY])
+        self.assertEqual(git(remote, "rev-parse", "main"), git(self.core, "rev-parse", "HEAD"))
+
+    def test_persistent_failure_backs_off_and_gives_up(self):
+        shutil.rmtree(self.remote("core"))
+        delays = []
+        result = self.push_repo(delays.append, retries=2)
+        self.assertEqual(result["result"], "failed")
+        self.assertEqual(result["attempts"], 3)
+        self.assertEqual(delays, [push.RETRY_DELAY, push.RETRY_DELAY * 2])
+        self.assertTrue(result["error"])
+
+    def test_dry_run_changes_nothing(self):
+        before = {os.path.basename(repo): self.remote_refs(os.path.basename(repo))
+                  for repo in push.targets(self.state)}
+        result = support.release_manager(self.root, "push", "--dry-run")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("would push", result.stdout)
+        for repo, refs in before.items():
+            self.assertEqual(self.remote_refs(repo), refs)
+
+    def test_unfinished_run_is_not_pushed(self):
+        with open(journal.path(self.root), 'a') as f:
+            f.write('{"run": "later", "event": "start", "command": "release-all"}\n')
+        _, code, output = self.run_push()
+        self.assertEqual(code, 1)
+        self.assertIn("did not finish", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Tests for `release-all --resume`: a run killed at various points and then
+resumed ends with the same commits, tags and manifests as a run that was
+never interrupted.
+
+The run is killed with os._exit (no cleanup, like SIGKILL) right after a
+given journal record, or instead of the end of the release transaction
+where tags are written and manifests flushed. Commit dates are pinned, so
+identical releases have identical commit ids.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+
+import support
+from support import git
+
+from releasemanager import bench
+from releasemanager import journal
+
+# Runs release-manager in-process in the fixture root, dying at RELEASE_TEST_KILL:
+# "finish" (before tags and flush) or "<event>:<component>" (after that record)
+DRIVER = """
+import os, sys
+sys.path.insert(0, os.path.join(os.getcwd(), "scripts", "release"))
+from releasemanager import cli, commits, journal
+
+kill_event, _, kill_component = os.environ["RELEASE_TEST_KILL"].partition(":")
+if kill_event == "finish":
+    commits._finish = lambda pending: os._exit(9)
+else:
+    record = journal.record
+
+    def record_then_die(event, **fields):
+        record(event, **fields)
+        if event == kill_event and fields.get("component") == kill_component:
+            os._exit(9)
+
+    journal.record = record_then_die
+cli.main(sys.argv[1:])
+"""
+
+FIXED_DATES = {
+    "GIT_AUTHOR_DATE": "2024-01-01T00:00:00Z",
+    "GIT_COMMITTER_DATE": "2024-01-01T00:00:00Z",
+}
+
+
+def snapshot(root):
+    """HEAD, tags and worktree status of every fixture repository."""
+    state = {}
+    for repo in bench.FIXTURE_REPOS:
+        path = os.path.join(root, repo)
+        state[repo] = {
+            "head": git(path, "rev-parse", "HEAD").strip(),
+            "tags": git(path, "for-each-ref", "--format=%(refname:short) %(objectname)", "refs/tags").splitlines(),
+            "status": git(path, "status", "--porcelain").splitlines(),
+        }
+    return state
+
+
+class ResumeTest(support.FixtureTestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.environ.update(FIXED_DATES)
+
+    def expected(self):
+        """Snapshot of an uninterrupted release-all on a copy of the fixture."""
+        reference = self.root + "-reference"
+        shutil.copytree(self.root, reference, symlinks=True)
+        self.addCleanup(shutil.rmtree, reference, True)
+        result = support.release_manager(reference, "release-all")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        expected = snapshot(reference)
+        self.assertEqual([repo for repo, state in expected.items() if state["status"]], [])
+        return expected
+
+    def kill(self, at):
+        result = subprocess.run([sys.executable, "-c", DRIVER, "--no-daemon", "release-all"], cwd=self.root,
+                                capture_output=True, text=True, env=dict(os.environ, RELEASE_TEST_KILL=at))
+        self.assertEqual(result.returncode, 9, result.stdout + result.stderr)
+        state = journal.last_run(self.root)
+        self.assertFalse(state.finished)
+        return state
+
+    def resume(self):
+        result = support.release_manager(self.root, "release-all", "--resume")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        return result.stdout
+
+    def test_killed_before_tags_and_flush(self):
+        expected = self.expected()
+        state = self.kill("finish")
+        # Every release is committed and journalled as tagged...
+        self.assertEqual(set(state.tags), set(state.commits))
+        self.assertIn("lex-core", state.commits)
+        # ...but no tag was written and the index and worktree still have the old manifests
+        self.assertEqual(git(self.path("core"), "tag", "-l", state.tags["lex-core"]), "")
+        self.assertEqual(git(self.path("core"), "rev-parse", "HEAD").strip(), state.commits["lex-core"])
+        self.assertIn("M  Cargo.toml", git(self.path("core"), "status", "--porcelain").splitlines())
+
+        output = self.resume()
+        self.assertIn("Restoring core/Cargo.toml from its release commit", output)
+        self.assertIn(f"[lex-core] Restoring tag {state.tags['lex-core']}", output)
+        self.assertEqual(snapshot(self.root), expected)
+
+    def test_killed_between_commit_and_tag(self):
+        expected = self.expected()
+        state = self.kill("commit:lex-babel")
+        self.assertTrue(state.pending("lex-babel"))
+        self.assertNotIn("lex-babel", state.tags)
+        self.assertIn("lex-core", state.released)
+
+        output = self.resume()
+        self.assertIn("lex-babel", output.split("in progress (")[1].split(")")[0])
+        self.assertIn("[lex-babel] Resuming release of", output)
+        self.assertEqual(snapshot(self.root), expected)
+
+    def test_killed_between_bump_and_commit(self):
+        expected = self.expected()
+        state = self.kill("bump:lex-config")
+        self.assertTrue(state.pending("lex-config"))
+        self.assertNotIn("lex-config", state.commits)
+
+        output = self.resume()
+        # The staged bump never reached disk, so the release starts over
+        self.assertIn("[lex-config] Bump", output)
+        self.assertIn("was not written; starting over.", output)
+        self.assertEqual(snapshot(self.root), expected)
+
+    def test_torn_journal_line_is_ignored(self):
+        expected = self.expected()
+        self.kill("tag:lex-analysis")
+        with open(journal.path(self.root), 'a') as f:
+            f.write('{"run": "cut", "event": "rel')
+        self.resume()
+        self.assertEqual(snapshot(self.root), expected)
+
+    def test_resume_twice_is_a_no_op(self):
+        self.kill("finish")
+        self.resume()
+        done = snapshot(self.root)
+        self.assertTrue(journal.last_run(self.root).finished)
+        self.assertIn("nothing to resume", self.resume())
+        self.assertEqual(snapshot(self.root), done)
+
+    def test_journal_disagreeing_with_repositories_is_refused(self):
+        state = self.kill("finish")
+        # Someone moved the branch back past the release commit
+        git(self.path("core"), "reset", "-q", "--hard", f"{state.commits['lex-core']}~1")
+        result = support.release_manager(self.root, "release-all", "--resume")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("does not match the repositories", result.stdout)
+        self.assertIn("is not on the current branch", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Tests for releasemanager.scheduler: topological levels and the grouped runner.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from releasemanager import scheduler  # noqa: E402
+
+# The built-in crate graph plus the LSP clients
+LEX_DEPS = {
+    "lex-core": [],
+    "lex-babel": ["lex-core"],
+    "lex-cli": ["lex-core", "lex-babel", "lex-config"],
+    "lex-config": ["lex-core"],
+    "lex-analysis": ["lex-core", "lex-babel"],
+    "lex-lsp": ["lex-core", "lex-babel", "lex-analysis"],
+    "lexed": ["lex-lsp"],
+    "vscode": ["lex-lsp"],
+    "nvim": ["lex-lsp"],
+}
+
+
+class TopologicalLevelsTest(unittest.TestCase):
+
+    def test_lex_graph(self):
+        order = ["lex-core", "lex-babel", "lex-config", "lex-cli", "lex-analysis", "lex-lsp",
+                 "lexed", "vscode", "nvim"]
+        self.assertEqual(scheduler.topological_levels(LEX_DEPS, order), [
+            ["lex-core"],
+            ["lex-babel", "lex-config"],
+            ["lex-cli", "lex-analysis"],
+            ["lex-lsp"],
+            ["lexed", "vscode", "nvim"],
+        ])
+
+    def test_every_node_after_its_dependencies(self):
+        levels = scheduler.topological_levels(LEX_DEPS)
+        level_of = {node: i for i, level in enumerate(levels) for node in level}
+        self.assertEqual(set(level_of), set(LEX_DEPS))
+        for node, sources in LEX_DEPS.items():
+            for source in sources:
+                self.assertLess(level_of[source], level_of[node])
+
+    def test_order_sorts_within_a_level(self):
+        deps = {"a": [], "b": [], "c": []}
+        self.assertEqual(scheduler.topological_levels(deps, ["c", "a"]), [["c", "a", "b"]])
+
+    def test_sources_missing_from_the_mapping_are_roots(self):
+        self.assertEqual(scheduler.topological_levels({"b": ["a"]}), [["a"], ["b"]])
+
+    def test_empty_graph(self):
+        self.assertEqual(scheduler.topological_levels({}), [])
+
+    def test_cycle_is_rejected(self):
+        with self.assertRaises(ValueError) as ctx:
+            scheduler.topological_levels({"n1": ["n3"], "n2": ["n1"], "n3": ["n2"], "free": []})
+        message = str(ctx.exception)
+        self.assertIn("cycle", message)
+        self.assertEqual(sorted(message.split(": ")[1].split(", ")), ["n1", "n2", "n3"])
+
+    def test_self_dependency_is_a_cycle(self):
+        with self.assertRaises(ValueError):
+            scheduler.topological_levels({"a": ["a"]})
+
+
+class RunGroupedTest(unittest.TestCase):
+
+    def test_results_in_item_order(self):
+        result = scheduler.run_grouped([3, 1, 2], lambda item: item % 2, lambda item: item * 10)
+        self.assertEqual(list(result.items()), [(3, 30), (1, 10), (2, 20)])
+
+    def test_same_group_runs_sequentially_in_order(self):
+        seen, active, lock = [], set(), threading.Lock()
+
+        def step(item):
+            group = item[0]
+            with lock:
+                self.assertNotIn(group, active)
+                active.add(group)
+                seen.append(item)
+            with lock:
+                active.discard(group)
+            return item
+
+        items = ["a1", "b1", "a2", "b2", "a3"]
+        scheduler.run_grouped(items, lambda item: item[0], step, jobs=2)
+        self.assertEqual([i for i in seen if i[0] == "a"], ["a1", "a2", "a3"])
+        self.assertEqual([i for i in seen if i[0] == "b"], ["b1", "b2"])
+
+    def test_groups_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        # Deadlocks (and times out) unless both groups run at once
+        scheduler.run_grouped(["a", "b"], lambda item: item, lambda item: barrier.wait())
+
+    def test_errors_reraised_after_all_groups_finish(self):
+        finished = []
+
+        def step(item):
+            if item == "a":
+                raise SystemExit(3)
+            finished.append(item)
+
+        with self.assertRaises(SystemExit):
+            scheduler.run_grouped(["a", "b", "c"], lambda item: item, step)
+        self.assertEqual(sorted(finished), ["b", "c"])
+
+    def test_on_result_called_per_item(self):
+        calls = []
+        scheduler.run_grouped([1, 2], lambda item: item, lambda item: -item,
+                              on_result=lambda item, result: calls.append((item, result)))
+        self.assertEqual(sorted(calls), [(1, -1), (2, -2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+"""
+Conformance tests for releasemanager.semver against node-semver behaviour.
+
+The vectors are taken from node-semver's own fixtures (increments,
+comparisons and invalid versions) for the calls the release flow makes.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from releasemanager import semver  # noqa: E402
+
+# (version, release, identifier, identifier_base, expected)
+INCREMENTS = [
+    ("1.2.3", "major", None, 0, "2.0.0"),
+    ("1.2.3", "minor", None, 0, "1.3.0"),
+    ("1.2.3", "patch", None, 0, "1.2.4"),
+    ("v1.2.3", "patch", None, 0, "1.2.4"),
+    ("1.2.3+build.7", "patch", None, 0, "1.2.4"),
+    ("1.2.3-tag", "major", None, 0, "2.0.0"),
+    ("1.2.0-0", "patch", None, 0, "1.2.0"),
+    ("1.2.3-4", "major", None, 0, "2.0.0"),
+    ("1.2.3-4", "minor", None, 0, "1.3.0"),
+    ("1.2.3-4", "patch", None, 0, "1.2.3"),
+    ("1.2.3-alpha.0.beta", "major", None, 0, "2.0.0"),
+    ("1.2.3-alpha.0.beta", "minor", None, 0, "1.3.0"),
+    ("1.2.3-alpha.0.beta", "patch", None, 0, "1.2.3"),
+    ("1.2.0-1", "minor", None, 0, "1.2.0"),
+    ("1.0.0-1", "major", None, 0, "1.0.0"),
+    ("1.2.4", "prerelease", None, 0, "1.2.5-0"),
+    ("1.2.3-0", "prerelease", None, 0, "1.2.3-1"),
+    ("1.2.3-alpha.0", "prerelease", None, 0, "1.2.3-alpha.1"),
+    ("1.2.3-alpha.1", "prerelease", None, 0, "1.2.3-alpha.2"),
+    ("1.2.3-alpha.0.beta", "prerelease", None, 0, "1.2.3-alpha.1.beta"),
+    ("1.2.3-alpha.10.0.beta", "prerelease", None, 0, "1.2.3-alpha.10.1.beta"),
+    ("1.2.3-alpha.9.beta", "prerelease", None, 0, "1.2.3-alpha.10.beta"),
+    ("1.2.3-alpha", "prerelease", None, 0, "1.2.3-alpha.0"),
+    ("1.2.0", "prepatch", None, 0, "1.2.1-0"),
+    ("1.2.0-1", "prepatch", None, 0, "1.2.1-0"),
+    ("1.2.0", "preminor", None, 0, "1.3.0-0"),
+    ("1.2.3-1", "preminor", None, 0, "1.3.0-0"),
+    ("1.2.0", "premajor", None, 0, "2.0.0-0"),
+    ("1.2.3-1", "premajor", None, 0, "2.0.0-0"),
+    # --preid
+    ("1.2.3", "major", "dev", 0, "2.0.0"),
+    ("1.2.3", "premajor", "dev", 0, "2.0.0-dev.0"),
+    ("1.2.3", "preminor", "dev", 0, "1.3.0-dev.0"),
+    ("1.2.3", "prepatch", "dev", 0, "1.2.4-dev.0"),
+    ("1.2.3", "prerelease", "dev", 0, "1.2.4-dev.0"),
+    ("1.2.0-dev.0", "prerelease", "dev", 0, "1.2.0-dev.1"),
+    ("1.2.0-dev.1", "prerelease", "dev", 0, "1.2.0-dev.2"),
+    ("1.2.0-dev", "prerelease", "dev", 0, "1.2.0-dev.0"),
+    ("1.2.0-1", "prerelease", "dev", 0, "1.2.0-dev.0"),
+    ("1.2.0-alpha.1", "prerelease", "dev", 0, "1.2.0-dev.0"),
+    ("1.2.0-beta.1", "prerelease", "dev", 0, "1.2.0-dev.0"),
+    ("1.2.0-dev.1", "premajor", "dev", 0, "2.0.0-dev.0"),
+    ("1.2.0-dev.1", "preminor", "dev", 0, "1.3.0-dev.0"),
+    ("1.2.0-dev.1", "prepatch", "dev", 0, "1.2.1-dev.0"),
+    # --preid with identifier base 1
+    ("1.2.3", "prerelease", "dev", 1, "1.2.4-dev.1"),
+    ("1.2.3", "premajor", "dev", 1, "2.0.0-dev.1"),
+    ("1.2.0-dev.1", "prerelease", "dev", 1, "1.2.0-dev.2"),
+]
+
+# (greater, lesser) pairs
+GREATER = [
+    ("0.0.0", "0.0.0-foo"),
+    ("0.0.1", "0.0.0"),
+    ("1.0.0", "0.9.9"),
+    ("0.10.0", "0.9.0"),
+    ("0.99.0", "0.10.0"),
+    ("2.0.0", "1.2.3"),
+    ("v0.0.0", "0.0.0-foo"),
+    ("1.2.3", "1.2.3-asdf"),
+    ("1.2.3", "1.2.3-4"),
+    ("1.2.3", "1.2.3-4-foo"),
+    ("1.2.3-5-foo", "1.2.3-5"),
+    ("1.2.3-5", "1.2.3-4"),
+    ("1.2.3-5-foo", "1.2.3-5-Foo"),
+    ("3.0.0", "2.7.2+asdf"),
+    ("1.2.3-a.10", "1.2.3-a.5"),
+    ("1.2.3-a.b", "1.2.3-a.5"),
+    ("1.2.3-a.b", "1.2.3-a"),
+    ("1.2.3-a.b.c.10.d.5", "1.2.3-a.b.c.5.d.100"),
+    ("1.2.3-r2", "1.2.3-r100"),
+    ("1.2.3-r100", "1.2.3-R2"),
+]
+
+# Pairs of equal precedence
+EQUAL = [
+    ("1.2.3", "v1.2.3"),
+    ("1.2.3-beta", "v1.2.3-beta"),
+    ("1.2.3+build", "1.2.3"),
+    ("1.2.3+build", "1.2.3+other"),
+    ("1.2.3-beta+build", "1.2.3-beta"),
+    ("1.2.3-beta.4+a.b", "1.2.3-beta.4+c"),
+]
+
+# Precedence order from the semver specification (section 11)
+SPEC_ORDER = [
+    "1.0.0-alpha",
+    "1.0.0-alpha.1",
+    "1.0.0-alpha.beta",
+    "1.0.0-beta",
+    "1.0.0-beta.2",
+    "1.0.0-beta.11",
+    "1.0.0-rc.1",
+    "1.0.0",
+]
+
+INVALID = [
+    "",
+    "fake",
+    "1.2",
+    "1.2.3.4",
+    "1.2.3tag",
+    "01.2.3",
+    "1.02.3",
+    "1.2.03",
+    "1.2.3-01",
+    "1.2.3-",
+    "1.2.3+",
+    "1.2.3-a..b",
+    "1.2.3+a..b",
+    "a.b.c",
+    "9007199254740992.0.0",
+    "1." + "1" * 260 + ".0",
+]
+
+
+class IncTest(unittest.TestCase):
+
+    def test_node_semver_vectors(self):
+        for version, release, identifier, base, expected in INCREMENTS:
+            with self.subTest(version=version, release=release, identifier=identifier, base=base):
+                self.assertEqual(semver.inc(version, release, identifier, base), expected)
+
+    def test_rejects_unknown_release_type(self):
+        with self.assertRaises(ValueError):
+            semver.inc("1.2.3", "fake")
+
+    def test_rejects_invalid_version(self):
+        for version in INVALID:
+            with self.subTest(version=version):
+                with self.assertRaises(ValueError):
+                    semver.inc(version, "patch")
+
+    def test_rejects_invalid_identifier(self):
+        for identifier in ("bad id", "a..b", "01", "beta!"):
+            with self.subTest(identifier=identifier):
+                with self.assertRaises(ValueError):
+                    semver.inc("1.2.3", "prerelease", identifier)
+
+
+class CompareTest(unittest.TestCase):
+
+    def test_greater(self):
+        for greater, lesser in GREATER:
+            with self.subTest(greater=greater, lesser=lesser):
+                self.assertEqual(semver.compare(greater, lesser), 1)
+                self.assertEqual(semver.compare(lesser, greater), -1)
+
+    def test_equal_ignores_build_metadata(self):
+        for a, b in EQUAL:
+            with self.subTest(a=a, b=b):
+                self.assertEqual(semver.compare(a, b), 0)
+                self.assertEqual(semver.parse(a), semver.parse(b))
+                self.assertEqual(hash(semver.parse(a)), hash(semver.parse(b)))
+
+    def test_sort_follows_spec_precedence(self):
+        shuffled = SPEC_ORDER[3:] + SPEC_ORDER[:3]
+        self.assertEqual(semver.sort_versions(reversed(shuffled)), SPEC_ORDER)
+        self.assertEqual(semver.sort_versions(shuffled, reverse=True), SPEC_ORDER[::-1])
+
+    def test_rejects_invalid_version(self):
+        for version in INVALID:
+            with self.subTest(version=version):
+                with self.assertRaises(ValueError):
+                    semver.compare(version, "1.2.3")
+
+
+class ValidTest(unittest.TestCase):
+
+    def test_normalises(self):
+        self.assertEqual(semver.valid("v1.2.3"), "1.2.3")
+        self.assertEqual(semver.valid(" 1.2.3 "), "1.2.3")
+        self.assertEqual(semver.valid("1.2.3-beta.1+build.5"), "1.2.3-beta.1")
+
+    def test_invalid_is_none(self):
+        for version in INVALID:
+            with self.subTest(version=version):
+                self.assertIsNone(semver.valid(version))
+
+
+if __name__ == "__main__":
+    unittest.main()
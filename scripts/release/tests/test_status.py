@@ -0,0 +1,109 @@
+"""
+Tests for the machine-readable check-status output: the `--format json`
+document and the `--format ndjson` stream, for one workspace and for
+`--workspaces`.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import contextlib
+import io
+import json
+import shutil
+import unittest
+
+import support
+
+from releasemanager import status
+
+
+class FlushRecorder(io.StringIO):
+    """stdout stand-in that records what had been written at every flush."""
+
+    def __init__(self):
+        super().__init__()
+        self.flushed = []
+        self._mark = 0
+
+    def flush(self):
+        super().flush()
+        self.flushed.append(self.getvalue()[self._mark:])
+        self._mark = len(self.getvalue())
+
+
+class StatusFormatTest(support.FixtureTestCase):
+
+    def capture(self, function, *args, **kwargs):
+        out = FlushRecorder()
+        with contextlib.redirect_stdout(out):
+            try:
+                function(*args, **kwargs)
+            except SystemExit as e:
+                self.assertIn(e.code, (None, 0))
+        return out
+
+    def assert_one_object_per_flush(self, out):
+        """Every flush carries exactly one complete JSON line; returns the objects."""
+        chunks = [chunk for chunk in out.flushed if chunk]
+        self.assertEqual("".join(chunks), out.getvalue())
+        objects = []
+        for chunk in chunks:
+            self.assertTrue(chunk.endswith("\n"), chunk)
+            self.assertEqual(chunk.count("\n"), 1, chunk)
+            objects.append(json.loads(chunk))
+        return objects
+
+    def test_json_document(self):
+        result = support.release_manager(self.root, "check-status", "--format", "json")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        document = json.loads(result.stdout)
+        self.assertEqual(sorted(document), ["components", "issues"])
+        names = [record["name"] for record in document["components"]]
+        self.assertEqual(names, status.status_components())
+        core = document["components"][names.index("lex-core")]
+        self.assertEqual(core["version"], "0.3.0")
+        self.assertIsInstance(document["issues"], list)
+
+    def test_ndjson_streams_one_record_per_component(self):
+        objects = self.assert_one_object_per_flush(
+            self.capture(status.check_status, use_cache=False, output_format="ndjson"))
+        *components, issues = objects
+        self.assertEqual({o["type"] for o in components}, {"component"})
+        self.assertEqual(sorted(o["name"] for o in components), sorted(status.status_components()))
+        self.assertEqual(issues["type"], "issues")
+        self.assertIsInstance(issues["issues"], list)
+
+    def test_ndjson_matches_json(self):
+        streamed = support.release_manager(self.root, "check-status", "--format", "ndjson")
+        document = support.release_manager(self.root, "check-status", "--format", "json")
+        lines = [json.loads(line) for line in streamed.stdout.splitlines()]
+        records = {o["name"]: {k: v for k, v in o.items() if k != "type"} for o in lines[:-1]}
+        expected = json.loads(document.stdout)
+        self.assertEqual(records, {record["name"]: record for record in expected["components"]})
+        self.assertEqual(lines[-1]["issues"], expected["issues"])
+
+    def test_workspaces_ndjson_flushes_per_checkout(self):
+        other = self.root + "-other"
+        shutil.copytree(self.root, other, symlinks=True)
+        self.addCleanup(shutil.rmtree, other, True)
+        objects = self.assert_one_object_per_flush(
+            self.capture(status.check_workspaces, [self.root, other], processes=1, output_format="ndjson"))
+        self.assertEqual([o["type"] for o in objects], ["workspace", "workspace"])
+        self.assertEqual([o["root"] for o in objects], [self.root, other])
+        for o in objects:
+            self.assertNotIn("error", o)
+            self.assertEqual([record["name"] for record in o["components"]], status.status_components())
+
+    def test_workspaces_json_reports_broken_checkout(self):
+        result = support.release_manager(self.root, "check-status", "--format", "json",
+                                         "--workspaces", self.root, self.path("scripts"), "--processes", "1")
+        self.assertEqual(result.returncode, 1)
+        workspaces = json.loads(result.stdout)["workspaces"]
+        self.assertEqual([w["root"] for w in workspaces], [self.root, self.path("scripts")])
+        self.assertIn("components", workspaces[0])
+        self.assertIn("error", workspaces[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
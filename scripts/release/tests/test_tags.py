@@ -0,0 +1,77 @@
+"""
+Tests for releasemanager.tags: parsing ref listings and ordering tags.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from releasemanager import tags  # noqa: E402
+
+C1 = "1" * 40
+C2 = "2" * 40
+TAG_OBJECT = "a" * 40
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_lightweight_and_annotated_tags(self):
+        output = f"{C1}  v0.1.0\n{TAG_OBJECT} {C2} v0.2.0\n"
+        index = tags.TagIndex.parse(output)
+        self.assertEqual(index.commit("v0.1.0"), C1)
+        # Annotated tags resolve to the commit they peel to
+        self.assertEqual(index.commit("v0.2.0"), C2)
+        self.assertEqual(len(index), 2)
+
+    def test_ignores_malformed_lines(self):
+        index = tags.TagIndex.parse(f"\ngarbage\n{C1}  v1.0.0\n")
+        self.assertEqual(list(index.commits()), ["v1.0.0"])
+        self.assertEqual(len(tags.TagIndex.parse(None)), 0)
+
+
+class OrderingTest(unittest.TestCase):
+
+    def index(self, *names):
+        return tags.TagIndex({name: C1 for name in names})
+
+    def test_versions_sorted_by_semver_not_text(self):
+        index = self.index("v0.9.0", "v0.10.0", "v0.10.0-rc.1", "v0.2.0", "v1.0.0-beta.2", "v1.0.0-beta.11")
+        self.assertEqual(index.versions("v"),
+                         ["1.0.0-beta.11", "1.0.0-beta.2", "0.10.0", "0.10.0-rc.1", "0.9.0", "0.2.0"])
+
+    def test_invalid_versions_sort_below_valid_ones(self):
+        index = self.index("v0.1.0", "vnext", "v0.0.1")
+        self.assertEqual(index.versions("v"), ["0.1.0", "0.0.1", "next"])
+
+    def test_prefixed_monorepo_tags(self):
+        index = self.index("lex-babel-v0.3.0", "lex-babel-v0.10.0", "lex-cli-v2.0.0", "v5.0.0")
+        self.assertEqual(index.latest_for_component("lex-babel"), "lex-babel-v0.10.0")
+        self.assertEqual(index.latest_for_component("lex-cli"), "lex-cli-v2.0.0")
+
+    def test_falls_back_to_plain_tags(self):
+        index = self.index("v0.2.1", "v0.2.0", "lex-cli-v9.0.0")
+        self.assertEqual(index.latest_for_component("lex-lsp"), "v0.2.1")
+
+    def test_skips_test_tags(self):
+        index = self.index("v100.0.0", "v100.1.0", "v0.3.0")
+        self.assertEqual(index.latest_for_component("lex-core"), "v0.3.0")
+        self.assertEqual(self.index("v100.0.0").latest_for_component("lex-core"), None)
+        # Only the plain fallback skips them
+        self.assertEqual(index.latest("v"), "v100.1.0")
+
+    def test_add_resets_sorted_views(self):
+        index = self.index("v0.1.0")
+        self.assertEqual(index.latest("v"), "v0.1.0")
+        index.add("v0.2.0", C2)
+        self.assertEqual(index.latest("v"), "v0.2.0")
+        self.assertIn("v0.2.0", index)
+        self.assertEqual(index.commit("v0.2.0"), C2)
+
+
+if __name__ == "__main__":
+    unittest.main()
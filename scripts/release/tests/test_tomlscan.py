@@ -0,0 +1,171 @@
+"""
+Tests for releasemanager.tomlscan: dependency lookup in Cargo manifests and
+byte-exact string edits.
+
+Run with:
+    python -m unittest discover -s scripts/release/tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from releasemanager import tomlscan  # noqa: E402
+
+MANIFEST = '''\
+# lex-core = "9.9.9" is only mentioned in this comment
+[package]
+name = "lex-cli"
+version = "0.3.0"  # bumped by release-manager
+description = "Uses lex-core = \\"1.0\\" as a string"
+keywords = [
+    "lex",  # lex-core = "8.8.8"
+    # "lex-core",
+    'markup',
+]
+
+[dependencies]
+lex-core = "0.3.0"
+not-lex-core = "7.0.0"
+lex-babel.workspace = true
+lex-config = { version = "0.2.1", path = "../config" }
+
+[dependencies.lex-analysis]
+version = "0.1.4"
+features = ["full"]
+
+[target.'cfg(unix)'.dependencies]
+lex-lsp = { version = "0.5.0", optional = true }
+
+[dev-dependencies]
+lex-core = { path = "../core" }
+'''
+
+
+def doc(text=MANIFEST):
+    return tomlscan.TomlDocument(text)
+
+
+def versions(document):
+    return [(dep.name, dep.version.value if dep.version else None) for dep in document.dependencies()]
+
+
+class LookupTest(unittest.TestCase):
+
+    def test_package_version(self):
+        self.assertEqual(doc().package_version().value, "0.3.0")
+
+    def test_comments_and_strings_are_not_dependencies(self):
+        names = [dep.name for dep in doc().find_dependency("lex-core")]
+        # The [dependencies] entry and the [dev-dependencies] one only
+        self.assertEqual(len(names), 2)
+        self.assertEqual(doc().dependency_versions("lex-core"), {"lex-core": "0.3.0"})
+
+    def test_look_alike_keys_are_distinct(self):
+        self.assertEqual(doc().dependency_versions("not-lex"), {"not-lex-core": "7.0.0"})
+        self.assertEqual([dep.version.value for dep in doc().find_dependency("not-lex-core")], ["7.0.0"])
+
+    def test_dotted_workspace_key(self):
+        [dep] = doc().find_dependency("lex-babel")
+        self.assertTrue(dep.workspace)
+        self.assertIsNone(dep.version)
+        self.assertEqual(dep.table, ("dependencies",))
+
+    def test_inline_table(self):
+        [dep] = doc().find_dependency("lex-config")
+        self.assertEqual(dep.version.value, "0.2.1")
+        self.assertEqual(dep.path, "../config")
+
+    def test_dependency_table_form(self):
+        [dep] = doc().find_dependency("lex-analysis")
+        self.assertEqual(dep.version.value, "0.1.4")
+        self.assertEqual(dep.table, ("dependencies",))
+
+    def test_target_specific_table(self):
+        [dep] = doc().find_dependency("lex-lsp")
+        self.assertEqual(dep.version.value, "0.5.0")
+        self.assertEqual(dep.table, ("target", "cfg(unix)", "dependencies"))
+
+    def test_dependencies_in_document_order(self):
+        self.assertEqual(versions(doc()), [
+            ("lex-core", "0.3.0"),
+            ("not-lex-core", "7.0.0"),
+            ("lex-babel", None),
+            ("lex-config", "0.2.1"),
+            ("lex-analysis", "0.1.4"),
+            ("lex-lsp", "0.5.0"),
+            ("lex-core", None),
+        ])
+
+    def test_multiline_array_with_comments(self):
+        self.assertEqual(doc().array_values("package", "keywords"), ["lex", "markup"])
+        self.assertEqual(doc().array_values("dependencies", "lex-analysis", "features"), ["full"])
+
+    def test_escaped_strings_are_decoded(self):
+        self.assertEqual(doc().value("package", "description"), 'Uses lex-core = "1.0" as a string')
+
+    def test_workspace_dependencies(self):
+        document = doc('[workspace]\nmembers = ["a", "b"]\n\n[workspace.dependencies]\nlex-core = "0.3.0"\n')
+        self.assertEqual(document.array_values("workspace", "members"), ["a", "b"])
+        self.assertEqual(document.dependency_versions(), {"lex-core": "0.3.0"})
+
+    def test_unknown_syntax_is_skipped_per_line(self):
+        document = doc('[package]\n= broken\nversion = "1.2.3"\n')
+        self.assertEqual(document.package_version().value, "1.2.3")
+
+
+class EditTest(unittest.TestCase):
+
+    def test_no_edits_round_trips(self):
+        self.assertEqual(doc().with_strings_replaced([]), MANIFEST)
+
+    def test_edits_change_only_string_contents(self):
+        document = doc()
+        edits = [(document.package_version(), "0.4.0")]
+        edits += [(dep.version, "0.4.0") for dep in document.find_dependency("lex-core") if dep.version]
+        edits += [(dep.version, "0.2.0") for dep in document.find_dependency("lex-analysis")]
+        expected = (MANIFEST
+                    .replace('version = "0.3.0"  #', 'version = "0.4.0"  #')
+                    .replace('lex-core = "0.3.0"', 'lex-core = "0.4.0"')
+                    .replace('version = "0.1.4"', 'version = "0.2.0"'))
+        self.assertEqual(document.with_strings_replaced(edits), expected)
+
+    def test_edited_text_rescans_to_new_values(self):
+        document = doc()
+        [dep] = document.find_dependency("lex-lsp")
+        text = document.with_strings_replaced([(dep.version, "0.6.0")])
+        self.assertEqual(doc(text).dependency_versions("lex-lsp"), {"lex-lsp": "0.6.0"})
+        # Everything else is untouched
+        self.assertEqual(versions(doc(text))[:5], versions(document)[:5])
+
+    def test_basic_strings_are_escaped(self):
+        document = doc()
+        text = document.with_strings_replaced([(document.get("package", "description"), 'say "hi"')])
+        self.assertIn('description = "say \\"hi\\""\n', text)
+        self.assertEqual(doc(text).value("package", "description"), 'say "hi"')
+
+    def test_literal_strings_are_not_escaped(self):
+        document = doc("[dependencies]\nlex-core = '0.3.0'\n")
+        [dep] = document.find_dependency("lex-core")
+        self.assertEqual(document.with_strings_replaced([(dep.version, "0.4.0")]),
+                         "[dependencies]\nlex-core = '0.4.0'\n")
+
+    def test_crlf_line_endings_are_kept(self):
+        text = '[package]\r\nname = "x"\r\nversion = "1.0.0"\r\n'
+        document = doc(text)
+        self.assertEqual(document.with_strings_replaced([(document.package_version(), "1.0.1")]),
+                         text.replace("1.0.0", "1.0.1"))
+
+    def test_only_strings_can_be_replaced(self):
+        document = doc()
+        [dep] = document.find_dependency("lex-babel")
+        workspace = document.get("dependencies", "lex-babel", "workspace")
+        self.assertTrue(dep.workspace)
+        with self.assertRaises(ValueError):
+            document.with_strings_replaced([(workspace, "false")])
+
+
+if __name__ == "__main__":
+    unittest.main()